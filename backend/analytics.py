@@ -0,0 +1,440 @@
+# Columnar per-profile transaction snapshots for the analytics endpoints
+#
+# A profile's transactions are loaded once into NumPy arrays (dates as days
+# since 1970-01-01, amounts, and dictionary-encoded type, category and
+# account codes) and every report is computed over them with vectorized
+# operations (bincount, cumsum, lexsort) instead of per-row Python or one
+# SQL query per chart.
+#
+# Snapshots are cached per worker and stamped with the profile data
+# version. When the version has moved on, the cached snapshot is patched
+# with the transactions stamped since then and the transaction tombstones
+# (see the changes feed in routes/changes.py), so a write costs two indexed
+# queries rather than a reload of the whole profile.
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from models import db, DeletedRecord, Transaction
+
+TYPES = ('expense', 'income')
+LOAD_BATCH_SIZE = 50000
+# Past this share of changed rows, reloading is cheaper than patching
+MAX_PATCH_FRACTION = 0.25
+DEFAULT_MAX_MB = 256
+
+SNAPSHOT_COLUMNS = (Transaction.id, Transaction.date, Transaction.amount, Transaction.type,
+                    Transaction.category, Transaction.account_id)
+TYPE_CODES = {tx_type: code for code, tx_type in enumerate(TYPES)}
+
+
+def to_day(value):
+    """date -> days since 1970-01-01"""
+    return int(np.datetime64(value, 'D').astype(np.int64))
+
+
+def from_day(day):
+    return str(np.datetime64(int(day), 'D'))
+
+
+def from_month(month):
+    """Months since 1970-01 -> 'YYYY-MM'"""
+    return str(np.datetime64(int(month), 'M'))
+
+
+def to_month(value):
+    return int(np.datetime64(value, 'M').astype(np.int64))
+
+
+class ProfileSnapshot:
+    """
+    One profile's transactions at one data version, as parallel arrays
+    Never modified once built, so requests can share it without locking
+    categories/accounts: the dictionaries behind category_codes/account_codes
+    """
+
+    def __init__(self, version, ids, days, amounts, type_codes, category_codes, account_codes,
+                 categories, accounts):
+        self.version = version
+        self.ids = ids
+        self.days = days
+        self.months = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int32)
+        self.amounts = amounts
+        self.type_codes = type_codes
+        self.category_codes = category_codes
+        self.account_codes = account_codes
+        self.categories = categories
+        self.accounts = accounts
+        self._amount_order = None
+        self._category_amount_order = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        arrays = (self.ids, self.days, self.months, self.amounts, self.type_codes, self.category_codes,
+                  self.account_codes)
+        # Plus the two int32 sort orders, which are only built on first use
+        return sum(array.nbytes for array in arrays) + 8 * len(self)
+
+    @property
+    def amount_order(self):
+        """Row indices by amount, sorted on first use (for percentiles)"""
+        if self._amount_order is None:
+            self._amount_order = np.argsort(self.amounts, kind='stable').astype(np.int32)
+        return self._amount_order
+
+    @property
+    def category_amount_order(self):
+        """Row indices by category, then amount, sorted on first use"""
+        if self._category_amount_order is None:
+            regroup = np.argsort(self.category_codes[self.amount_order], kind='stable')
+            self._category_amount_order = self.amount_order[regroup]
+        return self._category_amount_order
+
+    def mask(self, tx_type=None, date_from=None, date_to=None, account_id=None):
+        """Boolean row filter; dates are inclusive"""
+        selected = np.ones(len(self), dtype=bool)
+        if tx_type is not None:
+            selected &= self.type_codes == TYPE_CODES[tx_type]
+        if date_from is not None:
+            selected &= self.days >= to_day(date_from)
+        if date_to is not None:
+            selected &= self.days <= to_day(date_to)
+        if account_id is not None:
+            if account_id not in self.accounts:
+                return np.zeros(len(self), dtype=bool)
+            selected &= self.account_codes == self.accounts.index(account_id)
+        return selected
+
+
+def encode_column(values, dictionary, index):
+    """Dictionary-encode values, extending dictionary/index with unseen ones"""
+    for value in set(values) - index.keys():
+        index[value] = len(dictionary)
+        dictionary.append(value)
+    return np.fromiter(map(index.__getitem__, values), dtype=np.int32, count=len(values))
+
+
+def encode_rows(rows, categories, category_index, accounts, account_index):
+    """
+    Column arrays for (id, date, amount, type, category, account_id) rows
+    Dates may be date objects or ISO strings (raw SQLite values)
+    Extends the category/account dictionaries in place with unseen values
+    """
+    if not rows:
+        return (np.empty(0, np.int64), np.empty(0, np.int32), np.empty(0, np.float64),
+                np.empty(0, np.int8), np.empty(0, np.int32), np.empty(0, np.int32))
+    ids, dates, amounts, types, category_names, account_ids = zip(*rows)
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array(dates, dtype='datetime64[D]').astype(np.int32),
+        np.array(amounts, dtype=np.float64),
+        np.fromiter(map(TYPE_CODES.__getitem__, types), dtype=np.int8, count=len(types)),
+        encode_column(category_names, categories, category_index),
+        encode_column(account_ids, accounts, account_index),
+    )
+
+
+def load_snapshot(profile_id, version):
+    """
+    Read all of a profile's transactions in one streamed query
+    The rows skip SQLAlchemy's result processing (as in seed_data.py's
+    loader): NumPy parses the raw values directly, several times faster
+    """
+    categories, accounts = [], []
+    category_index, account_index = {}, {}
+    parts = []
+    connection = db.session.connection(bind_arguments={'mapper': Transaction})
+    marker = '?' if connection.dialect.paramstyle == 'qmark' else '%s'
+    result = connection.execution_options(stream_results=True).exec_driver_sql(
+        f"SELECT {', '.join(column.name for column in SNAPSHOT_COLUMNS)} FROM {Transaction.__tablename__} "
+        f"WHERE profile_id = {marker}", (profile_id,)
+    )
+    for partition in result.partitions(LOAD_BATCH_SIZE):
+        parts.append(encode_rows(partition, categories, category_index, accounts, account_index))
+    columns = encode_rows([], categories, category_index, accounts, account_index)
+    if parts:
+        columns = [np.concatenate(arrays) for arrays in zip(*parts)]
+    return ProfileSnapshot(version, *columns, categories, accounts)
+
+
+def patch_snapshot(snapshot, profile_id, version):
+    """
+    Bring a snapshot forward to version from the rows written since
+    Returns None when so much changed that a reload is the better option
+    """
+    changed = db.session.execute(
+        db.select(*SNAPSHOT_COLUMNS).where(Transaction.profile_id == profile_id,
+                                           Transaction.version > snapshot.version,
+                                           Transaction.version <= version)
+    ).all()
+    if len(changed) > MAX_PATCH_FRACTION * max(len(snapshot), 1):
+        return None
+    deleted = db.session.execute(
+        db.select(DeletedRecord.entity_id).where(DeletedRecord.profile_id == profile_id,
+                                                 DeletedRecord.entity == Transaction.__tablename__,
+                                                 DeletedRecord.version > snapshot.version,
+                                                 DeletedRecord.version <= version)
+    ).scalars().all()
+
+    # Changed rows replace their old copies; new ones are simply appended
+    removed = np.array([row.id for row in changed] + deleted, dtype=np.int64)
+    keep = ~np.isin(snapshot.ids, removed) if len(removed) else np.ones(len(snapshot), dtype=bool)
+    categories, accounts = list(snapshot.categories), list(snapshot.accounts)
+    added = encode_rows(changed, categories, {name: code for code, name in enumerate(categories)},
+                        accounts, {account_id: code for code, account_id in enumerate(accounts)})
+    current = (snapshot.ids, snapshot.days, snapshot.amounts, snapshot.type_codes,
+               snapshot.category_codes, snapshot.account_codes)
+    columns = [np.concatenate((array[keep], new)) for array, new in zip(current, added)]
+    return ProfileSnapshot(version, *columns, categories, accounts)
+
+
+class SnapshotCache:
+    """
+    Per-process LRU of profile snapshots, bounded by their array memory
+    A profile is loaded (or patched) by one request at a time; concurrent
+    requests for it wait and then share the result
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        self.stats = {'hits': 0, 'patches': 0, 'loads': 0, 'evictions': 0}
+
+    def _cached(self, profile_id):
+        with self._lock:
+            snapshot = self._entries.get(profile_id)
+            if snapshot is not None:
+                self._entries.move_to_end(profile_id)
+            return snapshot
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get(self, profile_id, version):
+        """The profile's snapshot at version; needs an app context for misses"""
+        snapshot = self._cached(profile_id)
+        if snapshot is not None and snapshot.version == version:
+            self._count('hits')
+            return snapshot
+
+        with self._lock:
+            loading = self._loading.setdefault(profile_id, threading.Lock())
+        with loading:
+            try:
+                snapshot = self._cached(profile_id)
+                if snapshot is not None and snapshot.version == version:
+                    self._count('hits')
+                    return snapshot
+                if snapshot is not None and snapshot.version > version:
+                    # A replica behind the one that built the cached snapshot;
+                    # answer from its data without replacing the newer entry
+                    self._count('loads')
+                    return load_snapshot(profile_id, version)
+                fresh = None
+                if snapshot is not None and snapshot.version < version:
+                    fresh = patch_snapshot(snapshot, profile_id, version)
+                    if fresh is not None:
+                        self._count('patches')
+                if fresh is None:
+                    fresh = load_snapshot(profile_id, version)
+                    self._count('loads')
+                self._store(profile_id, fresh)
+                return fresh
+            finally:
+                with self._lock:
+                    self._loading.pop(profile_id, None)
+
+    def _store(self, profile_id, snapshot):
+        with self._lock:
+            if snapshot.nbytes > self.max_bytes:
+                self._entries.pop(profile_id, None)
+                return
+            self._entries[profile_id] = snapshot
+            self._entries.move_to_end(profile_id)
+            total = sum(entry.nbytes for entry in self._entries.values())
+            while total > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                total -= evicted.nbytes
+                self.stats['evictions'] += 1
+
+    def report(self):
+        with self._lock:
+            return dict(self.stats, profiles=len(self._entries),
+                        megabytes=round(sum(entry.nbytes for entry in self._entries.values()) / 1048576, 1))
+
+
+def create_snapshot_cache():
+    """ANALYTICS_CACHE_MB bounds the snapshots kept per worker (0 keeps none)"""
+    return SnapshotCache(int(float(os.environ.get('ANALYTICS_CACHE_MB', DEFAULT_MAX_MB)) * 1024 * 1024))
+
+
+# Reports
+# Each takes a snapshot plus parsed arguments and returns plain JSON data.
+# Amounts are rounded to cents on the way out.
+def money(values):
+    return np.round(values, 2).tolist()
+
+
+def sum_by(codes, amounts, length):
+    """Sum of amounts per code in range(length), as floats even when nothing matched"""
+    return np.bincount(codes, weights=amounts, minlength=length).astype(np.float64, copy=False)
+
+
+def rolling_average(snapshot, window, date_from, date_to, tx_type='expense', account_id=None):
+    """Daily totals and their trailing window-day average for each day in [date_from, date_to]"""
+    start, end = to_day(date_from), to_day(date_to)
+    # Start window - 1 days early so the first average covers a full window
+    first = start - window + 1
+    selected = snapshot.mask(tx_type, None, date_to, account_id) & (snapshot.days >= first)
+    daily = sum_by(snapshot.days[selected] - first, snapshot.amounts[selected], end - first + 1)
+    sums = np.concatenate(([0.0], np.cumsum(daily)))
+    averages = (sums[window:] - sums[:-window]) / window
+    days = np.arange(start, end + 1).astype('datetime64[D]').astype(str).tolist()
+    return {
+        'type': tx_type,
+        'window': window,
+        'series': [{'date': day, 'total': total, 'average': average}
+                   for day, total, average in zip(days, money(daily[window - 1:]), money(averages))],
+    }
+
+
+def category_trends(snapshot, months, end_month, tx_type='expense', account_id=None):
+    """
+    Monthly totals per category over the last months months and a linear
+    trend (change per month, least squares) for each
+    """
+    last = to_month(end_month)
+    first = last - months + 1
+    selected = snapshot.mask(tx_type, None, None, account_id)
+    selected &= (snapshot.months >= first) & (snapshot.months <= last)
+    width = len(snapshot.categories)
+    cells = snapshot.category_codes[selected].astype(np.int64) * months + (snapshot.months[selected] - first)
+    grid = sum_by(cells, snapshot.amounts[selected], width * months).reshape(width, months)
+    x = np.arange(months) - (months - 1) / 2
+    slopes = grid @ x / (x @ x) if months > 1 else np.zeros(width)
+    totals = grid.sum(axis=1)
+    active = np.flatnonzero(np.bincount(snapshot.category_codes[selected], minlength=width))
+    order = sorted(active, key=lambda code: (-totals[code], snapshot.categories[code]))
+    return {
+        'type': tx_type,
+        'months': [from_month(month) for month in range(first, last + 1)],
+        'categories': [{
+            'category': snapshot.categories[code],
+            'totals': money(grid[code]),
+            'total': round(float(totals[code]), 2),
+            'average': round(float(totals[code]) / months, 2),
+            'trend': round(float(slopes[code]), 2),
+        } for code in order],
+    }
+
+
+def year_over_year(snapshot, tx_type='expense', account_id=None):
+    """Totals per calendar month for every year with data, with the change on the year before"""
+    selected = snapshot.mask(tx_type, None, None, account_id)
+    months = snapshot.months[selected]
+    if not len(months):
+        return {'type': tx_type, 'years': []}
+    first_year = int(months.min()) // 12
+    span = int(months.max()) // 12 - first_year + 1
+    grid = sum_by(months - first_year * 12, snapshot.amounts[selected], span * 12).reshape(span, 12)
+    totals = grid.sum(axis=1)
+    years = []
+    for row in range(span):
+        previous = totals[row - 1] if row else 0
+        years.append({
+            'year': 1970 + first_year + row,
+            'months': money(grid[row]),
+            'total': round(float(totals[row]), 2),
+            'change': round(float(totals[row] - previous), 2) if row else None,
+            'change_pct': round(float((totals[row] - previous) / previous * 100), 1) if row and previous else None,
+        })
+    return {'type': tx_type, 'years': years}
+
+
+def interpolate(values, order, starts, counts, q):
+    """
+    Quantiles q (0-1) of the runs order[start:start + count], each listing
+    indices of values in ascending order; one row per run, with numpy's
+    default linear interpolation
+    """
+    positions = starts[:, None] + q[None, :] * (counts - 1)[:, None]
+    low = np.floor(positions).astype(np.int64)
+    high = np.ceil(positions).astype(np.int64)
+    low_values, high_values = values[order[low]], values[order[high]]
+    return low_values + (high_values - low_values) * (positions - low)
+
+
+def spend_percentiles(snapshot, percentiles, date_from=None, date_to=None, tx_type='expense', account_id=None):
+    """
+    Percentiles (linear interpolation, like numpy's default) of single
+    transaction amounts overall and per category
+    """
+    # Both orders are sorted once per snapshot; filtering keeps them sorted,
+    # so only the values at the interpolation points are read
+    selected = snapshot.mask(tx_type, date_from, date_to, account_id)
+    by_amount = snapshot.amount_order[selected[snapshot.amount_order]]
+    keys = [f'p{q:g}' for q in percentiles]
+    result = {'type': tx_type, 'count': int(len(by_amount)), 'overall': None, 'categories': []}
+    if not len(by_amount):
+        return result
+    q = np.asarray(percentiles, dtype=np.float64) / 100
+    amounts = snapshot.amounts
+    codes = snapshot.category_codes[selected]
+    counts = np.bincount(codes, minlength=len(snapshot.categories))
+    sums = sum_by(codes, amounts[selected], len(snapshot.categories))
+    overall = interpolate(amounts, by_amount, np.array([0]), np.array([len(by_amount)]), q)[0]
+    result['overall'] = dict(zip(keys, money(overall)), mean=round(float(sums.sum() / len(by_amount)), 2))
+
+    by_category = snapshot.category_amount_order[selected[snapshot.category_amount_order]]
+    present = np.flatnonzero(counts)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+    values = interpolate(amounts, by_category, starts, counts[present], q)
+    for row, code in sorted(enumerate(present), key=lambda item: snapshot.categories[item[1]]):
+        result['categories'].append(dict(
+            zip(keys, money(values[row])), category=snapshot.categories[code], count=int(counts[code]),
+            mean=round(float(sums[code] / counts[code]), 2)
+        ))
+    return result
+
+
+def largest_movers(snapshot, days, end, limit, tx_type='expense', account_id=None):
+    """
+    Categories whose total changed most between the last days days up to end
+    and the days before that, largest increases and decreases first
+    """
+    last = to_day(end)
+    selected = snapshot.mask(tx_type, None, end, account_id) & (snapshot.days > last - 2 * days)
+    current = snapshot.days[selected] > last - days
+    width = len(snapshot.categories)
+    codes, amounts = snapshot.category_codes[selected], snapshot.amounts[selected]
+    now = sum_by(codes[current], amounts[current], width)
+    before = sum_by(codes[~current], amounts[~current], width)
+    change = now - before
+
+    def entries(indices):
+        return [{
+            'category': snapshot.categories[code],
+            'current': round(float(now[code]), 2),
+            'previous': round(float(before[code]), 2),
+            'change': round(float(change[code]), 2),
+            'change_pct': round(float(change[code] / before[code] * 100), 1) if before[code] else None,
+        } for code in indices[:limit]]
+
+    up = np.flatnonzero(change > 0.005)
+    down = np.flatnonzero(change < -0.005)
+    return {
+        'type': tx_type,
+        'current': {'from': from_day(last - days + 1), 'to': from_day(last)},
+        'previous': {'from': from_day(last - 2 * days + 1), 'to': from_day(last - days)},
+        'increases': entries(up[np.argsort(-change[up], kind='stable')]),
+        'decreases': entries(down[np.argsort(change[down], kind='stable')]),
+    }
+
@@ -1,13 +1,13 @@
 # Authentication and Authorization Module
 from functools import wraps
-from flask import session, jsonify, request
-from datetime import datetime, timedelta
+from flask import session, jsonify, g
+import math
 import re
-from collections import defaultdict
 import time
 
-# Rate limiting storage (in production, use Redis)
-rate_limit_storage = defaultdict(list)
+from rate_limit import get_rate_limiter
+from session_store import LAST_ACTIVITY_KEY, check_session_activity, regenerate_session_id
+
 RATE_LIMIT_WINDOW = 300  # 5 minutes
 MAX_LOGIN_ATTEMPTS = 5
 
@@ -48,26 +48,10 @@ def validate_password(password):
 
 def check_rate_limit(identifier, max_attempts=MAX_LOGIN_ATTEMPTS, window=RATE_LIMIT_WINDOW):
     """
-    Simple rate limiting implementation
-    In production, use Redis or similar
+    Record an attempt for identifier against the configured limiter backend
+    Returns (allowed, retry_after_seconds)
     """
-    current_time = time.time()
-    
-    # Clean old entries
-    rate_limit_storage[identifier] = [
-        timestamp for timestamp in rate_limit_storage[identifier]
-        if current_time - timestamp < window
-    ]
-    
-    # Check if rate limit exceeded
-    if len(rate_limit_storage[identifier]) >= max_attempts:
-        oldest_attempt = rate_limit_storage[identifier][0]
-        retry_after = int(window - (current_time - oldest_attempt))
-        return False, retry_after
-    
-    # Record this attempt
-    rate_limit_storage[identifier].append(current_time)
-    return True, 0
+    return get_rate_limiter().hit(identifier, max_attempts, window)
 
 def require_auth(f):
     """
@@ -79,99 +63,76 @@ def require_auth(f):
         if 'user_id' not in session:
             return jsonify({'error': 'Authentication required'}), 401
         
-        # Check session timeout (30 minutes of inactivity)
-        if 'last_activity' in session:
-            last_activity = datetime.fromisoformat(session['last_activity'])
-            if datetime.utcnow() - last_activity > timedelta(minutes=30):
-                session.clear()
-                return jsonify({'error': 'Session expired'}), 401
-        
-        # Update last activity
-        session['last_activity'] = datetime.utcnow().isoformat()
+        # Check session timeout (SESSION_IDLE_TIMEOUT of inactivity)
+        if not check_session_activity():
+            return jsonify({'error': 'Session expired'}), 401
         
         return f(*args, **kwargs)
     return decorated_function
 
+def current_user_id():
+    """
+    Id of the authenticated user, straight from the session
+    Ownership checks only need the id, so they never load the User row
+    """
+    return session.get('user_id')
+
 def get_current_user(User):
     """
     Get the current authenticated user
+    Loaded at most once per request and kept on flask.g
     Returns None if not authenticated
     """
-    if 'user_id' not in session:
+    user_id = session.get('user_id')
+    if user_id is None:
         return None
     
-    user = User.query.get(session['user_id'])
+    user = g.get('current_user')
+    if user is None or user.id != user_id:
+        user = User.query.get(user_id)
+        g.current_user = user
     return user
 
-def require_profile_ownership(Profile):
-    """
-    Decorator to check if the user owns the profile
-    Expects profile_id in route parameters
-    """
-    def decorator(f):
-        @wraps(f)
-        @require_auth
-        def decorated_function(*args, **kwargs):
-            profile_id = kwargs.get('profile_id')
-            if not profile_id:
-                return jsonify({'error': 'Profile ID required'}), 400
-            
-            from flask import g
-            User = g.User  # Get User model from app context
-            
-            user = get_current_user(User)
-            if not user:
-                return jsonify({'error': 'Authentication required'}), 401
-            
-            # Use join to optimize query
-            profile = Profile.query.filter_by(
-                id=profile_id,
-                user_id=user.id
-            ).first()
-            
-            if not profile:
-                return jsonify({'error': 'Profile not found or access denied'}), 404
-            
-            # Store profile in kwargs for the route to use
-            kwargs['profile'] = profile
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
-
-def require_transaction_ownership(Transaction, Profile):
-    """
-    Decorator to check if the user owns the transaction
-    Expects transaction_id in route parameters
-    """
-    def decorator(f):
-        @wraps(f)
-        @require_auth
-        def decorated_function(*args, **kwargs):
-            transaction_id = kwargs.get('transaction_id')
-            if not transaction_id:
-                return jsonify({'error': 'Transaction ID required'}), 400
-            
-            from flask import g
-            User = g.User  # Get User model from app context
-            
-            user = get_current_user(User)
-            if not user:
-                return jsonify({'error': 'Authentication required'}), 401
-            
-            # Optimized query with join
-            transaction = Transaction.query.join(Profile).filter(
-                Transaction.id == transaction_id,
-                Profile.user_id == user.id
-            ).first()
-            
-            if not transaction:
-                return jsonify({'error': 'Transaction not found or access denied'}), 404
-            
-            # Store transaction in kwargs for the route to use
-            kwargs['transaction'] = transaction
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
+class OwnershipCache:
+    """
+    Per-worker TTL cache of user_id -> ids of the profiles they own
+    Profiles never change owner, so the only possible staleness is a profile
+    deleted through another worker, which is bounded by the TTL.
+    A ttl of 0 disables the cache.
+    """
+    def __init__(self, ttl=0, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, profile_ids = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        return profile_ids
+
+    def set(self, user_id, profile_ids):
+        if not self.enabled:
+            return
+        if len(self._entries) >= self.max_entries:
+            # Drop expired entries first, then the oldest insertion
+            now = time.monotonic()
+            for key in [key for key, (expires_at, _) in self._entries.items() if expires_at < now]:
+                del self._entries[key]
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+        self._entries[user_id] = (time.monotonic() + self.ttl, frozenset(profile_ids))
+
+    def invalidate(self, user_id):
+        self._entries.pop(user_id, None)
 
 def sanitize_input(data):
     """
@@ -195,6 +156,9 @@ def validate_transaction_data(data):
     amount = data.get('amount')
     try:
         amount_float = float(amount)
+        # NaN passes both range checks below and would poison totals and balances
+        if not math.isfinite(amount_float):
+            raise ValueError
         if amount_float <= 0:
             errors.append('Amount must be greater than 0')
         if amount_float > 999999999:
@@ -223,8 +187,10 @@ def create_session(user_id):
     Create a new session for the user
     """
     session.clear()
+    regenerate_session_id()
+    now = int(time.time())
     session['user_id'] = user_id
-    session['last_activity'] = datetime.utcnow().isoformat()
-    session['created_at'] = datetime.utcnow().isoformat()
+    session[LAST_ACTIVITY_KEY] = now
+    session['created_at'] = now
     session.permanent = True
 
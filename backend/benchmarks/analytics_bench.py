@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Check and time the analytics endpoints on one large profile
+Usage: python benchmarks/analytics_bench.py [--transactions 1000000] [--runs 20]
+
+Loads the transactions straight into a throwaway SQLite database, then:
+  - times the first report (loads the snapshot) and each report once warm
+  - checks report totals against SQL aggregates and a plain-Python percentile
+  - writes through the API and checks the patched snapshot matches a reload
+Exits non-zero if any check fails.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TMP_DIR, 'analytics.db')}"
+os.environ['QUERY_BUDGET_MODE'] = 'raise'
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+
+import numpy as np
+
+from analytics import load_snapshot
+from app import create_app, init_db
+from extensions import analytics_cache
+from models import db, Transaction
+
+PASSWORD = 'AnalyticsPassw0rd'
+CATEGORIES = ['Food', 'Rent', 'Travel', 'Utilities', 'Health', 'Shopping', 'Fun', 'Salary']
+INSERT_CHUNK = 50000
+REPORTS = ['rolling?window=30', 'category-trends?months=24', 'year-over-year', 'percentiles', 'movers?days=30']
+failures = []
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def load_transactions(profile_id, count):
+    rng = random.Random(7)
+    first = date.today() - timedelta(days=5 * 365)
+    table = Transaction.__table__
+    for start in range(0, count, INSERT_CHUNK):
+        db.session.execute(table.insert(), [{
+            'profile_id': profile_id,
+            'type': 'income' if rng.random() < 0.1 else 'expense',
+            'amount': round(rng.lognormvariate(3, 1), 2),
+            'category': rng.choice(CATEGORIES),
+            'description': '',
+            'date': first + timedelta(days=rng.randrange(5 * 365)),
+        } for _ in range(min(INSERT_CHUNK, count - start))])
+    db.session.commit()
+
+
+def timed(client, url, runs):
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        response = client.get(url)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000, response
+
+
+def same_snapshot(a, b):
+    """Same rows regardless of order or dictionary codes"""
+    def rows(snapshot):
+        order = np.argsort(snapshot.ids)
+        categories = np.array(snapshot.categories, dtype=object)
+        return (snapshot.ids[order], snapshot.days[order], snapshot.amounts[order], snapshot.type_codes[order],
+                categories[snapshot.category_codes[order]])
+    return all(np.array_equal(x, y) for x, y in zip(rows(a), rows(b)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and time the analytics endpoints')
+    parser.add_argument('--transactions', type=int, default=1000000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+    client = app.test_client()
+    client.post('/api/register', json={'username': 'analyst', 'email': 'analyst@example.com', 'password': PASSWORD})
+    client.post('/api/login', json={'username': 'analyst', 'password': PASSWORD})
+    profile_id = client.post('/api/profiles', json={'name': 'Analytics'}).get_json()['id']
+    base = f'/api/profiles/{profile_id}/analytics'
+
+    started = time.perf_counter()
+    with app.app_context():
+        load_transactions(profile_id, args.transactions)
+    print(f'Inserted {args.transactions} transactions in {time.perf_counter() - started:.1f}s\n')
+
+    started = time.perf_counter()
+    client.get(f'{base}/year-over-year')
+    print(f'First report (loads the snapshot): {(time.perf_counter() - started) * 1000:.0f}ms')
+    with app.app_context():
+        print(f"Snapshot size: {analytics_cache.report()['megabytes']}MB\n")
+
+    print(f'{args.runs} x warm report                  median')
+    responses = {}
+    for report in REPORTS:
+        median_ms, responses[report] = timed(client, f'{base}/{report}', args.runs)
+        print(f'{report:<36} {median_ms:>7.2f}ms')
+    print()
+
+    with app.app_context():
+        expense = db.select(db.func.sum(Transaction.amount)).where(Transaction.profile_id == profile_id,
+                                                                   Transaction.type == 'expense')
+        total = db.session.execute(expense).scalar()
+        yearly = sum(year['total'] for year in responses['year-over-year'].get_json()['years'])
+        check('year-over-year totals match SQL', abs(yearly - total) < 0.01 * len(CATEGORIES) * 12)
+
+        movers = responses['movers?days=30'].get_json()
+        window = db.session.execute(
+            db.select(Transaction.category, db.func.sum(Transaction.amount))
+            .where(Transaction.profile_id == profile_id, Transaction.type == 'expense',
+                   Transaction.date >= date.fromisoformat(movers['current']['from']),
+                   Transaction.date <= date.fromisoformat(movers['current']['to']))
+            .group_by(Transaction.category)
+        ).all()
+        reported = {entry['category']: entry['current'] for entry in movers['increases'] + movers['decreases']}
+        check('movers current totals match SQL',
+              all(abs(reported[category] - amount) < 0.01 for category, amount in window if category in reported))
+
+        amounts = sorted(db.session.execute(
+            db.select(Transaction.amount).where(Transaction.profile_id == profile_id,
+                                                Transaction.type == 'expense', Transaction.category == 'Food')
+        ).scalars())
+        position = 0.9 * (len(amounts) - 1)
+        low = int(position)
+        expected = amounts[low] + (amounts[min(low + 1, len(amounts) - 1)] - amounts[low]) * (position - low)
+        food = next(entry for entry in responses['percentiles'].get_json()['categories'] if entry['category'] == 'Food')
+        check('per-category p90 matches a plain-Python percentile', abs(food['p90'] - round(expected, 2)) < 0.01)
+
+    # A write moves the data version on; the next report patches the snapshot
+    with app.app_context():
+        doomed = db.session.execute(
+            db.select(Transaction.id).where(Transaction.profile_id == profile_id).limit(1)
+        ).scalar()
+    client.delete(f'/api/transactions/{doomed}')
+    client.post(f'/api/profiles/{profile_id}/transactions',
+                json={'type': 'expense', 'amount': 99.5, 'category': 'Pets', 'date': date.today().isoformat()})
+    started = time.perf_counter()
+    response = client.get(f'{base}/movers?days=30')
+    print(f'\nFirst report after two writes (patches the snapshot): {(time.perf_counter() - started) * 1000:.0f}ms')
+    check('the new category shows up after the write',
+          any(entry['category'] == 'Pets' for entry in response.get_json()['increases']))
+    with app.app_context():
+        stats = analytics_cache.report()
+        check('the snapshot was patched, not reloaded', stats['patches'] == 1 and stats['loads'] == 1)
+        cached = analytics_cache.get(profile_id, db.session.execute(
+            db.text('SELECT version FROM profile_versions WHERE profile_id = :id'), {'id': profile_id}
+        ).scalar())
+        check('the patched snapshot matches a reload', same_snapshot(cached, load_snapshot(profile_id, 0)))
+
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+    if failures:
+        print(f'\n❌ {len(failures)} check(s) failed')
+        sys.exit(1)
+    print('\n✅ All analytics checks passed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Boot time and per-worker memory of the API, with and without preloading
+Usage: python benchmarks/boot_bench.py [--runs 5] [--workers 4] [--requests 50]
+                                       [--backend-dir DIR] [--out results.json]
+
+Boot: in a fresh interpreter per run, times importing app, building it
+(create_app(), or the import-time module app of older trees) and serving
+the first request, and records the peak RSS.
+
+Workers: forks WORKERS children the way gunicorn's prefork master does,
+once with the app built in the parent before forking (--preload) and once
+with each child importing and building its own app after the fork (the
+default). Every child logs in and serves REQUESTS requests, then the parent
+reads each child's /proc/<pid>/smaps_rollup: USS (pages only that worker
+holds) and PSS (shared pages split between the processes mapping them).
+
+--backend-dir runs against another checkout (e.g. a git worktree of an
+earlier commit) so results can be compared across commits. Linux only.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'SeedPassw0rd'
+BENCH_ENV = {
+    'QUERY_BUDGET_MODE': 'off',
+    'PASSWORD_HASH_ITERATIONS': '1000',
+    'FLASK_ENV': 'production',
+}
+
+BOOT_SNIPPET = '''
+import json, resource, sys, time
+started = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+factory = getattr(module, 'create_app', None)
+application = factory() if factory else module.app
+built = time.perf_counter()
+status = application.test_client().get('/api/health').status_code
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_ms': (built - imported) * 1000,
+    'first_request_ms': (served - built) * 1000,
+    'maxrss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'status': status,
+}))
+'''
+
+
+def load_app(backend_dir):
+    """The app as gunicorn loads it: wsgi:app, or app:app in older trees"""
+    if os.path.exists(os.path.join(backend_dir, 'wsgi.py')):
+        import wsgi
+        return wsgi.app
+    import app as module
+    return module.app
+
+
+def serve(application, requests):
+    """Log in as the seeded user and cycle through the main read routes"""
+    client = application.test_client()
+    client.post('/api/login', json={'username': 'seed1', 'password': PASSWORD})
+    profile_id = client.get('/api/profiles').get_json()[0]['id']
+    paths = [f'/api/profiles/{profile_id}/{path}'
+             for path in ('transactions', 'summary', 'categories', 'accounts', 'budgets')]
+    for index in range(requests):
+        client.get(paths[index % len(paths)])
+
+
+def smaps_rollup(pid):
+    """USS and PSS of a process in MiB"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    uss = values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    return {'uss_mb': uss / 1024, 'pss_mb': values.get('Pss', 0) / 1024, 'rss_mb': values.get('Rss', 0) / 1024}
+
+
+def fork_workers(backend_dir, workers, requests, preload):
+    """
+    Fork workers like a prefork server; returns the parent's and each worker's memory
+    Runs in its own process so preloading in one mode cannot leak into the other
+    """
+    application = None
+    if preload:
+        application = load_app(backend_dir)
+    children = []
+    for _ in range(workers):
+        ready_r, ready_w = os.pipe()
+        exit_r, exit_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            os.close(exit_w)
+            try:
+                serve(application if preload else load_app(backend_dir), requests)
+                os.write(ready_w, b'1')
+            finally:
+                # Stay alive until the parent has measured every worker
+                os.read(exit_r, 1)
+                os._exit(0)
+        os.close(ready_w)
+        os.close(exit_r)
+        children.append((pid, ready_r, exit_w))
+
+    for pid, ready_r, _ in children:
+        if os.read(ready_r, 1) != b'1':
+            raise SystemExit(f'worker {pid} failed')
+    result = {'parent': smaps_rollup(os.getpid()), 'workers': [smaps_rollup(pid) for pid, _, _ in children]}
+    for pid, _, exit_w in children:
+        os.write(exit_w, b'1')
+        os.waitpid(pid, 0)
+    return result
+
+
+def median_of(runs, key):
+    return statistics.median(run[key] for run in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Boot time and per-worker memory')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to time the boot in')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50, help='Requests each worker serves before measuring')
+    parser.add_argument('--backend-dir', default=BACKEND_DIR, help='Backend checkout to measure')
+    parser.add_argument('--out', help='Write results to this JSON file')
+    parser.add_argument('--fork-mode', choices=['preload', 'default'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    backend_dir = os.path.abspath(args.backend_dir)
+
+    if args.fork_mode:
+        sys.path.insert(0, backend_dir)
+        print(json.dumps(fork_workers(backend_dir, args.workers, args.requests, args.fork_mode == 'preload')))
+        return
+
+    tmp_dir = tempfile.mkdtemp()
+    database = os.path.join(tmp_dir, 'boot_bench.db')
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', **BENCH_ENV)
+    subprocess.run([sys.executable, 'seed_data.py', '--users', '1', '--profiles', '1', '--transactions', '500',
+                    '--password', PASSWORD],
+                   cwd=backend_dir, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    boots = []
+    for _ in range(args.runs):
+        output = subprocess.check_output([sys.executable, '-c', BOOT_SNIPPET], cwd=backend_dir, env=env,
+                                         stderr=subprocess.DEVNULL, text=True)
+        boots.append(json.loads(output.strip().splitlines()[-1]))
+    boot = {key: median_of(boots, key) for key in ('import_ms', 'create_ms', 'first_request_ms', 'maxrss_mb')}
+    print(f"Boot (median of {args.runs}): import {boot['import_ms']:.0f}ms, build {boot['create_ms']:.0f}ms, "
+          f"first request {boot['first_request_ms']:.0f}ms, peak RSS {boot['maxrss_mb']:.1f} MiB")
+
+    memory = {}
+    print(f"\n{args.workers} workers x {args.requests} requests   "
+          f"{'worker USS':>10} {'worker PSS':>10} {'total PSS':>10}")
+    for mode in ('default', 'preload'):
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--fork-mode', mode, '--backend-dir', backend_dir,
+             '--workers', str(args.workers), '--requests', str(args.requests)],
+            cwd=backend_dir, env=env, stderr=subprocess.DEVNULL, text=True
+        )
+        result = json.loads(output.strip().splitlines()[-1])
+        workers = result['workers']
+        summary = {
+            'worker_uss_mb': statistics.mean(w['uss_mb'] for w in workers),
+            'worker_pss_mb': statistics.mean(w['pss_mb'] for w in workers),
+            'total_pss_mb': result['parent']['pss_mb'] + sum(w['pss_mb'] for w in workers),
+        }
+        memory[mode] = dict(summary, raw=result)
+        print(f"{mode:<32} {summary['worker_uss_mb']:>7.1f} MiB {summary['worker_pss_mb']:>6.1f} MiB "
+              f"{summary['total_pss_mb']:>6.1f} MiB")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if args.out:
+        commit = None
+        try:
+            commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=backend_dir, text=True).strip()
+        except (OSError, subprocess.CalledProcessError):
+            pass
+        with open(args.out, 'w') as f:
+            json.dump({'commit': commit, 'params': {k: v for k, v in vars(args).items() if k != 'fork_mode'},
+                       'boot': boot, 'boot_runs': boots, 'memory': memory}, f, indent=2)
+        print(f'\n✅ Results written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
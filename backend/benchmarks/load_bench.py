@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Per-route throughput and latency for every API endpoint
+Usage: python benchmarks/load_bench.py [--target testclient|gunicorn|url] [--url URL]
+                                       [--database PATH] [--users 8] [--transactions 2000]
+                                       [--requests 200] [--concurrency 4] [--workers 4]
+                                       [--out results.json]
+
+Seeds a SQLite database with seed_data.py (or reuses --database), logs in one
+seeded user per client thread and drives each route in turn: reads as-is,
+writes as create/delete pairs so the data set stays stable. Targets:
+  testclient  the Flask test client in this process
+  gunicorn    gunicorn --preload -w WORKERS launched on a free local port
+  url         an already running server at --url, seeded with the same password
+Prints requests/sec, p50 and p99 per route and writes the results as JSON,
+tagged with the git commit, so runs can be compared across commits.
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# seed_data.DEFAULT_PASSWORD; importing seed_data would import the app's
+# modules before the benchmark has chosen its database
+DEFAULT_PASSWORD = 'SeedPassw0rd'
+# The app's own per-user limits on these routes (see @rate_limit in routes/)
+RATE_LIMITS = {'POST transactions/bulk': 20, 'GET export': 30}
+BENCH_ENV = {
+    'QUERY_BUDGET_MODE': 'log',
+    'EXPOSE_QUERY_COUNT': 'false',
+    'PASSWORD_HASH_ITERATIONS': '1000',
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Transports
+
+class TestClientSession:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, payload=None, headers=None):
+        response = self.client.open(path, method=method, json=payload, headers=headers)
+        return response.status_code, response.get_data(), response.headers
+
+
+class HTTPSession:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method, path, payload=None, headers=None):
+        data = None if payload is None else json.dumps(payload).encode()
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=dict(headers or {}))
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                return response.status, response.read(), response.headers
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), e.headers
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(database_url, workers, log_path):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, FLASK_ENV='production',
+               METRICS_DIR=tempfile.mkdtemp(), **BENCH_ENV)
+    log = open(log_path, 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--preload', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'wsgi:app'],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'gunicorn exited with {process.returncode}; see {log_path}')
+        try:
+            urllib.request.urlopen(f'{url}/api/health', timeout=1).close()
+            return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f'gunicorn did not answer within 30s; see {log_path}')
+
+
+# Workload
+
+def login(session, username, password):
+    status, body, _ = session.request('POST', '/api/login', {'username': username, 'password': password})
+    if status != 200:
+        raise SystemExit(f'Login as {username} failed ({status}): {body[:200]!r}')
+    profiles = json.loads(session.request('GET', '/api/profiles')[1])
+    profile_id = profiles[0]['id']
+    base = f'/api/profiles/{profile_id}'
+    context = {'profile_id': profile_id, 'base': base}
+    for name in ('categories', 'tags', 'accounts'):
+        context[name] = [row['id'] for row in json.loads(session.request('GET', f'{base}/{name}')[1])]
+    context['etag'] = session.request('GET', f'{base}/transactions')[2].get('ETag')
+    return context
+
+
+def transaction_payload(ctx):
+    return {'type': 'expense', 'amount': 12.5, 'category': 'Groceries', 'date': '2024-03-01',
+            'category_id': ctx['categories'][0], 'account_id': ctx['accounts'][0], 'tag_ids': ctx['tags'][:1]}
+
+
+def timed(session, method, path, payload=None, headers=None):
+    started = time.perf_counter()
+    status, body, _ = session.request(method, path, payload, headers)
+    return status, body, time.perf_counter() - started
+
+
+def routes():
+    """
+    (name, call) pairs; call(session, ctx) issues one operation and returns
+    (status, seconds) for the request being measured
+    """
+    def get(path, headers=None):
+        def call(session, ctx):
+            status, _, elapsed = timed(session, 'GET', path.format(**ctx), headers=headers and headers(ctx))
+            return status, elapsed
+        return call
+
+    def put(path, payload):
+        def call(session, ctx):
+            status, _, elapsed = timed(session, 'PUT', path(ctx), payload)
+            return status, elapsed
+        return call
+
+    def create_delete(create_path, payload, delete_path, measure):
+        # Writes run as pairs so the data set stays the same size; measure
+        # picks which half ('create' or 'delete') is reported
+        def call(session, ctx):
+            status, body, create_elapsed = timed(session, 'POST', create_path.format(**ctx), payload(ctx))
+            if status != 201:
+                return status, create_elapsed
+            delete_status, _, delete_elapsed = timed(session, 'DELETE', delete_path.format(json.loads(body)['id']))
+            return (status, create_elapsed) if measure == 'create' else (delete_status, delete_elapsed)
+        return call
+
+    def bulk(session, ctx):
+        # The import response carries no ids, so these rows stay; they are
+        # dated long ago to keep them off the first transaction page
+        rows = [dict(transaction_payload(ctx), date='2000-01-01')] * 50
+        status, _, elapsed = timed(session, 'POST', '{base}/transactions/bulk'.format(**ctx), rows)
+        return status, elapsed
+
+    category = lambda ctx: {'name': 'Bench', 'type': 'expense'}
+    tag = lambda ctx: {'name': 'bench'}
+    account = lambda ctx: {'name': 'Bench', 'type': 'cash'}
+    budget = lambda ctx: {'amount': 250}
+    return [
+        ('GET check-auth', get('/api/check-auth')),
+        ('GET profiles', get('/api/profiles')),
+        ('GET transactions', get('{base}/transactions')),
+        ('GET transactions (304)', get('{base}/transactions', lambda ctx: {'If-None-Match': ctx['etag']})),
+        ('GET transactions?category', get('{base}/transactions?category=Dining&limit=50')),
+        ('GET transactions?tag', get('{base}/transactions?tag_id={tags[0]}&limit=50')),
+        ('GET summary', get('{base}/summary')),
+        ('GET summary?bucket=week', get('{base}/summary?from=2024-01-01&to=2024-06-30&bucket=week')),
+        ('GET categories', get('{base}/categories')),
+        ('GET tags', get('{base}/tags')),
+        ('GET accounts', get('{base}/accounts')),
+        ('GET budgets', get('{base}/budgets')),
+        ('GET bootstrap (dashboard)', get('{base}/bootstrap?include=transactions,summary,categories,tags,accounts')),
+        ('GET export', get('{base}/export?format=jsonl')),
+        ('GET health', get('/api/health')),
+        ('GET metrics', get('/api/metrics')),
+        ('POST transactions', create_delete('{base}/transactions', transaction_payload,
+                                            '/api/transactions/{}', 'create')),
+        ('DELETE transaction', create_delete('{base}/transactions', transaction_payload,
+                                             '/api/transactions/{}', 'delete')),
+        ('POST transactions/bulk', bulk),
+        ('POST categories', create_delete('{base}/categories', category, '/api/categories/{}', 'create')),
+        ('PUT category', put(lambda ctx: f"/api/categories/{ctx['categories'][0]}", {'color': '#10B981'})),
+        ('DELETE category', create_delete('{base}/categories', category, '/api/categories/{}', 'delete')),
+        ('POST tags', create_delete('{base}/tags', tag, '/api/tags/{}', 'create')),
+        ('DELETE tag', create_delete('{base}/tags', tag, '/api/tags/{}', 'delete')),
+        ('POST accounts', create_delete('{base}/accounts', account, '/api/accounts/{}', 'create')),
+        ('PUT account', put(lambda ctx: f"/api/accounts/{ctx['accounts'][0]}", {'color': '#10B981'})),
+        ('DELETE account', create_delete('{base}/accounts', account, '/api/accounts/{}', 'delete')),
+        ('POST budgets', create_delete('{base}/budgets', budget, '/api/budgets/{}', 'create')),
+        ('DELETE budget', create_delete('{base}/budgets', budget, '/api/budgets/{}', 'delete')),
+    ]
+
+
+def run_route(call, sessions, contexts, requests):
+    """Split requests across one thread per session; returns latencies, statuses and wall time"""
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(sessions) + 1)
+
+    def client_loop(index, count):
+        session, ctx = sessions[index], contexts[index]
+        barrier.wait()
+        for _ in range(count):
+            status, elapsed = call(session, ctx)
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                latencies.append(elapsed)
+
+    per_client = [requests // len(sessions) + (i < requests % len(sessions)) for i in range(len(sessions))]
+    threads = [threading.Thread(target=client_loop, args=(i, n)) for i, n in enumerate(per_client)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-route API load benchmark')
+    parser.add_argument('--target', choices=['testclient', 'gunicorn', 'url'], default='testclient')
+    parser.add_argument('--url', help='Base URL for --target url')
+    parser.add_argument('--database', help='Existing seeded SQLite file (default: seed a fresh one)')
+    parser.add_argument('--users', type=int, default=8, help='Users to seed (at least --concurrency)')
+    parser.add_argument('--transactions', type=int, default=2000, help='Transactions per seeded profile')
+    parser.add_argument('--password', default=DEFAULT_PASSWORD)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route')
+    parser.add_argument('--concurrency', type=int, default=4, help='Client threads, one seeded user each')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers for --target gunicorn')
+    parser.add_argument('--routes', help='Comma-separated substrings; only run matching routes')
+    parser.add_argument('--out', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    database = args.database
+    if args.target != 'url' and not database:
+        database = os.path.join(tmp_dir, 'load_bench.db')
+        print(f'🌱 Seeding {args.users} users x {args.transactions} transactions into {database}')
+        subprocess.run([sys.executable, os.path.join(BACKEND_DIR, 'seed_data.py'), '--users', str(args.users),
+                        '--profiles', '1', '--transactions', str(args.transactions), '--password', args.password],
+                       cwd=BACKEND_DIR, env=dict(os.environ, DATABASE_URL=f'sqlite:///{database}', **BENCH_ENV),
+                       check=True, stdout=subprocess.DEVNULL)
+    database_url = f'sqlite:///{os.path.abspath(database)}' if database else None
+
+    server = None
+    if args.target == 'testclient':
+        os.environ.update(BENCH_ENV, DATABASE_URL=database_url)
+        import logging
+        from app import create_app
+        app = create_app()
+        logging.getLogger('routes').setLevel('WARNING')
+        make_session = lambda: TestClientSession(app)
+    else:
+        if args.target == 'gunicorn':
+            server, base_url = start_gunicorn(database_url, args.workers, os.path.join(tmp_dir, 'gunicorn.log'))
+        else:
+            if not args.url:
+                parser.error('--target url requires --url')
+            base_url = args.url
+        make_session = lambda: HTTPSession(base_url)
+
+    try:
+        # Seeded usernames are seed<user id>; ids start at 1 on a fresh database
+        sessions = [make_session() for _ in range(args.concurrency)]
+        contexts = [login(session, f'seed{i + 1}', args.password) for i, session in enumerate(sessions)]
+
+        results = []
+        print(f"\n{'route':<28} {'requests':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}  statuses")
+        for name, call in routes():
+            if args.routes and not any(part in name for part in args.routes.split(',')):
+                continue
+            requests = args.requests
+            if name in RATE_LIMITS:
+                requests = min(requests, RATE_LIMITS[name] * len(sessions))
+            latencies, statuses, wall = run_route(call, sessions, contexts, requests)
+            result = {
+                'route': name,
+                'requests': requests,
+                'throughput': requests / wall if wall else 0,
+                'p50_ms': percentile(latencies, 50) * 1000,
+                'p99_ms': percentile(latencies, 99) * 1000,
+                'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0,
+                'statuses': {str(k): v for k, v in sorted(statuses.items())},
+            }
+            results.append(result)
+            print(f"{name:<28} {requests:>8} {result['throughput']:>9.1f} {result['p50_ms']:>8.2f} "
+                  f"{result['p99_ms']:>8.2f}  {result['statuses']}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    errors = sum(n for r in results for status, n in r['statuses'].items() if int(status) >= 500)
+    if args.out:
+        report = {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'target': args.target,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': {k: v for k, v in vars(args).items() if k not in ('out', 'password')},
+            'routes': results,
+        }
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\n✅ Results written to {args.out}')
+    if errors:
+        print(f'\n⚠️  {errors} server errors')
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
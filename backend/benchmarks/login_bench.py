@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Login throughput vs hashing pool size
+Usage: python benchmarks/login_bench.py [--pools 1,2,4] [--clients 16] [--seconds 5] [--iterations 600000]
+
+Drives POST /api/login from concurrent client threads through the Flask test
+client against a throwaway SQLite database, once per pool size, and reports
+logins/sec, the number of 503s shed by the queue limit and latency percentiles.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(TMP_DIR, 'login_bench.db')}")
+os.environ.setdefault('FLASK_ENV', 'production')
+
+from app import create_app, init_db
+from password_hashing import DEFAULT_ITERATIONS, PasswordHasher
+
+USERNAME = 'benchuser'
+PASSWORD = 'BenchPassw0rd'
+
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(app, pool_size, clients, seconds, iterations):
+    app.extensions['password_hasher'] = PasswordHasher(iterations=iterations, pool_size=pool_size)
+    stop = time.perf_counter() + seconds
+    results = {'ok': 0, 'busy': 0, 'other': 0}
+    latencies = []
+    lock = threading.Lock()
+
+    def client_loop(index):
+        client = app.test_client()
+        n = 0
+        while time.perf_counter() < stop:
+            n += 1
+            started = time.perf_counter()
+            response = client.post('/api/login', json={'username': USERNAME, 'password': PASSWORD},
+                                   headers={'X-Forwarded-For': f'10.{index}.{n // 250}.{n % 250}'})
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    results['ok'] += 1
+                    latencies.append(elapsed)
+                elif response.status_code == 503:
+                    results['busy'] += 1
+                else:
+                    results['other'] += 1
+
+    threads = [threading.Thread(target=client_loop, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"pool={pool_size:<3} {results['ok'] / seconds:>8.1f} logins/sec  "
+          f"503s={results['busy']:<6} errors={results['other']:<4} "
+          f"p50={percentile(latencies, 50) * 1000:.0f}ms p99={percentile(latencies, 99) * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Login throughput vs hashing pool size')
+    parser.add_argument('--pools', default='1,2,4')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--iterations', type=int, default=int(os.environ.get('PASSWORD_HASH_ITERATIONS', DEFAULT_ITERATIONS)))
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+    app.extensions['password_hasher'] = PasswordHasher(iterations=args.iterations)
+    client = app.test_client()
+    client.post('/api/register', json={'username': USERNAME, 'email': 'bench@example.com', 'password': PASSWORD})
+
+    print(f"{args.clients} concurrent clients, pbkdf2 iterations={args.iterations}, {os.cpu_count()} CPUs")
+    for pool_size in [int(value) for value in args.pools.split(',')]:
+        run(app, pool_size, args.clients, args.seconds, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
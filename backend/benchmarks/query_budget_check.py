@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Check every endpoint against its SQL statement budget on a seeded database
+Usage: python benchmarks/query_budget_check.py [--transactions 200]
+
+Runs with QUERY_BUDGET_MODE=raise against a throwaway SQLite database, so a
+route that regresses into an N+1 fails with the statements it issued.
+Exits non-zero on any violation; suitable for CI before deploy.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(TMP_DIR, 'query_budget.db')}")
+os.environ['QUERY_BUDGET_MODE'] = 'raise'
+os.environ['EXPOSE_QUERY_COUNT'] = 'true'
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+
+from app import create_app, init_db
+from query_budget import QueryBudgetExceeded
+
+PASSWORD = 'BudgetPassw0rd'
+
+
+def seed(client, transactions):
+    """Build one profile through the API and return the ids the checks need"""
+    client.post('/api/register', json={'username': 'budget', 'email': 'budget@example.com', 'password': PASSWORD})
+    client.post('/api/login', json={'username': 'budget', 'password': PASSWORD})
+    profile_id = client.post('/api/profiles', json={'name': 'Budget check'}).get_json()['id']
+    base = f'/api/profiles/{profile_id}'
+
+    categories = [client.post(f'{base}/categories', json={'name': name, 'type': 'expense'}).get_json()['id']
+                  for name in ('Food', 'Rent', 'Travel')]
+    tags = [client.post(f'{base}/tags', json={'name': name}).get_json()['id'] for name in ('work', 'home', 'trip')]
+    accounts = [client.post(f'{base}/accounts', json={'name': name, 'type': 'bank'}).get_json()['id']
+                for name in ('Checking', 'Savings')]
+    for category_id in categories:
+        client.post(f'{base}/budgets', json={'category_id': category_id, 'amount': 500})
+
+    rows = [{
+        'type': 'expense' if i % 4 else 'income',
+        'amount': 10 + i,
+        'category': ('Food', 'Rent', 'Travel')[i % 3],
+        'category_id': categories[i % 3],
+        'account_id': accounts[i % 2],
+        'tag_ids': tags[:i % 4],
+        'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+        'description': f'Seeded {i}',
+    } for i in range(transactions)]
+    client.post(f'{base}/transactions/bulk', json=rows)
+    return profile_id, categories, tags, accounts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQL statement budget check for every endpoint')
+    parser.add_argument('--transactions', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        init_db()
+    client = app.test_client()
+    app.config['QUERY_BUDGET_MODE'] = 'off'
+    profile_id, categories, tags, accounts = seed(client, args.transactions)
+    app.config['QUERY_BUDGET_MODE'] = 'raise'
+    base = f'/api/profiles/{profile_id}'
+    transaction = {'type': 'expense', 'amount': 12.5, 'category': 'Food', 'date': '2024-03-01',
+                   'account_id': accounts[0], 'tag_ids': tags}
+
+    def created_id(response):
+        return response.get_json()['id']
+
+    checks = [
+        ('GET', '/api/check-auth', None),
+        ('GET', '/api/profiles', None),
+        ('GET', f'{base}/transactions', None),
+        ('GET', f'{base}/transactions?tag_id={tags[0]}&limit=20', None),
+        ('POST', f'{base}/transactions', transaction),
+        ('POST', f'{base}/transactions/bulk', [transaction] * 20),
+        ('POST', f'{base}/transactions/bulk', [transaction] * 500),
+        ('GET', f'{base}/summary', None),
+        ('GET', f'{base}/summary?from=2024-01-10&to=2024-06-20&bucket=week', None),
+        ('GET', f'{base}/export?format=jsonl', None),
+        ('GET', f'{base}/categories', None),
+        ('GET', f'{base}/tags', None),
+        ('GET', f'{base}/accounts', None),
+        ('GET', f'{base}/budgets?month=3&year=2024', None),
+        ('GET', f'{base}/budgets', None),
+        ('GET', f'{base}/budgets?month=1&year=2000', None),
+        ('GET', f'{base}/bootstrap', None),
+        ('GET', f'{base}/bootstrap?include=budgets&limit=20', None),
+        ('GET', f'{base}/analytics/year-over-year', None),
+        ('GET', f'{base}/analytics/percentiles?p=50,90', None),
+        ('GET', f'{base}/export?format=csv&gzip=1', None),
+        ('GET', f'{base}/transactions?type=income&category=Rent&account_id={accounts[1]}&from=2024-02-01', None),
+        ('PUT', f'/api/categories/{categories[0]}', {'name': 'Groceries'}),
+        ('PUT', f'/api/accounts/{accounts[0]}', {'name': 'Main'}),
+        ('GET', '/api/health', None),
+        ('GET', '/api/metrics', None),
+    ]
+    # Create-then-delete pairs exercise the write routes without disturbing the seed;
+    # the variants cover the data-dependent branches, not just the seeded path
+    plain = {key: value for key, value in transaction.items() if key not in ('account_id', 'tag_ids')}
+    pairs = [
+        (f'{base}/transactions', transaction, '/api/transactions/{}'),
+        (f'{base}/transactions', plain, '/api/transactions/{}'),
+        (f'{base}/transactions', dict(plain, type='income', account_id=accounts[1], category_id=categories[1]),
+         '/api/transactions/{}'),
+        (f'{base}/transactions', dict(plain, tag_ids=[tags[0], 999999], account_id=999999), '/api/transactions/{}'),
+        (f'{base}/categories', {'name': 'Temp', 'type': 'income'}, '/api/categories/{}'),
+        (f'{base}/tags', {'name': 'temp'}, '/api/tags/{}'),
+        (f'{base}/accounts', {'name': 'Temp', 'type': 'cash'}, '/api/accounts/{}'),
+        (f'{base}/budgets', {'amount': 100}, '/api/budgets/{}'),
+        (f'{base}/budgets', {'amount': 100, 'category_id': categories[0], 'month': 1, 'year': 2020},
+         '/api/budgets/{}'),
+    ]
+
+    failures = []
+    results = []
+
+    def run(method, url, payload):
+        try:
+            response = client.open(url, method=method, json=payload)
+        except QueryBudgetExceeded as e:
+            failures.append(e)
+            results.append((method, url, len(e.statements), e.limit, 'OVER'))
+            return None
+        results.append((method, url, int(response.headers.get('X-Query-Count', 0)),
+                        response.headers.get('X-Query-Budget', '?'), response.status_code))
+        # Writes are checked before they commit; the route answers 500 and logs the statements
+        if response.status_code >= 500:
+            failures.append(f'{method} {url} answered {response.status_code}')
+        return response
+
+    for method, url, payload in checks:
+        run(method, url, payload)
+    for create_url, payload, delete_url in pairs:
+        response = run('POST', create_url, payload)
+        if response is not None and response.status_code == 201:
+            run('DELETE', delete_url.format(created_id(response)), None)
+    budget_id = client.post(f'{base}/budgets', json={'amount': 50}).get_json()['id']
+    run('PUT', f'/api/budgets/{budget_id}', {'amount': 75})
+    budget_id = next(b['id'] for b in client.get(f'{base}/budgets').get_json() if b['category_id'])
+    run('PUT', f'/api/budgets/{budget_id}', {'amount': 75})
+    # A budget whose category was deleted since, and one naming another profile's category
+    orphan = client.post(f'{base}/categories', json={'name': 'Orphan', 'type': 'expense'}).get_json()['id']
+    client.post(f'{base}/budgets', json={'category_id': orphan, 'amount': 20})
+    client.delete(f'/api/categories/{orphan}')
+    run('GET', f'{base}/bootstrap', None)
+    run('GET', f'{base}/budgets', None)
+    run('POST', f'{base}/budgets', {'category_id': orphan, 'amount': 20, 'month': 2, 'year': 2020})
+    # The changes feed, as a full snapshot and since the seed (with the pairs' tombstones)
+    run('GET', f'{base}/changes', None)
+    run('GET', f'{base}/changes?since=1', None)
+    run('GET', f'{base}/changes?since=999999', None)
+    # The write pairs moved the data version on, so this patches the cached snapshot
+    run('GET', f'{base}/analytics/movers', None)
+    run('DELETE', f'/api/tags/{created_id(client.post(f"{base}/tags", json={"name": "unused"}))}', None)
+    run('DELETE', f'/api/profiles/{created_id(client.post("/api/profiles", json={"name": "Empty"}))}', None)
+    run('DELETE', f'{base}', None)
+
+    for method, url, count, limit, status in results:
+        print(f'{method:<7} {url:<60} {count:>3} / {limit:<3} {status}')
+    for failure in failures:
+        print(f'\n{failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Compare the ORM + to_dict() + jsonify read path with the column-tuple path
+Usage: python benchmarks/serializer_bench.py [--rows 5000] [--repeat 20]
+
+Seeds a throwaway SQLite profile, then times both paths for transactions
+(with tags), categories and accounts. The stdlib backend should report
+identical output; JSON_BACKEND=orjson should report equivalent output.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(TMP_DIR, 'serializer_bench.db')}")
+os.environ.setdefault('FLASK_ENV', 'production')
+
+import fast_json
+import models as m
+from app import create_app, init_db
+from flask import jsonify
+from routes.common import (
+    ACCOUNT_COLUMNS, CATEGORY_COLUMNS, TRANSACTION_COLUMNS, account_serializer, category_serializer,
+    encode_transaction_rows, json_response, select_columns
+)
+
+
+def seed(rows):
+    user = m.User(username='bench', email='bench@example.com', password_hash='x')
+    m.db.session.add(user)
+    m.db.session.flush()
+    profile = m.Profile(name='Bench', user_id=user.id)
+    m.db.session.add(profile)
+    m.db.session.flush()
+    tags = [m.Tag(profile_id=profile.id, name=f'tag{i}') for i in range(10)]
+    m.db.session.add_all(tags)
+    m.db.session.add_all(m.Category(profile_id=profile.id, name=f'Category {i}', type='expense') for i in range(50))
+    m.db.session.add_all(m.Account(profile_id=profile.id, name=f'Account {i}', type='bank') for i in range(20))
+    m.db.session.flush()
+    start = date(2015, 1, 1)
+    for i in range(rows):
+        tx = m.Transaction(profile_id=profile.id, type='expense', amount=round(random.uniform(1, 500), 2),
+                           category=f'Category {i % 50}', description=f'Row {i} café',
+                           date=start + timedelta(days=i % 3650))
+        tx.tags = random.sample(tags, i % 3)
+        m.db.session.add(tx)
+    m.db.session.commit()
+    return profile.id
+
+
+def timed(fn, repeat):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = fn()
+    return (time.perf_counter() - started) / repeat, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ORM vs column-tuple read path')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    # Seeded outside a request: a GET request context reads from the read-only pool
+    with app.app_context():
+        init_db()
+        profile_id = seed(args.rows)
+
+    with app.test_request_context():
+        T = m.Transaction
+
+        def orm_transactions():
+            items = T.query.filter_by(profile_id=profile_id).order_by(
+                T.date.desc(), T.created_at.desc(), T.id.desc()).all()
+            return jsonify([item.to_dict() for item in items]).get_data()
+
+        def tuple_transactions():
+            rows = m.db.session.execute(select_columns(TRANSACTION_COLUMNS).where(
+                T.profile_id == profile_id).order_by(T.date.desc(), T.created_at.desc(), T.id.desc())).all()
+            return json_response(encode_transaction_rows(rows)).get_data()
+
+        def orm_list(model):
+            return lambda: jsonify([item.to_dict() for item in model.query.filter_by(
+                profile_id=profile_id).order_by(model.name).all()]).get_data()
+
+        def tuple_list(model, spec, serializer):
+            return lambda: json_response(fast_json.encode_list(serializer, m.db.session.execute(
+                select_columns(spec).where(model.profile_id == profile_id).order_by(model.name)).all())).get_data()
+
+        cases = [
+            ('transactions', orm_transactions, tuple_transactions),
+            ('categories', orm_list(m.Category), tuple_list(m.Category, CATEGORY_COLUMNS, category_serializer)),
+            ('accounts', orm_list(m.Account), tuple_list(m.Account, ACCOUNT_COLUMNS, account_serializer)),
+        ]
+        backend = 'orjson' if fast_json.use_orjson() else 'stdlib'
+        print(f"{args.rows} transactions, serializer backend={backend}")
+        for name, orm_fn, tuple_fn in cases:
+            m.db.session.expire_all()
+            orm_time, orm_body = timed(orm_fn, args.repeat)
+            tuple_time, tuple_body = timed(tuple_fn, args.repeat)
+            if orm_body == tuple_body:
+                same = 'identical'
+            else:
+                same = 'equivalent' if json.loads(orm_body) == json.loads(tuple_body) else 'DIFFERS'
+            print(f"{name:<13} orm={orm_time * 1000:8.2f}ms  tuple={tuple_time * 1000:8.2f}ms  "
+                  f"speedup={orm_time / tuple_time:5.1f}x  output {same}")
+
+
+if __name__ == '__main__':
+    main()
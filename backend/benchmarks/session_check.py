@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Check and time session handling with both stores (SESSION_STORE=cookie and database)
+Usage: python benchmarks/session_check.py [--requests 500]
+
+For each store the script checks that:
+  - login sends the session cookie, later requests send none until the
+    activity timestamp is older than SESSION_REFRESH_SECONDS
+  - the database store's cookie is an opaque id and is never re-sent, while
+    its row's expiry slides with the activity
+  - idle sessions expire, logout clears the session and expired rows are purged
+then times authenticated GETs against the old behaviour (timestamp rewritten
+and cookie re-signed on every request). Exits non-zero if any check fails.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TMP_DIR, 'sessions.db')}"
+os.environ['QUERY_BUDGET_MODE'] = 'raise'
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+
+from app import create_app, init_db
+from models import db, UserSession
+
+PASSWORD = 'SessionPassw0rd'
+IDLE_TIMEOUT = 3
+failures = []
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def set_cookies(response):
+    return response.headers.getlist('Set-Cookie')
+
+
+def build_app(store, idle_timeout=IDLE_TIMEOUT, refresh_seconds=1):
+    os.environ['SESSION_STORE'] = store
+    os.environ['SESSION_IDLE_TIMEOUT'] = str(idle_timeout)
+    os.environ['SESSION_REFRESH_SECONDS'] = str(refresh_seconds)
+    app = create_app()
+    with app.app_context():
+        init_db()
+    return app
+
+
+def log_in(client, username):
+    client.post('/api/register', json={'username': username, 'email': f'{username}@example.com',
+                                       'password': PASSWORD})
+    client.post('/api/logout')
+    return client.post('/api/login', json={'username': username, 'password': PASSWORD})
+
+
+def session_rows(app):
+    with app.app_context():
+        return db.session.execute(db.select(UserSession.expires_at)).scalars().all()
+
+
+def check_store(store):
+    print(f'\nSESSION_STORE={store}')
+    app = build_app(store)
+    client = app.test_client()
+    response = log_in(client, f'{store}_user')
+    check('login sends the session cookie', len(set_cookies(response)) == 1)
+    cookie = client.get_cookie(app.config['SESSION_COOKIE_NAME']).value
+
+    sent = sum(len(set_cookies(client.get(path))) for path in ('/api/check-auth', '/api/profiles') * 10)
+    check('20 requests within the refresh interval send no Set-Cookie', sent == 0)
+
+    if store == 'database':
+        check('cookie holds only an opaque id', '.' not in cookie and len(cookie) == 43)
+        expires_before = max(session_rows(app))
+    time.sleep(1.1)
+    response = client.get('/api/check-auth')
+    if store == 'database':
+        check('activity refresh does not re-send the cookie', not set_cookies(response))
+        check('activity refresh extends the row expiry', max(session_rows(app)) > expires_before)
+    else:
+        check('activity refresh re-signs the cookie once', len(set_cookies(response)) == 1)
+    check('session is still authenticated', response.get_json()['authenticated'])
+
+    time.sleep(IDLE_TIMEOUT + 1.1)
+    response = client.get('/api/profiles')
+    # The database store drops the expired row, so that session simply no longer exists
+    expected = 'Authentication required' if store == 'database' else 'Session expired'
+    check('idle session expires', response.status_code == 401 and response.get_json()['error'] == expected)
+
+    log_in(client, f'{store}_user')
+    response = client.post('/api/logout')
+    check('logout clears the cookie', any('Expires=Thu, 01 Jan 1970' in c for c in set_cookies(response)))
+    if store == 'database':
+        check('logout deletes the session row', len(session_rows(app)) == 1)  # the expired session
+        with app.app_context():
+            purged = app.session_interface.purge()
+        check('purge removes expired sessions', purged == 1 and not session_rows(app))
+
+
+def time_requests(app, requests):
+    client = app.test_client()
+    log_in(client, f'bench_{app.config["SESSION_STORE"]}_{app.config["SESSION_REFRESH_SECONDS"]}')
+    durations = []
+    cookies = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get('/api/check-auth')
+        durations.append(time.perf_counter() - started)
+        cookies += len(set_cookies(response))
+    return statistics.median(durations) * 1000, cookies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and time session handling')
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+    for store in ('cookie', 'database'):
+        check_store(store)
+
+    print(f'\n{args.requests} x GET /api/check-auth      median   Set-Cookie headers')
+    for label, store, refresh in (('cookie, refresh every request', 'cookie', 0),
+                                  ('cookie, 60s refresh', 'cookie', 60),
+                                  ('database, 60s refresh', 'database', 60)):
+        app = build_app(store, idle_timeout=1800, refresh_seconds=refresh)
+        # The old behaviour: timestamp rewritten and cookie re-signed every time
+        app.config['SESSION_REFRESH_EACH_REQUEST'] = refresh == 0
+        median_ms, cookies = time_requests(app, args.requests)
+        print(f'{label:<34} {median_ms:>6.3f}ms {cookies:>8}')
+
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+    if failures:
+        print(f'\n❌ {len(failures)} check(s) failed')
+        sys.exit(1)
+    print('\n✅ All session checks passed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Mixed read/write throughput on one SQLite file from several worker processes
+Usage: python benchmarks/sqlite_concurrency_bench.py [--workers 4] [--threads 2] [--seconds 10]
+                                                     [--write-ratio 0.2] [--transactions 2000]
+                                                     [--out results.json]
+
+Seeds a database in the default rollback-journal mode, then for each engine
+profile runs WORKERS processes (as gunicorn would) against a fresh copy of
+it. Each process drives the Flask test client from THREADS threads: reads
+list transactions or the summary, writes add and delete a transaction.
+Profiles:
+  default      SQLITE_TUNING=false: stock pysqlite behaviour
+  tuned        WAL, pragmas, BEGIN IMMEDIATE and the read-only pool
+  tuned-1pool  the same without the separate read pool
+Reports operations/sec, read and write p50/p99 and server errors
+("database is locked" surfaces as a 500).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+PASSWORD = 'SeedPassw0rd'
+PROFILES = {
+    'default': {'SQLITE_TUNING': 'false'},
+    'tuned': {'SQLITE_TUNING': 'true'},
+    'tuned-1pool': {'SQLITE_TUNING': 'true', 'SQLITE_READ_POOL_SIZE': '0'},
+}
+BENCH_ENV = {
+    'QUERY_BUDGET_MODE': 'off',
+    'PASSWORD_HASH_ITERATIONS': '1000',
+    'RESPONSE_CACHE_MAX_ENTRIES': '0',
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def worker(args):
+    """One simulated gunicorn worker; prints its results as a JSON line"""
+    import logging
+    import random
+    from app import create_app
+    app = create_app()
+    logging.getLogger('routes').setLevel(logging.CRITICAL)
+
+    results = {'reads': [], 'writes': [], 'errors': 0}
+    lock = threading.Lock()
+    clients = []
+    for index in range(args.threads):
+        client = app.test_client()
+        username = f'seed{args.worker_index * args.threads + index + 1}'
+        response = client.post('/api/login', json={'username': username, 'password': PASSWORD})
+        if response.status_code != 200:
+            raise SystemExit(f'Login as {username} failed: {response.status_code}')
+        profile_id = client.get('/api/profiles').get_json()[0]['id']
+        clients.append((client, profile_id))
+
+    def client_loop(client, profile_id, seed):
+        rng = random.Random(seed)
+        base = f'/api/profiles/{profile_id}'
+        payload = {'type': 'expense', 'amount': 9.99, 'category': 'Groceries', 'date': '2024-05-01'}
+        time.sleep(max(0.0, args.start_at - time.time()))
+        stop = args.start_at + args.seconds
+        reads, writes, errors = [], [], 0
+        while time.time() < stop:
+            started = time.perf_counter()
+            if rng.random() < args.write_ratio:
+                response = client.post(f'{base}/transactions', json=payload)
+                if response.status_code == 201:
+                    response = client.delete(f"/api/transactions/{response.get_json()['id']}")
+                samples = writes
+            else:
+                path = f'{base}/transactions?limit=50' if rng.random() < 0.7 else f'{base}/summary'
+                response = client.get(path)
+                samples = reads
+            if response.status_code >= 500:
+                errors += 1
+            else:
+                samples.append(time.perf_counter() - started)
+        with lock:
+            results['reads'].extend(reads)
+            results['writes'].extend(writes)
+            results['errors'] += errors
+
+    threads = [threading.Thread(target=client_loop, args=(client, profile_id, args.worker_index * 100 + i))
+               for i, (client, profile_id) in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps(results))
+
+
+def run_profile(name, env_overrides, base_db, args):
+    tmp_dir = tempfile.mkdtemp()
+    database = os.path.join(tmp_dir, 'bench.db')
+    shutil.copy(base_db, database)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', **BENCH_ENV, **env_overrides)
+    # Enough lead time for every process to import the app and log in
+    start_at = time.time() + 3 + args.workers * 0.5
+    processes = [subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--worker-index', str(i), '--threads', str(args.threads),
+         '--seconds', str(args.seconds), '--write-ratio', str(args.write_ratio), '--start-at', str(start_at)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    ) for i in range(args.workers)]
+
+    reads, writes, errors = [], [], 0
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode != 0 or not output.strip():
+            raise SystemExit(f'{name}: worker exited with {process.returncode}')
+        result = json.loads(output.strip().splitlines()[-1])
+        reads.extend(result['reads'])
+        writes.extend(result['writes'])
+        errors += result['errors']
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {
+        'profile': name,
+        'ops_per_sec': (len(reads) + len(writes)) / args.seconds,
+        'reads': len(reads),
+        'writes': len(writes),
+        'read_p50_ms': percentile(reads, 50) * 1000,
+        'read_p99_ms': percentile(reads, 99) * 1000,
+        'write_p50_ms': percentile(writes, 50) * 1000,
+        'write_p99_ms': percentile(writes, 99) * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite multi-worker concurrency benchmark')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes')
+    parser.add_argument('--threads', type=int, default=2, help='Client threads per worker')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of operations that write')
+    parser.add_argument('--transactions', type=int, default=2000, help='Seeded transactions per profile')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma-separated profiles to run')
+    parser.add_argument('--out', help='Write results to this JSON file')
+    parser.add_argument('--worker-index', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_index is not None:
+        worker(args)
+        return
+
+    tmp_dir = tempfile.mkdtemp()
+    base_db = os.path.join(tmp_dir, 'base.db')
+    users = args.workers * args.threads
+    print(f'🌱 Seeding {users} users x {args.transactions} transactions')
+    subprocess.run([sys.executable, os.path.join(BACKEND_DIR, 'seed_data.py'), '--users', str(users),
+                    '--profiles', '1', '--transactions', str(args.transactions), '--password', PASSWORD],
+                   cwd=BACKEND_DIR, env=dict(os.environ, DATABASE_URL=f'sqlite:///{base_db}', SQLITE_TUNING='false',
+                                             **BENCH_ENV),
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    print(f'\n{args.workers} workers x {args.threads} threads, {args.write_ratio:.0%} writes, {args.seconds:g}s each\n')
+    print(f"{'profile':<12} {'ops/s':>8} {'read p50':>9} {'read p99':>9} {'write p50':>10} {'write p99':>10} "
+          f"{'errors':>7}")
+    results = []
+    for name in args.profiles.split(','):
+        result = run_profile(name, PROFILES[name], base_db, args)
+        results.append(result)
+        print(f"{name:<12} {result['ops_per_sec']:>8.1f} {result['read_p50_ms']:>9.2f} {result['read_p99_ms']:>9.2f} "
+              f"{result['write_p50_ms']:>10.2f} {result['write_p99_ms']:>10.2f} {result['errors']:>7}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'params': {k: v for k, v in vars(args).items() if k not in ('out', 'worker_index', 'start_at')},
+                       'results': results}, f, indent=2)
+        print(f'\n✅ Results written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
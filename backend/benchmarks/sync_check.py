@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Check and time the changes feed (GET /api/profiles/<id>/changes)
+Usage: python benchmarks/sync_check.py [--transactions 5000] [--runs 20]
+
+Seeds a profile, takes a full snapshot, then makes one write of every kind
+(ORM and bulk inserts, updates, deletes, balance adjustments, a tag delete
+that changes its transactions) and checks that applying the delta to the
+snapshot gives exactly a fresh snapshot. Also checks token errors, resets
+and 304 revalidation, then times the delta against the full snapshot.
+Exits non-zero if any check fails.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TMP_DIR, 'sync.db')}"
+os.environ['QUERY_BUDGET_MODE'] = 'raise'
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+
+from app import create_app, init_db
+
+PASSWORD = 'SyncPassw0rd'
+ENTITIES = ('transactions', 'categories', 'tags', 'accounts', 'budgets')
+failures = []
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def seed(client, transactions):
+    client.post('/api/register', json={'username': 'sync', 'email': 'sync@example.com', 'password': PASSWORD})
+    client.post('/api/login', json={'username': 'sync', 'password': PASSWORD})
+    profile_id = client.post('/api/profiles', json={'name': 'Sync check'}).get_json()['id']
+    base = f'/api/profiles/{profile_id}'
+    categories = [client.post(f'{base}/categories', json={'name': name, 'type': 'expense'}).get_json()['id']
+                  for name in ('Food', 'Rent', 'Travel')]
+    tags = [client.post(f'{base}/tags', json={'name': name}).get_json()['id'] for name in ('work', 'home', 'trip')]
+    accounts = [client.post(f'{base}/accounts', json={'name': name, 'type': 'bank'}).get_json()['id']
+                for name in ('Checking', 'Savings')]
+    client.post(f'{base}/budgets', json={'category_id': categories[0], 'amount': 500})
+    rows = [{
+        'type': 'expense' if i % 4 else 'income',
+        'amount': 10 + i,
+        'category': ('Food', 'Rent', 'Travel')[i % 3],
+        'category_id': categories[i % 3],
+        'account_id': accounts[i % 2],
+        'tag_ids': tags[:i % 4],
+        'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+    } for i in range(transactions)]
+    client.post(f'{base}/transactions/bulk', json=rows)
+    return base, categories, tags, accounts
+
+
+def as_state(body):
+    return {entity: {row['id']: row for row in body[entity]} for entity in ENTITIES}
+
+
+def apply_changes(state, body):
+    """What a client does with a delta: deletes first, then upserts"""
+    for entity, ids in body['deleted'].items():
+        for entity_id in ids:
+            state[entity].pop(entity_id, None)
+    for entity in ENTITIES:
+        state[entity].update((row['id'], row) for row in body[entity])
+
+
+def write_everything(client, base, categories, tags, accounts):
+    """One write of every kind; returns the (entity, id) pairs it deleted"""
+    transactions = client.get(f'{base}/transactions?limit=3').get_json()['transactions']
+    client.post(f'{base}/transactions', json={'type': 'expense', 'amount': 42, 'category': 'Food',
+                                              'date': '2024-05-05', 'account_id': accounts[0],
+                                              'tag_ids': tags[:2]})
+    client.post(f'{base}/transactions/bulk', json=[{'type': 'income', 'amount': 5, 'category': 'Rent',
+                                                     'date': '2024-06-06', 'account_id': accounts[1]}] * 30)
+    client.delete(f'/api/transactions/{transactions[0]["id"]}')
+    client.put(f'/api/categories/{categories[1]}', json={'name': 'Housing'})
+    client.put(f'/api/accounts/{accounts[1]}', json={'name': 'Reserve'})
+    client.delete(f'/api/tags/{tags[1]}')
+    client.post(f'{base}/tags', json={'name': 'new'})
+    budget_id = client.post(f'{base}/budgets', json={'amount': 900}).get_json()['id']
+    client.put(f'/api/budgets/{budget_id}', json={'amount': 950})
+    temp_budget = client.post(f'{base}/budgets', json={'amount': 1, 'month': 1, 'year': 2020}).get_json()['id']
+    client.delete(f'/api/budgets/{temp_budget}')
+    temp_category = client.post(f'{base}/categories', json={'name': 'Temp', 'type': 'income'}).get_json()['id']
+    client.delete(f'/api/categories/{temp_category}')
+    return {('transactions', transactions[0]['id']), ('tags', tags[1]),
+            ('budgets', temp_budget), ('categories', temp_category)}
+
+
+def timed(client, url, runs):
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        response = client.get(url)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000, len(response.get_data())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and time the changes feed')
+    parser.add_argument('--transactions', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+    client = app.test_client()
+    base, categories, tags, accounts = seed(client, args.transactions)
+
+    snapshot = client.get(f'{base}/changes').get_json()
+    check('no token gives a full snapshot', snapshot['reset'] and
+          len(snapshot['transactions']) == args.transactions and not snapshot['deleted'])
+    token = snapshot['token']
+    unchanged = client.get(f'{base}/changes?since={token}')
+    body = unchanged.get_json()
+    check('nothing changed since the current token',
+          not body['reset'] and body['token'] == token and not any(body[e] for e in ENTITIES))
+    check('an unchanged token revalidates with 304',
+          client.get(f'{base}/changes?since={token}',
+                     headers={'If-None-Match': unchanged.headers['ETag']}).status_code == 304)
+    check('a malformed token is rejected', client.get(f'{base}/changes?since=abc').status_code == 400)
+    check('a token from the future resets', client.get(f'{base}/changes?since={token + 1000}').get_json()['reset'])
+
+    deleted = write_everything(client, base, categories, tags, accounts)
+    delta = client.get(f'{base}/changes?since={token}').get_json()
+    check('the delta carries a newer token', delta['token'] > token and not delta['reset'])
+    check('the delta lists every delete',
+          {(entity, entity_id) for entity, ids in delta['deleted'].items() for entity_id in ids} == deleted)
+    tagged = sum(1 for row in snapshot['transactions'] if any(tag['id'] == tags[1] for tag in row['tags']))
+    check(f'the delta holds only changed rows ({len(delta["transactions"])} of '
+          f'{args.transactions + 30} transactions)', len(delta['transactions']) <= tagged + 31)
+
+    state = as_state(snapshot)
+    apply_changes(state, delta)
+    check('snapshot + delta equals a fresh snapshot', state == as_state(client.get(f'{base}/changes').get_json()))
+
+    print(f'\n{args.runs} x GET changes              median   bytes')
+    for label, url in (('full snapshot', f'{base}/changes'),
+                       ('since the last write', f'{base}/changes?since={delta["token"] - 1}')):
+        median_ms, size = timed(client, url, args.runs)
+        print(f'{label:<30} {median_ms:>7.2f}ms {size:>9}')
+
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+    if failures:
+        print(f'\n❌ {len(failures)} check(s) failed')
+        sys.exit(1)
+    print('\n✅ All sync checks passed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Read/write routing for the Flask-SQLAlchemy session
+#
+# Read binds (SQLALCHEMY_BINDS 'read', 'read_1', ...) are either read
+# replicas from DATABASE_READ_URL(S) or, on SQLite, a query_only pool on the
+# primary file. Statements run on a read bind when:
+#   - the request is a GET/HEAD, the route is not @primary_only, and the user
+#     has not written within READ_AFTER_WRITE_SECONDS (read-your-writes:
+#     the deadline travels in the signed session cookie, so it holds
+#     whichever worker serves the next request)
+#   - or code outside a request opted in with prefer_replica() (export and
+#     view scripts)
+# Everything else - writes, CLI commands, startup - uses the primary.
+import random
+import time
+from functools import wraps
+
+from flask import g, has_app_context, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+READ_BIND = 'read'
+# Requests that never write; shared by the router, read-after-write pinning and WAL checkpoints
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Session key holding the epoch second until which this user reads the primary
+PRIMARY_UNTIL_KEY = 'primary_until'
+
+
+def read_bind_keys(count):
+    """Bind names for count read engines: read, read_1, read_2, ..."""
+    return [READ_BIND] + [f'{READ_BIND}_{index}' for index in range(1, count)]
+
+
+def primary_only(f):
+    """
+    Keep a GET route on the primary (health checks, reads that must see the latest write)
+    Usage: @primary_only, placed below @app.route
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.use_primary = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def prefer_replica():
+    """Route this app context's reads to a read bind; for scripts run under app.app_context()"""
+    g.use_replica = True
+
+
+def mark_write(window):
+    """Pin the current user's reads to the primary for window seconds"""
+    if window > 0 and 'user_id' in session:
+        session[PRIMARY_UNTIL_KEY] = int(time.time() + window) + 1
+
+
+def use_read_bind():
+    if not has_app_context() or g.get('use_primary', False):
+        return False
+    if g.get('use_replica', False):
+        return True
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+    return session.get(PRIMARY_UNTIL_KEY, 0) <= time.time()
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and use_read_bind():
+            # One replica per request/app context, so its reads see one snapshot
+            key = g.get('read_bind')
+            if key is None:
+                keys = [key for key in self._db.engines if key == READ_BIND or str(key).startswith(f'{READ_BIND}_')]
+                key = g.read_bind = random.choice(keys) if keys else False
+            if key:
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -1,73 +1,164 @@
 #!/usr/bin/env python3
 """
 Export database data to CSV files
-Usage: python export_data.py
+Usage: python export_data.py [--tables users,profiles,transactions]
+                             [--since YYYY-MM-DD] [--out-dir DIR] [--gzip] [--primary]
+
+Rows are streamed from the database in batches and written as they arrive,
+so memory use stays flat regardless of table size. Reads go to a read
+replica when DATABASE_READ_URL(S) is set, unless --primary is given.
 """
 
+import argparse
 import csv
-from app import app, db
-from app import User, Profile, Transaction
+import gzip
+import os
+import time
+from app import create_app
+from models import db, User, Profile, Transaction
+from db_routing import prefer_replica
 from datetime import datetime
 
-def export_to_csv():
-    with app.app_context():
-        # Export Users
-        users = User.query.all()
-        with open('users_export.csv', 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['ID', 'Username', 'Email', 'Created At'])
-            for user in users:
-                writer.writerow([
-                    user.id,
-                    user.username,
-                    user.email,
-                    user.created_at.isoformat()
-                ])
-        print(f"✅ Exported {len(users)} users to users_export.csv")
-        
-        # Export Profiles
-        profiles = Profile.query.all()
-        with open('profiles_export.csv', 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['ID', 'Name', 'User ID', 'User Username', 'Created At'])
-            for profile in profiles:
-                user = User.query.get(profile.user_id)
-                writer.writerow([
-                    profile.id,
-                    profile.name,
-                    profile.user_id,
-                    user.username if user else 'Unknown',
-                    profile.created_at.isoformat()
-                ])
-        print(f"✅ Exported {len(profiles)} profiles to profiles_export.csv")
-        
-        # Export Transactions
-        transactions = Transaction.query.all()
-        with open('transactions_export.csv', 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                'ID', 'Profile ID', 'Profile Name', 'User Username',
-                'Type', 'Amount', 'Category', 'Description', 'Date', 'Created At'
-            ])
-            for tx in transactions:
-                profile = Profile.query.get(tx.profile_id)
-                user = User.query.get(profile.user_id) if profile else None
-                writer.writerow([
-                    tx.id,
-                    tx.profile_id,
-                    profile.name if profile else 'Unknown',
-                    user.username if user else 'Unknown',
-                    tx.type,
-                    tx.amount,
-                    tx.category,
-                    tx.description or '',
-                    tx.date.isoformat(),
-                    tx.created_at.isoformat()
-                ])
-        print(f"✅ Exported {len(transactions)} transactions to transactions_export.csv")
-        
-        print("\n📊 Export complete! Files created in the backend directory.")
+EXPORT_BATCH_SIZE = 1000
+EXPORT_TABLES = ['users', 'profiles', 'transactions']
+
+
+def users_export(since):
+    query = db.select(User.id, User.username, User.email, User.created_at).order_by(User.id)
+    if since:
+        query = query.where(User.created_at >= since)
+    header = ['ID', 'Username', 'Email', 'Created At']
+
+    def format_row(row):
+        return [row.id, row.username, row.email, row.created_at.isoformat()]
+    return header, query, format_row
+
+
+def profiles_export(since):
+    # Join the owner in the same query instead of a User lookup per row
+    query = db.select(
+        Profile.id, Profile.name, Profile.user_id, User.username, Profile.created_at
+    ).outerjoin(User, User.id == Profile.user_id).order_by(Profile.id)
+    if since:
+        query = query.where(Profile.created_at >= since)
+    header = ['ID', 'Name', 'User ID', 'User Username', 'Created At']
+
+    def format_row(row):
+        return [
+            row.id,
+            row.name,
+            row.user_id,
+            row.username or 'Unknown',
+            row.created_at.isoformat()
+        ]
+    return header, query, format_row
+
+
+def transactions_export(since):
+    query = db.select(
+        Transaction.id, Transaction.profile_id, Profile.name.label('profile_name'),
+        User.username, Transaction.type, Transaction.amount, Transaction.category,
+        Transaction.description, Transaction.date, Transaction.created_at
+    ).outerjoin(Profile, Profile.id == Transaction.profile_id).outerjoin(
+        User, User.id == Profile.user_id
+    ).order_by(Transaction.id)
+    if since:
+        query = query.where(Transaction.created_at >= since)
+    header = [
+        'ID', 'Profile ID', 'Profile Name', 'User Username',
+        'Type', 'Amount', 'Category', 'Description', 'Date', 'Created At'
+    ]
+
+    def format_row(row):
+        return [
+            row.id,
+            row.profile_id,
+            row.profile_name or 'Unknown',
+            row.username or 'Unknown',
+            row.type,
+            row.amount,
+            row.category,
+            row.description or '',
+            row.date.isoformat(),
+            row.created_at.isoformat()
+        ]
+    return header, query, format_row
+
+
+EXPORTERS = {
+    'users': users_export,
+    'profiles': profiles_export,
+    'transactions': transactions_export,
+}
 
-if __name__ == '__main__':
-    export_to_csv()
 
+def open_output(path, compress):
+    if compress:
+        return gzip.open(path, 'wt', newline='')
+    return open(path, 'w', newline='')
+
+
+def export_table(table, out_dir='.', since=None, compress=False):
+    """
+    Stream one table to <out_dir>/<table>_export.csv[.gz]
+    Returns (path, row_count)
+    """
+    header, query, format_row = EXPORTERS[table](since)
+    path = os.path.join(out_dir, f'{table}_export.csv' + ('.gz' if compress else ''))
+
+    count = 0
+    # yield_per fetches in batches (a server-side cursor on Postgres)
+    result = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    with open_output(path, compress) as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for partition in result.partitions():
+            writer.writerows(format_row(row) for row in partition)
+            count += len(partition)
+    return path, count
+
+
+def export_to_csv(tables=None, since=None, out_dir='.', compress=False, primary=False):
+    tables = tables or EXPORT_TABLES
+    os.makedirs(out_dir, exist_ok=True)
+
+    with create_app().app_context():
+        # Long export scans run on a read replica when one is configured
+        if not primary:
+            prefer_replica()
+        total_rows = 0
+        started = time.perf_counter()
+        for table in tables:
+            table_started = time.perf_counter()
+            path, count = export_table(table, out_dir, since, compress)
+            elapsed = time.perf_counter() - table_started
+            total_rows += count
+            print(f"✅ Exported {count} {table} to {path} ({count / elapsed if elapsed else 0:,.0f} rows/sec)")
+
+        elapsed = time.perf_counter() - started
+        rate = total_rows / elapsed if elapsed else 0
+        print(f"\n📊 Export complete! {total_rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Export database data to CSV files')
+    parser.add_argument('--tables', default=','.join(EXPORT_TABLES),
+                        help='Comma-separated tables to export (default: all)')
+    parser.add_argument('--since', type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+                        help='Only export rows created on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--out-dir', default='.', help='Directory for the exported files')
+    parser.add_argument('--gzip', action='store_true', help='Gzip-compress the output files')
+    parser.add_argument('--primary', action='store_true', help='Read from the primary even if replicas are configured')
+    args = parser.parse_args(argv)
+
+    args.tables = [table.strip() for table in args.tables.split(',') if table.strip()]
+    unknown = [table for table in args.tables if table not in EXPORTERS]
+    if unknown:
+        parser.error(f"Unknown tables: {', '.join(unknown)} (choose from {', '.join(EXPORT_TABLES)})")
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    export_to_csv(tables=args.tables, since=args.since, out_dir=args.out_dir, compress=args.gzip,
+                  primary=args.primary)
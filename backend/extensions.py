@@ -0,0 +1,20 @@
+# Per-app services
+#
+# create_app() builds these from the environment and keeps them in
+# app.extensions. The proxies resolve to the current app's instance, so route
+# modules can import them at module level before any app exists, and each
+# app (or test) gets its own caches and counters.
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+
+def app_service(name):
+    """Proxy to current_app.extensions[name]; needs an app context"""
+    return LocalProxy(lambda: current_app.extensions[name])
+
+
+request_metrics = app_service('request_metrics')
+password_hasher = app_service('password_hasher')
+response_cache = app_service('response_cache')
+ownership_cache = app_service('ownership_cache')
+analytics_cache = app_service('analytics_cache')
@@ -0,0 +1,150 @@
+# Precompiled JSON serializers for column tuples
+#
+# List endpoints select plain column tuples instead of ORM objects and encode
+# them here. The stdlib backend reproduces Flask's jsonify() output byte for
+# byte in non-debug mode (sorted keys, compact separators, ASCII escaping,
+# trailing newline). The optional orjson backend (JSON_BACKEND=orjson) is
+# faster and produces equivalent JSON, but emits non-ASCII text as UTF-8
+# rather than \u escapes. Both write non-finite floats (inf, nan), which
+# JSON cannot represent, as null.
+import json
+import math
+import os
+from json.encoder import encode_basestring_ascii
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _encode_str(value):
+    return encode_basestring_ascii(value)
+
+
+def _encode_number(value):
+    # bool is an int subclass, and json writes floats with float.__repr__
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, float):
+        return float.__repr__(value) if math.isfinite(value) else 'null'
+    return int.__repr__(value)
+
+
+def _encode_bool(value):
+    return 'true' if value else 'false'
+
+
+def _encode_temporal(value):
+    return encode_basestring_ascii(value.isoformat())
+
+
+def _encode_raw(value):
+    return value
+
+
+ENCODERS = {
+    'str': _encode_str,
+    'number': _encode_number,
+    'bool': _encode_bool,
+    'date': _encode_temporal,
+    'datetime': _encode_temporal,
+    'raw': _encode_raw,
+}
+
+
+class RowSerializer:
+    """
+    Encodes tuples to JSON objects with a fixed set of keys
+    fields: list of (key, kind) in tuple order, kind being one of ENCODERS
+    'raw' values must already be encoded JSON (used for nested arrays)
+    """
+
+    def __init__(self, fields):
+        self.keys = [key for key, _ in fields]
+        self.kinds = [kind for _, kind in fields]
+        # Emit keys in sorted order, as jsonify(sort_keys=True) does
+        order = sorted(range(len(fields)), key=lambda i: fields[i][0])
+        self._plan = [
+            (index, ('{' if position == 0 else ',') + encode_basestring_ascii(fields[index][0]) + ':',
+             ENCODERS[fields[index][1]])
+            for position, index in enumerate(order)
+        ]
+
+    def encode_row(self, row):
+        parts = []
+        append = parts.append
+        for index, prefix, encode in self._plan:
+            value = row[index]
+            append(prefix)
+            append('null' if value is None else encode(value))
+        append('}')
+        return ''.join(parts)
+
+    def encode_rows(self, rows):
+        return '[' + ','.join([self.encode_row(row) for row in rows]) + ']'
+
+    def to_dicts(self, rows):
+        """Plain dicts for the orjson backend; raw fields are decoded back"""
+        raw = [i for i, kind in enumerate(self.kinds) if kind == 'raw']
+        result = []
+        for row in rows:
+            item = dict(zip(self.keys, row))
+            for i in raw:
+                item[self.keys[i]] = orjson.Fragment(row[i]) if hasattr(orjson, 'Fragment') else orjson.loads(row[i])
+            result.append(item)
+        return result
+
+
+def use_orjson():
+    return orjson is not None and os.environ.get('JSON_BACKEND', 'stdlib') == 'orjson'
+
+
+def encode_list(serializer, rows):
+    """Encode rows as a JSON array string (no trailing newline)"""
+    if use_orjson():
+        return orjson.dumps(serializer.to_dicts(rows), option=orjson.OPT_SORT_KEYS).decode('utf-8')
+    return serializer.encode_rows(rows)
+
+
+def encode_object(members):
+    """
+    Encode a dict whose values are already-encoded JSON fragments
+    Keys are sorted to match jsonify()
+    """
+    return '{' + ','.join(
+        encode_basestring_ascii(key) + ':' + members[key] for key in sorted(members)
+    ) + '}'
+
+
+def encode_scalar(value):
+    """Encode a str/number/bool/None the way json.dumps does"""
+    if value is None:
+        return 'null'
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    return _encode_number(value)
+
+
+def _finite(value):
+    """value with non-finite floats replaced by None, recursively"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def encode_value(value):
+    """Encode plain data (dicts, lists, scalars) with sorted keys, like jsonify()"""
+    if use_orjson():
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS).decode('utf-8')
+    try:
+        return json.dumps(value, separators=(',', ':'), sort_keys=True, allow_nan=False)
+    except ValueError:
+        # Rare (rows saved before amounts were checked), so only then pay for the copy
+        return json.dumps(_finite(value), separators=(',', ':'), sort_keys=True)
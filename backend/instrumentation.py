@@ -0,0 +1,172 @@
+# Request instrumentation: wall time, DB time and statement count per route
+#
+# init_instrumentation() registers the request hooks on an app and attaches
+# the statement timers to that app's engines only, so creating a second app
+# (a script, a test) never double-counts statements.
+import logging
+import time
+
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+from db_routing import READ_METHODS, RoutingSession, mark_write
+from extensions import request_metrics
+from metrics import redact_parameters
+from query_budget import QueryBudgetExceeded, budget_for
+
+logger = logging.getLogger(__name__)
+
+
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    request_metrics.start_request()
+    g.request_in_flight = True
+
+
+def add_query_count_header(response):
+    if current_app.config['EXPOSE_QUERY_COUNT']:
+        response.headers['X-Query-Count'] = str(g.get('query_count', 0))
+    return response
+
+
+def query_budget_violation():
+    """(limit, QueryBudgetExceeded or None) for the statements the current request has issued"""
+    limit = budget_for(current_app.view_functions.get(request.endpoint), current_app.config['DEFAULT_QUERY_BUDGET'])
+    statements = g.get('statements', [])
+    if len(statements) > limit:
+        return limit, QueryBudgetExceeded(f'{request.method} {request.url_rule.rule}', limit, statements)
+    return limit, None
+
+
+def query_budget_error_response(error):
+    """500 naming the budget and listing the statements, so a raise-mode failure shows its N+1"""
+    g.query_budget_answered = True
+    logger.error(str(error))
+    response = jsonify({
+        'error': f'{error.label} issued {len(error.statements)} SQL statements (budget {error.limit})',
+        'budget': error.limit,
+        'statements': [' '.join(statement.split()) for statement in error.statements]
+    })
+    response.status_code = 500
+    return response
+
+
+@event.listens_for(RoutingSession, 'before_commit')
+def enforce_query_budget_before_commit(session):
+    """
+    In raise mode, fail an over-budget write before it is committed, so the
+    500 it gets never hides a saved change that a client would then retry
+    """
+    if not has_request_context() or not request.url_rule or g.get('query_budget_reported'):
+        return
+    if current_app.config['QUERY_BUDGET_MODE'] != 'raise':
+        return
+    # Count the statements commit would flush too
+    session.flush()
+    g.query_budget_committed = True
+    _, error = query_budget_violation()
+    if error is not None:
+        g.query_budget_reported = True
+        # Routes catch this in their own except Exception; the after_request
+        # hook answers with it in place of their generic 500
+        g.query_budget_raised = error
+        raise error
+
+
+def handle_query_budget_exceeded(error):
+    """Error handler for a QueryBudgetExceeded no route caught"""
+    g.query_budget_reported = True
+    return query_budget_error_response(error)
+
+
+def enforce_query_budget(response):
+    config = current_app.config
+    if config['QUERY_BUDGET_MODE'] == 'off' or not request.url_rule:
+        return response
+    limit, error = query_budget_violation()
+    raised = g.get('query_budget_raised')
+    if raised is not None and not g.get('query_budget_answered'):
+        response = query_budget_error_response(raised)
+    # Once per request: the error response is finalized through this hook too
+    elif error is not None and not g.get('query_budget_reported'):
+        g.query_budget_reported = True
+        # Statements after a commit cannot undo it, so a 500 would only invite a duplicate retry
+        if config['QUERY_BUDGET_MODE'] == 'raise' and not g.get('query_budget_committed'):
+            response = query_budget_error_response(error)
+        else:
+            request_metrics.record_budget_violation(request.method, request.url_rule.rule)
+            logger.warning(str(error))
+    if config['EXPOSE_QUERY_COUNT']:
+        response.headers['X-Query-Budget'] = str(limit)
+    return response
+
+
+def record_request_metrics(response):
+    if 'request_started' in g:
+        request_metrics.record_request(
+            request.method,
+            request.url_rule.rule if request.url_rule else '<unmatched>',
+            response.status_code,
+            time.perf_counter() - g.request_started,
+            g.get('db_time', 0.0),
+            g.get('query_count', 0)
+        )
+    return response
+
+
+def pin_reads_after_write(response):
+    if request.method not in READ_METHODS and response.status_code < 400:
+        mark_write(current_app.config['READ_AFTER_WRITE_SECONDS'])
+    return response
+
+
+def checkpoint_sqlite_wal(response):
+    checkpointer = current_app.extensions.get('wal_checkpointer')
+    if checkpointer is not None and request.method not in READ_METHODS:
+        checkpointer.maybe_checkpoint()
+    return response
+
+
+def end_request_timer(exc):
+    if g.pop('request_in_flight', False):
+        request_metrics.end_request()
+
+
+def instrument_engine(engine, config, metrics):
+    """Count and time every statement an engine runs; config and metrics belong to its app"""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('statement_started', []).append(time.perf_counter())
+        if has_request_context():
+            g.query_count = g.get('query_count', 0) + 1
+            # Per-request infrastructure (the session store) is outside route budgets
+            if config['QUERY_BUDGET_MODE'] != 'off' and not context.execution_options.get('query_budget_exempt'):
+                g.setdefault('statements', []).append(statement)
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def time_statement(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('statement_started')
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if has_request_context():
+            g.db_time = g.get('db_time', 0.0) + elapsed
+        if elapsed * 1000 >= config['SLOW_QUERY_MS']:
+            metrics.record_slow_query()
+            route = request.url_rule.rule if has_request_context() and request.url_rule else None
+            logger.warning(f"Slow query ({elapsed * 1000:.0f}ms, route {route}): {' '.join(statement.split())} "
+                           f"params={redact_parameters(parameters)}")
+
+
+def init_instrumentation(app, engines):
+    app.before_request(start_request_timer)
+    # after_request hooks run in reverse order of registration
+    app.after_request(add_query_count_header)
+    app.after_request(enforce_query_budget)
+    app.after_request(record_request_metrics)
+    app.after_request(pin_reads_after_write)
+    app.after_request(checkpoint_sqlite_wal)
+    app.teardown_request(end_request_timer)
+    app.register_error_handler(QueryBudgetExceeded, handle_query_budget_exceeded)
+    for engine in engines:
+        instrument_engine(engine, app.config, app.extensions['request_metrics'])
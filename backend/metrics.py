@@ -0,0 +1,449 @@
+# Request and database instrumentation
+#
+# Each worker keeps fixed-bucket histograms per route (wall time, DB time,
+# SQL statements per request) plus a pool checkout wait histogram. Histograms
+# with shared bucket bounds can simply be summed, so with METRICS_DIR set
+# every gunicorn worker periodically writes its snapshot there and
+# /api/metrics merges all of them before deriving p50/p95/p99. Per-worker
+# percentiles are never averaged. Files of exited workers are folded into a
+# single retired snapshot when merging, so their counters keep counting but
+# recycled workers do not pile up files.
+import bisect
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds; the last bucket is +Inf
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+STATEMENT_BUCKETS = [0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233]
+QUANTILES = (0.5, 0.95, 0.99)
+RETIRED_FILE = 'metrics-retired.json'
+
+
+class Histogram:
+    def __init__(self, bounds, counts=None, total=0.0):
+        self.bounds = bounds
+        self.counts = counts or [0] * (len(bounds) + 1)
+        self.total = total
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        count = self.count
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                if index == len(self.bounds):
+                    return lower
+                return lower + (self.bounds[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+    def to_dict(self):
+        return {'counts': self.counts, 'sum': self.total}
+
+    @classmethod
+    def from_dict(cls, bounds, data):
+        return cls(bounds, list(data['counts']), data['sum'])
+
+
+class RouteStats:
+    def __init__(self):
+        self.statuses = {}
+        self.wall = Histogram(LATENCY_BUCKETS)
+        self.db = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.budget_violations = 0
+
+    def merge(self, other):
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.budget_violations += other.budget_violations
+        self.wall.merge(other.wall)
+        self.db.merge(other.db)
+        self.statements.merge(other.statements)
+
+    def to_dict(self):
+        return {'statuses': self.statuses, 'wall': self.wall.to_dict(), 'db': self.db.to_dict(),
+                'statements': self.statements.to_dict(), 'budget_violations': self.budget_violations}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.statuses = dict(data['statuses'])
+        stats.wall = Histogram.from_dict(LATENCY_BUCKETS, data['wall'])
+        stats.db = Histogram.from_dict(LATENCY_BUCKETS, data['db'])
+        stats.statements = Histogram.from_dict(STATEMENT_BUCKETS, data['statements'])
+        stats.budget_violations = data.get('budget_violations', 0)
+        return stats
+
+
+class Snapshot:
+    """Metrics of one worker, or several merged"""
+
+    def __init__(self):
+        self.routes = {}  # (method, route) -> RouteStats
+        self.pool_wait = Histogram(LATENCY_BUCKETS)
+        self.in_flight = 0
+        self.slow_queries = 0
+        self.workers = 1
+
+    def merge(self, other, include_gauges=True):
+        for key, stats in other.routes.items():
+            self.routes.setdefault(key, RouteStats()).merge(stats)
+        self.pool_wait.merge(other.pool_wait)
+        self.slow_queries += other.slow_queries
+        if include_gauges:
+            self.in_flight += other.in_flight
+            self.workers += other.workers
+
+    def to_dict(self):
+        return {
+            'routes': [[method, route, stats.to_dict()] for (method, route), stats in self.routes.items()],
+            'pool_wait': self.pool_wait.to_dict(),
+            'in_flight': self.in_flight,
+            'slow_queries': self.slow_queries,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        snapshot = cls()
+        snapshot.routes = {(method, route): RouteStats.from_dict(stats) for method, route, stats in data['routes']}
+        snapshot.pool_wait = Histogram.from_dict(LATENCY_BUCKETS, data['pool_wait'])
+        snapshot.in_flight = data['in_flight']
+        snapshot.slow_queries = data['slow_queries']
+        return snapshot
+
+
+class WorkerMetrics:
+    """Live metrics for this process, optionally shared through a directory"""
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._snapshot = Snapshot()
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._pid = os.getpid()
+        self._path = None
+
+    def _check_fork(self):
+        # A forked worker (gunicorn --preload) starts from zero rather than
+        # reporting the parent's counts a second time
+        if self._pid != os.getpid():
+            with self._lock:
+                self._snapshot = Snapshot()
+                self._pid = os.getpid()
+                self._path = None
+                self._last_flush = 0.0
+
+    def start_request(self):
+        self._check_fork()
+        with self._lock:
+            self._snapshot.in_flight += 1
+
+    def end_request(self):
+        with self._lock:
+            self._snapshot.in_flight -= 1
+
+    def record_request(self, method, route, status, wall, db_time, statements):
+        with self._lock:
+            stats = self._snapshot.routes.get((method, route))
+            if stats is None:
+                stats = self._snapshot.routes[(method, route)] = RouteStats()
+            status = str(status)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.wall.observe(wall)
+            stats.db.observe(db_time)
+            stats.statements.observe(statements)
+        self.maybe_flush()
+
+    def record_budget_violation(self, method, route):
+        with self._lock:
+            stats = self._snapshot.routes.get((method, route))
+            if stats is None:
+                stats = self._snapshot.routes[(method, route)] = RouteStats()
+            stats.budget_violations += 1
+
+    def record_pool_wait(self, seconds):
+        with self._lock:
+            self._snapshot.pool_wait.observe(seconds)
+
+    def record_slow_query(self):
+        with self._lock:
+            self._snapshot.slow_queries += 1
+
+    def local_snapshot(self):
+        with self._lock:
+            return Snapshot.from_dict(json.loads(json.dumps(self._snapshot.to_dict())))
+
+    def _worker_path(self):
+        # One file per worker incarnation; a recycled pid must not overwrite
+        # (and so reset) the counters of the worker that used it before
+        if self._path is None:
+            self._path = os.path.join(self.directory, f'metrics-{self._pid}-{time.time_ns()}.json')
+        return self._path
+
+    def flush(self):
+        if not self.directory:
+            return
+        path = self._worker_path()
+        with self._lock:
+            payload = json.dumps(dict(self._snapshot.to_dict(), pid=self._pid))
+        # Written to a temporary file and renamed so readers never see a partial snapshot
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def collect(self):
+        """Merged metrics of every worker sharing the directory (or just this one)"""
+        if not self.directory:
+            return self.local_snapshot()
+        self.flush()
+        merged = Snapshot()
+        merged.workers = 0
+        exited = []
+        # Shared with other readers; excludes a fold, so no file is counted twice or missed
+        with self._directory_lock(fcntl.LOCK_SH):
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                data = read_snapshot(path)
+                if data is None:
+                    continue
+                retired = os.path.basename(path) == RETIRED_FILE
+                alive = not retired and pid_alive(data.get('pid'))
+                if not retired and not alive:
+                    exited.append(path)
+                # Counters of exited workers still count; their gauges do not
+                merged.merge(Snapshot.from_dict(data), include_gauges=alive)
+        if exited:
+            self._retire(exited)
+        return merged
+
+    @contextmanager
+    def _directory_lock(self, mode):
+        with open(os.path.join(self.directory, '.metrics.lock'), 'w') as lock:
+            fcntl.flock(lock, mode)
+            yield
+
+    def _retire(self, paths):
+        """Fold exited workers' files into the retired snapshot and delete them"""
+        retired_path = os.path.join(self.directory, RETIRED_FILE)
+        with self._directory_lock(fcntl.LOCK_EX):
+            data = read_snapshot(retired_path)
+            retired = Snapshot.from_dict(data) if data else Snapshot()
+            folded = []
+            # Another collect may have folded some of them already
+            for path in paths:
+                data = read_snapshot(path)
+                if data is not None:
+                    retired.merge(Snapshot.from_dict(data), include_gauges=False)
+                    folded.append(path)
+            if not folded:
+                return
+            retired.in_flight = 0
+            tmp_path = f'{retired_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(json.dumps(retired.to_dict()))
+            os.replace(tmp_path, retired_path)
+            for path in folded:
+                os.remove(path)
+
+
+def read_snapshot(path):
+    """A snapshot file's data, or None if it is gone or unreadable"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def redact_parameters(parameters):
+    """Describe bind parameters by type only, so values never reach the logs"""
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (list, tuple, dict)):
+        return f'<{len(parameters)} parameter sets>'
+    if isinstance(parameters, dict):
+        return {key: f'<{type(value).__name__}>' for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [f'<{type(value).__name__}>' for value in parameters]
+    return '<redacted>'
+
+
+# Prometheus text exposition
+
+def _labels(**labels):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+def _histogram_lines(name, histogram, **labels):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.bounds + ['+Inf'], histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+    lines.append(f'{name}_sum{_labels(**labels)} {histogram.total}')
+    lines.append(f'{name}_count{_labels(**labels)} {cumulative}')
+    return lines
+
+
+def _quantile_lines(name, histogram, **labels):
+    return [f'{name}{_labels(**labels, quantile=q)} {histogram.quantile(q):.6f}' for q in QUANTILES]
+
+
+def render_prometheus(snapshot):
+    routes = sorted(snapshot.routes.items())
+    out = [
+        '# HELP http_requests_total Requests handled, by route and status',
+        '# TYPE http_requests_total counter',
+    ]
+    for (method, route), stats in routes:
+        for status, count in sorted(stats.statuses.items()):
+            out.append(f'http_requests_total{_labels(method=method, route=route, status=status)} {count}')
+
+    out += [
+        '# HELP query_budget_violations_total Requests that exceeded their route\'s SQL statement budget',
+        '# TYPE query_budget_violations_total counter',
+    ]
+    for (method, route), stats in routes:
+        out.append(f'query_budget_violations_total{_labels(method=method, route=route)} {stats.budget_violations}')
+
+    families = [
+        ('http_request_duration_seconds', 'Request wall time', 'wall'),
+        ('http_request_db_seconds', 'Time spent executing SQL per request', 'db'),
+        ('http_request_sql_statements', 'SQL statements per request', 'statements'),
+    ]
+    for name, help_text, attr in families:
+        out.append(f'# HELP {name} {help_text}')
+        out.append(f'# TYPE {name} histogram')
+        for (method, route), stats in routes:
+            out.extend(_histogram_lines(name, getattr(stats, attr), method=method, route=route))
+        out.append(f'# HELP {name}_quantile {help_text}, p50/p95/p99 estimated from the merged histogram')
+        out.append(f'# TYPE {name}_quantile gauge')
+        for (method, route), stats in routes:
+            out.extend(_quantile_lines(f'{name}_quantile', getattr(stats, attr), method=method, route=route))
+
+    out += [
+        '# HELP db_pool_checkout_wait_seconds Time spent waiting for a pooled connection',
+        '# TYPE db_pool_checkout_wait_seconds histogram',
+        *_histogram_lines('db_pool_checkout_wait_seconds', snapshot.pool_wait),
+        '# HELP db_pool_checkout_wait_seconds_quantile Pool checkout wait p50/p95/p99',
+        '# TYPE db_pool_checkout_wait_seconds_quantile gauge',
+        *_quantile_lines('db_pool_checkout_wait_seconds_quantile', snapshot.pool_wait),
+        '# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS',
+        '# TYPE db_slow_queries_total counter',
+        f'db_slow_queries_total {snapshot.slow_queries}',
+        '# HELP http_requests_in_flight Requests currently being handled by live workers',
+        '# TYPE http_requests_in_flight gauge',
+        f'http_requests_in_flight {snapshot.in_flight}',
+        '# HELP app_workers Live workers reporting metrics',
+        '# TYPE app_workers gauge',
+        f'app_workers {snapshot.workers}',
+    ]
+    return '\n'.join(out) + '\n'
+
+
+def render_cache_metrics(response_cache_stats, analytics_cache_report):
+    """
+    Response and analytics cache counters in Prometheus text format
+    They live in each worker and are not merged, so every line carries the pid
+    of the worker that answered the scrape
+    """
+    pid = response_cache_stats['pid']
+    out = [
+        '# HELP response_cache_events_total Response cache lookups and maintenance, by tier (this worker)',
+        '# TYPE response_cache_events_total counter',
+    ]
+    for tier in ('local', 'shared'):
+        stats = response_cache_stats.get(tier)
+        for event, count in sorted((stats or {}).items()):
+            if event not in ('size', 'max_entries'):
+                out.append(f'response_cache_events_total{_labels(tier=tier, event=event, pid=pid)} {count}')
+    local = response_cache_stats.get('local')
+    if local is not None:
+        out += [
+            '# HELP response_cache_entries Entries in the local response cache (this worker)',
+            '# TYPE response_cache_entries gauge',
+            f'response_cache_entries{_labels(pid=pid)} {local["size"]}',
+        ]
+    report = dict(analytics_cache_report)
+    profiles, megabytes = report.pop('profiles'), report.pop('megabytes')
+    out += [
+        '# HELP analytics_cache_events_total Analytics snapshot cache events (this worker)',
+        '# TYPE analytics_cache_events_total counter',
+        *(f'analytics_cache_events_total{_labels(event=event, pid=pid)} {count}'
+          for event, count in sorted(report.items())),
+        '# HELP analytics_cache_profiles Profiles with a cached analytics snapshot (this worker)',
+        '# TYPE analytics_cache_profiles gauge',
+        f'analytics_cache_profiles{_labels(pid=pid)} {profiles}',
+        '# HELP analytics_cache_megabytes Memory held by cached analytics snapshots (this worker)',
+        '# TYPE analytics_cache_megabytes gauge',
+        f'analytics_cache_megabytes{_labels(pid=pid)} {megabytes}',
+    ]
+    return '\n'.join(out) + '\n'
+
+
+def create_worker_metrics():
+    """
+    Build the collector from the environment
+    METRICS_DIR (shared by all workers on the host; exited workers' files are
+    folded into one retired snapshot),
+    METRICS_FLUSH_INTERVAL seconds
+    """
+    directory = os.environ.get('METRICS_DIR') or None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return WorkerMetrics(directory, float(os.environ.get('METRICS_FLUSH_INTERVAL', '1')))
+
+
+def timed_pool_class(metrics):
+    """QueuePool subclass that reports how long each checkout waited for a connection"""
+    from sqlalchemy.pool import QueuePool
+
+    class TimedQueuePool(QueuePool):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                metrics.record_pool_wait(time.perf_counter() - started)
+
+    return TimedQueuePool
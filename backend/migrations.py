@@ -0,0 +1,331 @@
+# Versioned schema migrations
+#
+# db.create_all() only creates missing tables; it never adds indexes or
+# columns to tables that already exist. Schema changes for deployed databases
+# are numbered migrations below, recorded in the schema_migrations table.
+# Every operation is idempotent (IF [NOT] EXISTS or an inspector check), so a
+# partially applied migration can simply be run again. On PostgreSQL indexes
+# are built CONCURRENTLY, outside a transaction, so writes keep flowing.
+#
+#   flask --app app migrate status
+#   flask --app app migrate upgrade [--to N]
+#   flask --app app migrate downgrade --to N
+from collections import namedtuple
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import inspect, text
+
+from models import SQLITE_UTC_NOW
+
+# Arbitrary key for pg_advisory_lock so concurrent deploys apply migrations one at a time
+ADVISORY_LOCK_KEY = 720411
+
+Migration = namedtuple('Migration', ['version', 'name', 'upgrade', 'downgrade'])
+
+
+class IrreversibleMigration(Exception):
+    """Raised when downgrading past a migration that has no downgrade"""
+
+
+class Operations:
+    """Idempotent schema operations for SQLite and PostgreSQL"""
+
+    def __init__(self, engine, metadata):
+        self.engine = engine
+        self.metadata = metadata
+
+    @property
+    def dialect(self):
+        return self.engine.dialect.name
+
+    def execute(self, sql, **params):
+        with self.engine.begin() as conn:
+            return conn.execute(text(sql), params)
+
+    def _autocommit(self, sql):
+        # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block
+        with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text(sql))
+
+    def has_table(self, table):
+        return inspect(self.engine).has_table(table)
+
+    def has_column(self, table, column):
+        return any(c['name'] == column for c in inspect(self.engine).get_columns(table))
+
+    def create_all(self):
+        """Create any missing model tables (and their indexes)"""
+        self.metadata.create_all(self.engine, checkfirst=True)
+
+    def create_index(self, name, table, columns, unique=False):
+        """
+        columns: SQL column expressions, e.g. ['profile_id', 'date DESC']
+        """
+        unique = 'UNIQUE ' if unique else ''
+        columns = ', '.join(columns)
+        if self.dialect == 'postgresql':
+            # A failed concurrent build leaves an INVALID index behind that
+            # IF NOT EXISTS would skip over, so drop it and build again
+            invalid = self.execute(
+                'SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+                'WHERE c.relname = :name AND NOT i.indisvalid', name=name
+            ).first()
+            if invalid:
+                self._autocommit(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+            self._autocommit(f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})')
+        else:
+            self.execute(f'CREATE {unique}INDEX IF NOT EXISTS {name} ON {table} ({columns})')
+
+    def drop_index(self, name):
+        if self.dialect == 'postgresql':
+            self._autocommit(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+        else:
+            self.execute(f'DROP INDEX IF EXISTS {name}')
+
+    def drop_table(self, table):
+        self.execute(f'DROP TABLE IF EXISTS {table}')
+
+    def add_column(self, table, column, ddl):
+        """ddl: the column definition after its name, e.g. 'TIMESTAMP NULL'"""
+        if not self.has_column(table, column):
+            self.execute(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}')
+
+    def drop_column(self, table, column):
+        # Needs SQLite 3.35+ on SQLite
+        if self.has_column(table, column):
+            self.execute(f'ALTER TABLE {table} DROP COLUMN {column}')
+
+
+# Migrations
+
+def baseline_upgrade(op):
+    """Tables as created by db.create_all() before migrations existed"""
+    op.create_all()
+
+
+def composite_indexes_upgrade(op):
+    # Transaction listing: keyset pagination on (date, created_at, id) per profile
+    op.create_index('ix_transactions_profile_date_created', 'transactions',
+                    ['profile_id', 'date DESC', 'created_at DESC', 'id DESC'])
+    # Budget spend, summaries and category filters
+    op.create_index('ix_transactions_profile_type_category_date', 'transactions',
+                    ['profile_id', 'type', 'category', 'date'])
+    # Tag filters and tag lookups; the primary key only covers (transaction_id, tag_id)
+    op.create_index('ix_transaction_tags_tag_transaction', 'transaction_tags', ['tag_id', 'transaction_id'])
+    # Budgets for a profile and month
+    op.create_index('ix_budgets_profile_period', 'budgets', ['profile_id', 'month', 'year', 'category_id'])
+
+
+def composite_indexes_downgrade(op):
+    op.drop_index('ix_budgets_profile_period')
+    op.drop_index('ix_transaction_tags_tag_transaction')
+    op.drop_index('ix_transactions_profile_type_category_date')
+    op.drop_index('ix_transactions_profile_date_created')
+
+
+def user_sessions_upgrade(op):
+    # Server-side sessions (SESSION_STORE=database); create_all adds the table and its indexes
+    op.create_all()
+
+
+def user_sessions_downgrade(op):
+    op.drop_table('user_sessions')
+
+
+SYNCED_TABLES = ['transactions', 'categories', 'tags', 'accounts', 'budgets']
+
+
+def sync_versions_upgrade(op):
+    # Existing rows keep version 0: a client's first sync is a full snapshot anyway
+    for table in SYNCED_TABLES:
+        op.add_column(table, 'updated_at', 'TIMESTAMP NULL')
+        op.add_column(table, 'version', 'BIGINT NOT NULL DEFAULT 0')
+        op.create_index(f'ix_{table}_profile_version', table, ['profile_id', 'version'])
+    # Tombstones for deletes; create_all adds the table and its index
+    op.create_all()
+
+
+def sync_versions_downgrade(op):
+    op.drop_table('deleted_records')
+    for table in SYNCED_TABLES:
+        op.drop_index(f'ix_{table}_profile_version')
+        op.drop_column(table, 'version')
+        op.drop_column(table, 'updated_at')
+
+
+def transaction_created_at_upgrade(op):
+    # The listing's keyset cursor is (date, created_at, id): a NULL created_at
+    # cannot be encoded and drops out of tuple comparisons. Backfill legacy
+    # rows with their last write, or the start of their day
+    if op.dialect == 'postgresql':
+        op.execute('UPDATE transactions SET created_at = COALESCE(updated_at, CAST(date AS TIMESTAMP)) '
+                   'WHERE created_at IS NULL')
+        op.execute('ALTER TABLE transactions ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP')
+        op.execute('ALTER TABLE transactions ALTER COLUMN created_at SET NOT NULL')
+    else:
+        op.execute("UPDATE transactions SET created_at = COALESCE(updated_at, date || ' 00:00:00.000000') "
+                   "WHERE created_at IS NULL")
+        # SQLite cannot add NOT NULL to an existing column; fill it in on insert
+        # instead, with microseconds so the value compares like the cursor's
+        op.execute(
+            'CREATE TRIGGER IF NOT EXISTS transactions_created_at_not_null AFTER INSERT ON transactions '
+            'WHEN NEW.created_at IS NULL BEGIN '
+            f'UPDATE transactions SET created_at = {SQLITE_UTC_NOW} WHERE id = NEW.id; END'
+        )
+
+
+def transaction_created_at_downgrade(op):
+    if op.dialect == 'postgresql':
+        op.execute('ALTER TABLE transactions ALTER COLUMN created_at DROP NOT NULL')
+        op.execute('ALTER TABLE transactions ALTER COLUMN created_at DROP DEFAULT')
+    else:
+        op.execute('DROP TRIGGER IF EXISTS transactions_created_at_not_null')
+
+
+MIGRATIONS = [
+    Migration(1, 'baseline schema', baseline_upgrade, None),
+    Migration(2, 'composite indexes for listing, budgets, summaries and tags',
+              composite_indexes_upgrade, composite_indexes_downgrade),
+    Migration(3, 'server-side session table', user_sessions_upgrade, user_sessions_downgrade),
+    Migration(4, 'row versions and tombstones for the changes feed', sync_versions_upgrade, sync_versions_downgrade),
+    Migration(5, 'non-null transaction created_at for the listing cursor',
+              transaction_created_at_upgrade, transaction_created_at_downgrade),
+]
+
+HEAD = MIGRATIONS[-1].version
+
+
+# Runner
+
+def ensure_version_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations ('
+            'version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at TIMESTAMP NOT NULL)'
+        ))
+
+
+def applied_versions(engine):
+    ensure_version_table(engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text('SELECT version FROM schema_migrations'))}
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def _record(engine, migration):
+    with engine.begin() as conn:
+        conn.execute(text('INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)'),
+                     {'v': migration.version, 'n': migration.name, 't': datetime.utcnow()})
+
+
+def _forget(engine, migration):
+    with engine.begin() as conn:
+        conn.execute(text('DELETE FROM schema_migrations WHERE version = :v'), {'v': migration.version})
+
+
+class _MigrationLock:
+    """Session-level advisory lock on PostgreSQL; SQLite serializes writers itself"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.conn = None
+
+    def __enter__(self):
+        if self.engine.dialect.name == 'postgresql':
+            self.conn = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+            self.conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': ADVISORY_LOCK_KEY})
+        return self
+
+    def __exit__(self, *exc):
+        if self.conn is not None:
+            self.conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': ADVISORY_LOCK_KEY})
+            self.conn.close()
+
+
+def upgrade(engine, metadata, target=None, log=print):
+    """Apply pending migrations up to target (default: all). Returns the versions applied"""
+    target = HEAD if target is None else target
+    done = []
+    with _MigrationLock(engine):
+        applied = applied_versions(engine)
+        op = Operations(engine, metadata)
+        for migration in MIGRATIONS:
+            if migration.version in applied or migration.version > target:
+                continue
+            log(f'Applying {migration.version}: {migration.name}')
+            migration.upgrade(op)
+            _record(engine, migration)
+            done.append(migration.version)
+    return done
+
+
+def downgrade(engine, metadata, target, log=print):
+    """Revert applied migrations above target, newest first. Returns the versions reverted"""
+    done = []
+    with _MigrationLock(engine):
+        applied = applied_versions(engine)
+        op = Operations(engine, metadata)
+        for migration in reversed(MIGRATIONS):
+            if migration.version not in applied or migration.version <= target:
+                continue
+            if migration.downgrade is None:
+                raise IrreversibleMigration(f'Migration {migration.version} ({migration.name}) cannot be reverted')
+            log(f'Reverting {migration.version}: {migration.name}')
+            migration.downgrade(op)
+            _forget(engine, migration)
+            done.append(migration.version)
+    return done
+
+
+def stamp(engine, version=HEAD):
+    """Mark migrations up to version as applied without running them"""
+    applied = applied_versions(engine)
+    for migration in MIGRATIONS:
+        if migration.version <= version and migration.version not in applied:
+            _record(engine, migration)
+
+
+# CLI
+
+cli = AppGroup('migrate', help='Apply or revert schema migrations')
+
+
+def _db():
+    return current_app.extensions['sqlalchemy']
+
+
+@cli.command('status')
+def status_command():
+    """Show applied and pending migrations"""
+    applied = applied_versions(_db().engine)
+    for migration in MIGRATIONS:
+        state = 'applied' if migration.version in applied else 'pending'
+        click.echo(f'{migration.version:>4}  {state:<8} {migration.name}')
+
+
+@cli.command('upgrade')
+@click.option('--to', 'target', type=int, default=None, help='Stop after this version (default: latest)')
+def upgrade_command(target):
+    """Apply pending migrations"""
+    db = _db()
+    done = upgrade(db.engine, db.metadata, target, log=click.echo)
+    click.echo(f'Applied {len(done)} migration(s)' if done else 'Database is up to date')
+
+
+@cli.command('downgrade')
+@click.option('--to', 'target', type=int, required=True, help='Revert every migration above this version')
+def downgrade_command(target):
+    """Revert applied migrations"""
+    db = _db()
+    try:
+        done = downgrade(db.engine, db.metadata, target, log=click.echo)
+    except IrreversibleMigration as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Reverted {len(done)} migration(s)')
@@ -0,0 +1,530 @@
+# Database models and the data helpers shared by routes, CLI commands and scripts
+#
+# Importing this module has no side effects: db is bound to an application by
+# create_app() (db.init_app), so scripts and workers can import the models
+# without creating an app, an engine or any tables.
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from datetime import datetime
+import csv
+import io
+
+from db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# SQLite stores DateTime as text in SQLAlchemy's 'YYYY-MM-DD HH:MM:SS.ffffff'
+# and compares it as text. CURRENT_TIMESTAMP has no fraction, so it would sort
+# before a stored value from the same second; pad strftime's milliseconds instead
+SQLITE_UTC_NOW = "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+class utc_now(FunctionElement):
+    """Server-side current UTC timestamp, in the same format as Python-side values"""
+    type = db.DateTime()
+    inherit_cache = True
+
+
+@compiles(utc_now)
+def compile_utc_now(element, compiler, **kw):
+    return 'CURRENT_TIMESTAMP'
+
+
+@compiles(utc_now, 'sqlite')
+def compile_utc_now_sqlite(element, compiler, **kw):
+    return f'({SQLITE_UTC_NOW})'
+
+# Database Models
+class User(db.Model):
+    __tablename__ = 'users'
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False, index=True)
+    email = db.Column(db.String(120), unique=True, nullable=False, index=True)
+    password_hash = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_login = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'created_at': self.created_at.isoformat(),
+            'last_login': self.last_login.isoformat() if self.last_login else None
+        }
+
+class Profile(db.Model):
+    __tablename__ = 'profiles'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    user = db.relationship('User', backref=db.backref('profiles', lazy=True))
+    transactions = db.relationship('Transaction', backref='profile', lazy=True, cascade='all, delete-orphan')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'user_id': self.user_id,
+            'createdAt': self.created_at.isoformat()
+        }
+
+# New Models for Enhanced Features
+
+class Category(db.Model):
+    __tablename__ = 'categories'
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    type = db.Column(db.String(20), nullable=False, index=True)  # 'income' or 'expense'
+    icon = db.Column(db.String(50), default='📁')
+    color = db.Column(db.String(7), default='#6B7280')
+    is_default = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Stamped on every write for the changes feed (see stamp_synced_rows)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'profile_id': self.profile_id,
+            'name': self.name,
+            'type': self.type,
+            'icon': self.icon,
+            'color': self.color,
+            'is_default': self.is_default,
+            'created_at': self.created_at.isoformat()
+        }
+
+class Tag(db.Model):
+    __tablename__ = 'tags'
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), nullable=False, index=True)
+    name = db.Column(db.String(50), nullable=False)
+    color = db.Column(db.String(7), default='#3B82F6')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Stamped on every write for the changes feed (see stamp_synced_rows)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'profile_id': self.profile_id,
+            'name': self.name,
+            'color': self.color,
+            'created_at': self.created_at.isoformat()
+        }
+
+class Account(db.Model):
+    __tablename__ = 'accounts'
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    type = db.Column(db.String(50), nullable=False)  # 'cash', 'bank', 'credit_card', 'investment'
+    balance = db.Column(db.Float, default=0)
+    currency = db.Column(db.String(3), default='USD')
+    icon = db.Column(db.String(50), default='💰')
+    color = db.Column(db.String(7), default='#10B981')
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Stamped on every write for the changes feed (see stamp_synced_rows)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'profile_id': self.profile_id,
+            'name': self.name,
+            'type': self.type,
+            'balance': self.balance,
+            'currency': self.currency,
+            'icon': self.icon,
+            'color': self.color,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat()
+        }
+
+class Budget(db.Model):
+    __tablename__ = 'budgets'
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), nullable=False, index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True, index=True)
+    amount = db.Column(db.Float, nullable=False)
+    period = db.Column(db.String(20), default='monthly')  # 'monthly', 'yearly'
+    month = db.Column(db.Integer, nullable=True)  # 1-12
+    year = db.Column(db.Integer, nullable=False)
+    alert_threshold = db.Column(db.Integer, default=80)  # Alert at 80% usage
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Stamped on every write for the changes feed (see stamp_synced_rows)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        db.Index('ix_budgets_profile_period', 'profile_id', 'month', 'year', 'category_id'),
+    )
+
+    def to_dict(self, spent=None):
+        # Callers listing several budgets should precompute spent with
+        # compute_budget_spent() so the whole list costs one aggregate
+        if spent is None:
+            spent = compute_budget_spent([self]).get(self.id, 0)
+
+        return {
+            'id': self.id,
+            'profile_id': self.profile_id,
+            'category_id': self.category_id,
+            'amount': self.amount,
+            'spent': spent,
+            'remaining': self.amount - spent,
+            'percentage': (spent / self.amount * 100) if self.amount > 0 else 0,
+            'period': self.period,
+            'month': self.month,
+            'year': self.year,
+            'alert_threshold': self.alert_threshold,
+            'is_exceeded': spent > self.amount,
+            'is_warning': (spent / self.amount * 100) >= self.alert_threshold if self.amount > 0 else False,
+            'created_at': self.created_at.isoformat()
+        }
+
+# Association table for transaction tags (many-to-many)
+transaction_tags = db.Table('transaction_tags',
+    db.Column('transaction_id', db.Integer, db.ForeignKey('transactions.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id'), primary_key=True),
+    db.Index('ix_transaction_tags_tag_transaction', 'tag_id', 'transaction_id')
+)
+
+class Transaction(db.Model):
+    __tablename__ = 'transactions'
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), nullable=False, index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True, index=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=True, index=True)
+    type = db.Column(db.String(20), nullable=False, index=True)  # 'income' or 'expense'
+    amount = db.Column(db.Float, nullable=False)
+    category = db.Column(db.String(100), nullable=False, index=True)  # Kept for backward compatibility
+    description = db.Column(db.Text)
+    date = db.Column(db.Date, nullable=False, index=True)
+    # Part of the listing's keyset cursor, so never NULL (see migration 5)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, server_default=utc_now())
+    # Stamped on every write for the changes feed (see stamp_synced_rows)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    
+    # Relationships
+    tags = db.relationship('Tag', secondary=transaction_tags, lazy='subquery', backref=db.backref('transactions', lazy=True))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'profile_id': self.profile_id,
+            'category_id': self.category_id,
+            'account_id': self.account_id,
+            'type': self.type,
+            'amount': self.amount,
+            'category': self.category,
+            'description': self.description,
+            'date': self.date.isoformat(),
+            'tags': [tag.to_dict() for tag in self.tags],
+            'created_at': self.created_at.isoformat()
+        }
+
+# Composite indexes for the hot query shapes (kept in sync with migrations.py)
+db.Index('ix_transactions_profile_date_created', Transaction.profile_id,
+         Transaction.date.desc(), Transaction.created_at.desc(), Transaction.id.desc())
+db.Index('ix_transactions_profile_type_category_date', Transaction.profile_id,
+         Transaction.type, Transaction.category, Transaction.date)
+
+class MonthlyRollup(db.Model):
+    """
+    Per profile/month/category/type transaction count and sum
+    Maintained alongside every transaction write so summaries never scan transactions
+    """
+    __tablename__ = 'monthly_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    type = db.Column(db.String(20), nullable=False)
+    tx_count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('profile_id', 'year', 'month', 'category', 'type', name='uq_monthly_rollups_key'),
+    )
+
+class ProfileVersion(db.Model):
+    """
+    Monotonic per-profile data version, bumped by every write to a profile's data
+    Kept without a foreign key so a deleted profile's counter survives and a
+    reused profile id never repeats an ETag
+    """
+    __tablename__ = 'profile_versions'
+    profile_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+class UserSession(db.Model):
+    """
+    Server-side session data for SESSION_STORE=database (see session_store.py)
+    id is a SHA-256 of the cookie's random token, so the table alone cannot
+    be used to hijack a session; expires_at is an epoch second
+    """
+    __tablename__ = 'user_sessions'
+    id = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, index=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.Integer, nullable=False, index=True)
+
+class DeletedRecord(db.Model):
+    """
+    Tombstone for a deleted category, tag, account, budget or transaction
+    Lets the changes feed report deletes; version is the profile data version
+    of the deleting transaction, like the version column of live rows
+    """
+    __tablename__ = 'deleted_records'
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, nullable=False)
+    entity = db.Column(db.String(30), nullable=False)  # table name
+    entity_id = db.Column(db.Integer, nullable=False)
+    version = db.Column(db.BigInteger, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Models whose writes are stamped with the profile data version, so the
+# changes feed can find them through (profile_id, version) indexes (kept in
+# sync with migrations.py)
+SYNCED_MODELS = (Transaction, Category, Tag, Account, Budget)
+for _model in SYNCED_MODELS:
+    db.Index(f'ix_{_model.__tablename__}_profile_version', _model.profile_id, _model.version)
+db.Index('ix_deleted_records_profile_version', DeletedRecord.profile_id, DeletedRecord.version)
+
+# Monthly rollups
+def add_rollup_delta(deltas, profile_id, tx_date, category, tx_type, amount, count=1):
+    """Accumulate one transaction's contribution into a deltas dict"""
+    key = (profile_id, tx_date.year, tx_date.month, category, tx_type)
+    current_count, current_total = deltas.get(key, (0, 0.0))
+    deltas[key] = (current_count + count, current_total + amount * count)
+
+def apply_rollup_deltas(deltas):
+    """
+    Upsert accumulated deltas into monthly_rollups in the current DB transaction
+    deltas: {(profile_id, year, month, category, type): (count, amount)}
+    """
+    rows = [
+        {'profile_id': key[0], 'year': key[1], 'month': key[2], 'category': key[3], 'type': key[4],
+         'tx_count': count, 'total': total}
+        for key, (count, total) in deltas.items() if count or total
+    ]
+    if not rows:
+        return
+
+    table = MonthlyRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['profile_id', 'year', 'month', 'category', 'type'],
+            set_={
+                'tx_count': table.c.tx_count + stmt.excluded.tx_count,
+                'total': table.c.total + stmt.excluded.total
+            }
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    # Portable fallback for other backends
+    for row in rows:
+        rollup = MonthlyRollup.query.filter_by(
+            profile_id=row['profile_id'], year=row['year'], month=row['month'],
+            category=row['category'], type=row['type']
+        ).first()
+        if rollup:
+            rollup.tx_count += row['tx_count']
+            rollup.total += row['total']
+        else:
+            db.session.add(MonthlyRollup(**row))
+
+def record_transaction_rollup(transaction, sign=1):
+    """Add (sign=1) or remove (sign=-1) a single transaction from the rollups"""
+    deltas = {}
+    add_rollup_delta(deltas, transaction.profile_id, transaction.date,
+                     transaction.category, transaction.type, transaction.amount, count=sign)
+    apply_rollup_deltas(deltas)
+
+def rebuild_rollups(profile_id=None):
+    """
+    Recompute monthly_rollups from the transactions table
+    Runs as a single DELETE + INSERT ... SELECT; the caller commits
+    """
+    year = db.extract('year', Transaction.date)
+    month = db.extract('month', Transaction.date)
+    source = db.select(
+        Transaction.profile_id, year, month, Transaction.category, Transaction.type,
+        db.func.count(Transaction.id), db.func.sum(Transaction.amount)
+    ).group_by(Transaction.profile_id, year, month, Transaction.category, Transaction.type)
+
+    delete = db.delete(MonthlyRollup)
+    if profile_id is not None:
+        delete = delete.where(MonthlyRollup.profile_id == profile_id)
+        source = source.where(Transaction.profile_id == profile_id)
+    db.session.execute(delete)
+    db.session.execute(db.insert(MonthlyRollup).from_select(
+        ['profile_id', 'year', 'month', 'category', 'type', 'tx_count', 'total'], source
+    ))
+
+# Data versions
+# Session.info key caching the versions this DB transaction bumped to
+PROFILE_VERSIONS_KEY = 'profile_versions'
+
+def bump_profile_version(profile_id):
+    """
+    Increment a profile's data version once per DB transaction and return it
+    Every route that changes a profile's data calls this before committing,
+    which invalidates the ETags handed out for that profile. Rows written in
+    the transaction are stamped with the returned version (stamp_synced_rows)
+    """
+    versions = db.session.info.setdefault(PROFILE_VERSIONS_KEY, {})
+    if profile_id in versions:
+        return versions[profile_id]
+
+    # Without autoflush, so pending rows are stamped with this bump rather than bumping again
+    with db.session.no_autoflush:
+        table = ProfileVersion.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(profile_id=profile_id, version=1)
+            version = db.session.execute(stmt.on_conflict_do_update(
+                index_elements=['profile_id'], set_={'version': table.c.version + 1}
+            ).returning(table.c.version)).scalar_one()
+        else:
+            # Portable fallback for other backends
+            updated = db.session.execute(
+                db.update(table).where(table.c.profile_id == profile_id).values(version=table.c.version + 1)
+            ).rowcount
+            if not updated:
+                db.session.execute(db.insert(table).values(profile_id=profile_id, version=1))
+            version = db.session.execute(
+                db.select(table.c.version).where(table.c.profile_id == profile_id)
+            ).scalar_one()
+
+    versions[profile_id] = version
+    return version
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def forget_profile_versions(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(PROFILE_VERSIONS_KEY, None)
+
+@event.listens_for(RoutingSession, 'before_flush')
+def stamp_synced_rows(session, flush_context, instances):
+    """
+    Stamp new and changed synced rows with the profile data version and
+    record tombstones for deleted ones
+    Rows removed along with their profile get no tombstone; delete_profile
+    clears the profile's tombstones instead
+    """
+    now = datetime.utcnow()
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, SYNCED_MODELS) or obj.profile_id is None:
+            continue
+        if obj in session.new or session.is_modified(obj):
+            obj.version = bump_profile_version(obj.profile_id)
+            obj.updated_at = now
+
+    deleted_profiles = {obj.id for obj in session.deleted if isinstance(obj, Profile)}
+    for obj in list(session.deleted):
+        if not isinstance(obj, SYNCED_MODELS) or obj.profile_id in deleted_profiles:
+            continue
+        version = bump_profile_version(obj.profile_id)
+        session.add(DeletedRecord(profile_id=obj.profile_id, entity=obj.__tablename__,
+                                  entity_id=obj.id, version=version, deleted_at=now))
+        if isinstance(obj, Tag):
+            # The tag's transactions lose it, so they count as changed too
+            table = Transaction.__table__
+            tagged = db.select(transaction_tags.c.transaction_id).where(transaction_tags.c.tag_id == obj.id)
+            session.execute(db.update(table).where(table.c.id.in_(tagged)).values(version=version, updated_at=now))
+
+# Budget usage
+def compute_budget_spent(budgets, category_names=None):
+    """
+    Compute expense totals for a list of budgets
+    Runs one grouped aggregate over monthly_rollups per distinct (profile, period),
+    so listing the budgets of a month costs O(categories), not O(transactions)
+    category_names: optional {category_id: name} the caller already loaded for
+    every category the budgets can name (their profile's); a budget whose
+    category is not in it (deleted since) is unnamed and has spent nothing
+    Returns {budget_id: spent}
+    """
+    if not budgets:
+        return {}
+
+    category_ids = {budget.category_id for budget in budgets if budget.category_id}
+    if category_names is None:
+        category_names = {}
+        if category_ids:
+            category_names = dict(
+                db.session.query(Category.id, Category.name).filter(Category.id.in_(category_ids)).all()
+            )
+
+    periods = {}
+    for budget in budgets:
+        periods.setdefault((budget.profile_id, budget.year, budget.month), []).append(budget)
+
+    spent = {}
+    for (profile_id, year, month), period_budgets in periods.items():
+        query = db.session.query(MonthlyRollup.category, db.func.sum(MonthlyRollup.total)).filter(
+            MonthlyRollup.profile_id == profile_id,
+            MonthlyRollup.type == 'expense',
+            MonthlyRollup.year == year
+        )
+        if month:
+            query = query.filter(MonthlyRollup.month == month)
+        totals = dict(query.group_by(MonthlyRollup.category).all())
+        for budget in period_budgets:
+            if budget.category_id:
+                # Spending is matched on the category name, as transactions
+                # created before category_id existed only carry the name
+                spent[budget.id] = totals.get(category_names.get(budget.category_id), 0) or 0
+            else:
+                # Total budget - all expenses
+                spent[budget.id] = sum(value or 0 for value in totals.values())
+    return spent
+
+def current_budget_period():
+    """The month budgets GET defaults to, as YYYYMM; part of its ETag"""
+    return datetime.now().strftime('%Y%m')
+
+def serialize_budgets(budgets, category_names=None):
+    """Serialize budgets with their usage computed in one pass"""
+    spent = compute_budget_spent(budgets, category_names)
+    return [budget.to_dict(spent=spent.get(budget.id, 0)) for budget in budgets]
+
+# Bulk loading
+def copy_into(table_name, columns, rows, options=''):
+    """Load rows with PostgreSQL COPY on the session's connection (same DB transaction)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['' if value is None else value for value in row])
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv{options})", buffer
+        )
+    finally:
+        cursor.close()
@@ -0,0 +1,45 @@
+# Keyset (cursor-based) pagination helpers
+import base64
+import json
+from datetime import date, datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(tx_date, created_at, tx_id):
+    """
+    Encode the sort key of the last row on a page into an opaque token
+    The key mirrors the listing order: (date, created_at, id)
+    """
+    payload = [tx_date.isoformat(), created_at.isoformat(), tx_id]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a token produced by encode_cursor
+    Returns a (date, datetime, id) tuple
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        tx_date, created_at, tx_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return date.fromisoformat(tx_date), datetime.fromisoformat(created_at), int(tx_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a requested page size to [1, maximum]"""
+    if value is None or value == '':
+        return default
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
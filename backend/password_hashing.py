@@ -0,0 +1,98 @@
+# Password hashing service
+#
+# Runs the KDF in a bounded worker pool so a login storm cannot queue up
+# unbounded work: once max_pending hashes are queued or running, callers get
+# HashingBusy immediately (mapped to a 503) instead of waiting.
+#
+# This caps hashing concurrency; it does not free the request's worker. The
+# calling thread still waits for its own hash, so a sync gunicorn worker is
+# busy for the whole KDF. Only threaded (--threads) or gevent workers can
+# serve other requests meanwhile.
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_ITERATIONS = 600000
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is saturated or a hash timed out"""
+
+
+class PasswordHasher:
+    def __init__(self, iterations=DEFAULT_ITERATIONS, pool_size=None, max_pending=None,
+                 use_processes=False, timeout=30):
+        self.iterations = iterations
+        self.pool_size = pool_size or os.cpu_count() or 2
+        self.max_pending = max_pending or self.pool_size * 4
+        self.use_processes = use_processes
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def method(self):
+        return f'pbkdf2:sha256:{self.iterations}'
+
+    def _get_executor(self):
+        # Created lazily and per process so gunicorn --preload forks stay safe
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                pool = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+                self._executor = pool(max_workers=self.pool_size)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        """
+        Run fn in the pool and wait for its result, at most timeout seconds
+        The slot is released by the job's done callback, never by the caller,
+        so a job that outlives its caller's timeout keeps counting against
+        max_pending until it finishes
+        """
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy('Password hashing queue is full')
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # A job still queued is dropped (its callback frees the slot); a running one cannot be stopped
+            future.cancel()
+            raise HashingBusy('Password hashing timed out')
+
+    def hash(self, password):
+        """Hash a password with the configured work factor"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash"""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with a different method or work factor"""
+        return password_hash.split('$', 1)[0] != self.method
+
+
+def create_password_hasher():
+    """
+    Build the hasher from the environment
+    PASSWORD_HASH_ITERATIONS, HASH_POOL_SIZE, HASH_MAX_PENDING, HASH_POOL_KIND (thread|process),
+    HASH_TIMEOUT (seconds a request waits for its hash)
+    """
+    pool_size = os.environ.get('HASH_POOL_SIZE')
+    max_pending = os.environ.get('HASH_MAX_PENDING')
+    return PasswordHasher(
+        iterations=int(os.environ.get('PASSWORD_HASH_ITERATIONS', DEFAULT_ITERATIONS)),
+        pool_size=int(pool_size) if pool_size else None,
+        max_pending=int(max_pending) if max_pending else None,
+        use_processes=os.environ.get('HASH_POOL_KIND', 'thread') == 'process',
+        timeout=float(os.environ.get('HASH_TIMEOUT', '30'))
+    )
@@ -0,0 +1,79 @@
+# Per-route SQL statement budgets
+#
+# Routes declare how many statements one request may issue with
+# @query_budget(n); routes without one fall back to DEFAULT_QUERY_BUDGET.
+#   QUERY_BUDGET_MODE=log    (default) log and count it
+#   QUERY_BUDGET_MODE=raise  raise QueryBudgetExceeded, answered with a 500 whose
+#                            body lists the statements, so an N+1 fails loudly.
+#                            Opt in where a failure is wanted: the development
+#                            server, checks and tests.
+#                            Writes are checked before they commit, so an
+#                            over-budget write is rolled back, not saved
+#   QUERY_BUDGET_MODE=off    skip the check
+import os
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+MODES = ('raise', 'log', 'off')
+
+
+class QueryBudgetExceeded(Exception):
+    """A request or block issued more SQL statements than its budget"""
+
+    def __init__(self, label, limit, statements):
+        self.label = label
+        self.limit = limit
+        self.statements = list(statements)
+        listing = '\n'.join(f'  {i + 1}. {" ".join(s.split())}' for i, s in enumerate(self.statements))
+        super().__init__(f'{label} issued {len(self.statements)} SQL statements (budget {limit}):\n{listing}')
+
+
+def query_budget(limit):
+    """
+    Declare a route's statement budget
+    limit: an int, or a callable evaluated after the request for routes whose
+    statement count legitimately depends on the request size
+    Usage: @query_budget(3), placed below @app.route
+    """
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+def budget_for(view_function, default):
+    limit = getattr(view_function, 'query_budget', default) if view_function else default
+    return limit() if callable(limit) else limit
+
+
+def query_budget_mode():
+    # Never raise unless asked to: a deployment that forgets FLASK_ENV must not
+    # turn every budget miss into a 500 for real users
+    mode = os.environ.get('QUERY_BUDGET_MODE', 'log')
+    if mode not in MODES:
+        raise ValueError(f'Unknown QUERY_BUDGET_MODE: {mode}')
+    return mode
+
+
+@contextmanager
+def assert_max_queries(limit, label='block'):
+    """
+    Raise QueryBudgetExceeded if the wrapped block runs more than limit statements
+    The building block for a test fixture:
+        with assert_max_queries(2, 'GET categories'):
+            client.get(f'/api/profiles/{profile_id}/categories')
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+    if len(statements) > limit:
+        raise QueryBudgetExceeded(label, limit, statements)
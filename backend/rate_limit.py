@@ -0,0 +1,231 @@
+# Pluggable rate limiting backends
+#
+# Every backend exposes hit(key, limit, window) -> (allowed, retry_after)
+# and does O(1) work per call:
+#   - MemoryRateLimiter: exact sliding window per process (deque per key,
+#     idle keys evicted in LRU order)
+#   - SQLiteRateLimiter: sliding-window counter in a SQLite file shared by
+#     all gunicorn workers on the host
+#   - RedisRateLimiter: sliding-window counter in any Redis-protocol store
+#     (any stand-in client with pipeline/incr/expire/get/decr works too)
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import wraps
+from flask import jsonify, request
+
+DEFAULT_MAX_KEYS = 100000
+
+
+class MemoryRateLimiter:
+    """Exact sliding-window limiter for a single process"""
+
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> (window, deque of hit times), least recently touched first
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_idle(self, now):
+        while self._hits:
+            key, (window, hits) = next(iter(self._hits.items()))
+            if len(self._hits) <= self.max_keys and hits and now - hits[-1] < window:
+                break
+            self._hits.popitem(last=False)
+
+    def hit(self, key, limit, window):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._hits.get(key)
+            if entry is None:
+                entry = (window, deque(maxlen=limit))
+                self._hits[key] = entry
+            else:
+                self._hits.move_to_end(key)
+            hits = entry[1]
+
+            while hits and now - hits[0] >= window:
+                hits.popleft()
+
+            if len(hits) >= limit:
+                allowed, retry_after = False, max(1, math.ceil(window - (now - hits[0])))
+            else:
+                hits.append(now)
+                allowed, retry_after = True, 0
+
+            self._evict_idle(now)
+            return allowed, retry_after
+
+    def __len__(self):
+        return len(self._hits)
+
+
+def sliding_window_estimate(previous, current, now, window):
+    """
+    Weighted count for a sliding-window counter
+    Returns (estimate, seconds until the current fixed window ends)
+    """
+    elapsed = now % window
+    return previous * (1 - elapsed / window) + current, window - elapsed
+
+
+def retry_after_seconds(previous, current, limit, now, window):
+    """Seconds until a blocked key falls back under the limit"""
+    _, remaining = sliding_window_estimate(previous, current, now, window)
+    if current >= limit or not previous:
+        return max(1, math.ceil(remaining))
+    # The previous window's weight decays linearly; solve for when it is low enough
+    wait = window * (1 - (limit - current) / previous) - (now % window)
+    return max(1, math.ceil(min(wait, remaining)))
+
+
+class SQLiteRateLimiter:
+    """Sliding-window counter stored in a SQLite file shared across workers"""
+
+    SWEEP_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits ('
+            ' key TEXT PRIMARY KEY, window_index INTEGER NOT NULL,'
+            ' current INTEGER NOT NULL, previous INTEGER NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at ON rate_limits (expires_at)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, limit, window):
+        now = time.time()
+        index = int(now // window)
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT window_index, current, previous FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            current = previous = 0
+            if row:
+                if row[0] == index:
+                    current, previous = row[1], row[2]
+                elif row[0] == index - 1:
+                    previous = row[1]
+
+            estimate, _ = sliding_window_estimate(previous, current, now, window)
+            if estimate >= limit:
+                conn.execute('COMMIT')
+                return False, retry_after_seconds(previous, current, limit, now, window)
+
+            conn.execute(
+                'INSERT INTO rate_limits (key, window_index, current, previous, expires_at)'
+                ' VALUES (?, ?, ?, ?, ?)'
+                ' ON CONFLICT(key) DO UPDATE SET window_index = excluded.window_index,'
+                ' current = excluded.current, previous = excluded.previous, expires_at = excluded.expires_at',
+                (key, index, current + 1, previous, (index + 2) * window)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        self._calls += 1
+        if self._calls % self.SWEEP_EVERY == 0:
+            conn.execute('DELETE FROM rate_limits WHERE expires_at < ?', (now,))
+        return True, 0
+
+
+class RedisRateLimiter:
+    """Sliding-window counter in a Redis-protocol store shared across workers"""
+
+    def __init__(self, client, prefix='rl'):
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key, limit, window):
+        now = time.time()
+        index = int(now // window)
+        current_key = f'{self.prefix}:{key}:{index}'
+        previous_key = f'{self.prefix}:{key}:{index - 1}'
+
+        # Increment first and decide on the returned count: INCR is atomic, so
+        # concurrent workers each see a distinct count and at most limit get in
+        pipe = self.client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, int(window * 2) + 1)
+        pipe.get(previous_key)
+        current, _, previous = pipe.execute()
+        current, previous = int(current) - 1, int(previous or 0)
+        estimate, _ = sliding_window_estimate(previous, current, now, window)
+        if estimate >= limit:
+            # Rejected hits do not count, as with the other backends; until this
+            # DECR lands a concurrent hit can only be rejected, never let in
+            self.client.decr(current_key)
+            return False, retry_after_seconds(previous, current, limit, now, window)
+        return True, 0
+
+
+def create_rate_limiter(backend=None):
+    """
+    Build the limiter selected by RATE_LIMIT_BACKEND (memory, sqlite or redis)
+    sqlite uses RATE_LIMIT_SQLITE_PATH, redis uses RATE_LIMIT_REDIS_URL
+    """
+    backend = backend or os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    if backend == 'sqlite':
+        return SQLiteRateLimiter(os.environ.get('RATE_LIMIT_SQLITE_PATH', '/tmp/finance_tracker_rate_limits.db'))
+    if backend == 'redis':
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RATE_LIMIT_BACKEND=redis requires the redis package')
+        return RedisRateLimiter(redis.Redis.from_url(os.environ.get('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')))
+    if backend == 'memory':
+        return MemoryRateLimiter()
+    raise ValueError(f'Unknown RATE_LIMIT_BACKEND: {backend}')
+
+
+_default_limiter = None
+
+
+def get_rate_limiter():
+    """Process-wide limiter, created on first use from the environment"""
+    global _default_limiter
+    if _default_limiter is None:
+        _default_limiter = create_rate_limiter()
+    return _default_limiter
+
+
+def client_ip():
+    return request.headers.get('X-Forwarded-For', request.remote_addr)
+
+
+def rate_limit(limit, window, key=None, limiter=None):
+    """
+    Decorator to rate limit a route
+    key: optional callable returning the bucket key (defaults to client IP)
+    Usage: @rate_limit(60, 60)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            identifier = key() if key else client_ip()
+            allowed, retry_after = (limiter or get_rate_limiter()).hit(f'{f.__name__}:{identifier}', limit, window)
+            if not allowed:
+                response = jsonify({'error': f'Too many requests. Please try again in {retry_after} seconds'})
+                response.headers['Retry-After'] = str(retry_after)
+                return response, 429
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
@@ -0,0 +1,202 @@
+# Response cache for small, read-mostly per-profile endpoints
+#
+# Entries are keyed by (profile_id, endpoint, normalized query args) and
+# stamped with the profile data version they were built from. A lookup only
+# hits when the stamp matches the current version, so an entry can never be
+# served after a write, even when the write was handled by another worker.
+# Write handlers also invalidate explicitly to free the entries early.
+#   - LocalCache: per-process LRU bounded by entry count and TTL
+#   - RedisCache: optional tier shared by all gunicorn workers
+#     (any client with get/setex/sadd/smembers/delete/pipeline works)
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL = 300
+
+
+def normalize_args(args):
+    """Order-independent key for a request's query arguments"""
+    return tuple(sorted(args.items(multi=True)))
+
+
+class LocalCache:
+    """LRU of (version, body) per key for a single process"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (expires_at, version, body), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            expires_at, entry_version, body = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            if entry_version != version:
+                del self._entries[key]
+                self.stats['stale'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return body
+
+    def set(self, key, version, body):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def invalidate(self, profile_id, endpoint):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == profile_id and key[1] == endpoint]:
+                del self._entries[key]
+                self.stats['invalidations'] += 1
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisCache:
+    """Shared tier storing b'<version>:<body>' under a TTL"""
+
+    def __init__(self, client, ttl=DEFAULT_TTL, prefix='response_cache'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'invalidations': 0, 'errors': 0}
+
+    def _index_key(self, profile_id, endpoint):
+        return f'{self.prefix}:{profile_id}:{endpoint}'
+
+    def _entry_key(self, key):
+        digest = hashlib.sha1(repr(key[2]).encode('utf-8')).hexdigest()
+        return f'{self._index_key(key[0], key[1])}:{digest}'
+
+    def get(self, key, version):
+        try:
+            raw = self.client.get(self._entry_key(key))
+        except Exception:
+            self.stats['errors'] += 1
+            return None
+        if raw is None:
+            self.stats['misses'] += 1
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        entry_version, _, body = raw.partition(':')
+        if entry_version != str(version):
+            self.stats['stale'] += 1
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return body
+
+    def set(self, key, version, body):
+        index_key = self._index_key(key[0], key[1])
+        try:
+            pipe = self.client.pipeline()
+            pipe.setex(self._entry_key(key), self.ttl, f'{version}:{body}')
+            pipe.sadd(index_key, self._entry_key(key))
+            pipe.expire(index_key, self.ttl)
+            pipe.execute()
+        except Exception:
+            self.stats['errors'] += 1
+
+    def invalidate(self, profile_id, endpoint):
+        index_key = self._index_key(profile_id, endpoint)
+        try:
+            keys = list(self.client.smembers(index_key))
+            self.client.delete(index_key, *keys)
+        except Exception:
+            self.stats['errors'] += 1
+            return
+        self.stats['invalidations'] += len(keys)
+
+
+class ResponseCache:
+    """Local LRU in front of an optional shared tier"""
+
+    def __init__(self, local=None, shared=None):
+        self.local = local
+        self.shared = shared
+
+    @property
+    def enabled(self):
+        return self.local is not None or self.shared is not None
+
+    def get(self, profile_id, endpoint, args, version):
+        """Cached body for the current data version, or None"""
+        key = (profile_id, endpoint, normalize_args(args))
+        if self.local is not None:
+            body = self.local.get(key, version)
+            if body is not None:
+                return body
+        if self.shared is not None:
+            body = self.shared.get(key, version)
+            if body is not None:
+                if self.local is not None:
+                    self.local.set(key, version, body)
+                return body
+        return None
+
+    def set(self, profile_id, endpoint, args, version, body):
+        key = (profile_id, endpoint, normalize_args(args))
+        if self.local is not None:
+            self.local.set(key, version, body)
+        if self.shared is not None:
+            self.shared.set(key, version, body)
+
+    def invalidate(self, profile_id, *endpoints):
+        """Drop every cached variant of the given endpoints for a profile"""
+        for endpoint in endpoints:
+            if self.local is not None:
+                self.local.invalidate(profile_id, endpoint)
+            if self.shared is not None:
+                self.shared.invalidate(profile_id, endpoint)
+
+    def stats(self):
+        """Counters for this worker, per tier"""
+        result = {'pid': os.getpid()}
+        if self.local is not None:
+            result['local'] = dict(self.local.stats, size=self.local.size(), max_entries=self.local.max_entries)
+        if self.shared is not None:
+            result['shared'] = dict(self.shared.stats)
+        return result
+
+
+def create_response_cache():
+    """
+    Build the cache from the environment
+    RESPONSE_CACHE_MAX_ENTRIES (0 disables the local tier), RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_REDIS_URL (enables the shared tier)
+    """
+    ttl = int(os.environ.get('RESPONSE_CACHE_TTL', DEFAULT_TTL))
+    max_entries = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+    local = LocalCache(max_entries=max_entries, ttl=ttl) if max_entries > 0 else None
+
+    shared = None
+    redis_url = os.environ.get('RESPONSE_CACHE_REDIS_URL')
+    if redis_url:
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RESPONSE_CACHE_REDIS_URL requires the redis package')
+        shared = RedisCache(redis.Redis.from_url(redis_url), ttl=ttl)
+    return ResponseCache(local, shared)
@@ -0,0 +1,23 @@
+# API blueprints, registered on each app by create_app()
+from routes import (
+    accounts, analytics, budgets, categories, changes, profiles, reports, system, tags, transactions, users
+)
+
+BLUEPRINTS = [
+    system.bp,
+    users.bp,
+    profiles.bp,
+    transactions.bp,
+    reports.bp,
+    categories.bp,
+    tags.bp,
+    accounts.bp,
+    budgets.bp,
+    changes.bp,
+    analytics.bp,
+]
+
+
+def register_blueprints(app):
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
@@ -0,0 +1,133 @@
+# Account routes
+from flask import Blueprint, jsonify, request
+import logging
+
+from auth import require_auth, sanitize_input
+from extensions import response_cache
+from fast_json import encode_list
+from models import db, Account, bump_profile_version
+from query_budget import query_budget
+from routes.common import (
+    account_serializer, cached_profile_response, conditional_profile_get, fetch_profile_accounts, get_owned,
+    json_response, owns_profile, parse_amount
+)
+
+bp = Blueprint('accounts', __name__)
+logger = logging.getLogger(__name__)
+
+@bp.route('/api/profiles/<int:profile_id>/accounts', methods=['GET'])
+@query_budget(2)  # ownership + data version, the rows (none on a cache hit)
+@require_auth
+@conditional_profile_get()
+@cached_profile_response('accounts')
+def get_accounts(profile_id):
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        rows = fetch_profile_accounts(profile_id)
+        return json_response(encode_list(account_serializer, rows))
+    except Exception as e:
+        logger.error(f"Error fetching accounts: {str(e)}")
+        return jsonify({'error': 'Failed to fetch accounts'}), 500
+
+@bp.route('/api/profiles/<int:profile_id>/accounts', methods=['POST'])
+@query_budget(4)  # ownership, version bump, INSERT, reload for the response
+@require_auth
+def create_account(profile_id):
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        data = request.get_json()
+        name = sanitize_input(data.get('name', ''))
+        acc_type = data.get('type', 'cash')
+        
+        if not name or len(name) < 2:
+            return jsonify({'error': 'Account name must be at least 2 characters'}), 400
+        
+        if acc_type not in ['cash', 'bank', 'credit_card', 'investment', 'savings', 'other']:
+            return jsonify({'error': 'Invalid account type'}), 400
+        
+        try:
+            balance = parse_amount(data.get('balance', 0))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid balance format'}), 400
+        
+        new_account = Account(
+            profile_id=profile_id,
+            name=name,
+            type=acc_type,
+            balance=balance,
+            currency=data.get('currency', 'USD'),
+            icon=data.get('icon', '💰'),
+            color=data.get('color', '#10B981')
+        )
+        
+        db.session.add(new_account)
+        bump_profile_version(profile_id)
+        db.session.commit()
+        response_cache.invalidate(profile_id, 'accounts')
+        
+        logger.info(f"Account created: {name} for profile {profile_id}")
+        return jsonify(new_account.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating account: {str(e)}")
+        return jsonify({'error': 'Failed to create account'}), 500
+
+@bp.route('/api/accounts/<int:account_id>', methods=['PUT'])
+@query_budget(4)  # owned lookup, version bump, UPDATE, reload for the response
+@require_auth
+def update_account(account_id):
+    try:
+        account = get_owned(Account, account_id)
+        if not account:
+            return jsonify({'error': 'Account not found'}), 404
+        
+        data = request.get_json()
+        
+        if 'name' in data:
+            account.name = sanitize_input(data['name'])
+        if 'balance' in data:
+            try:
+                account.balance = parse_amount(data['balance'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid balance format'}), 400
+        if 'icon' in data:
+            account.icon = data['icon']
+        if 'color' in data:
+            account.color = data['color']
+        if 'is_active' in data:
+            account.is_active = data['is_active']
+        
+        bump_profile_version(account.profile_id)
+        db.session.commit()
+        response_cache.invalidate(account.profile_id, 'accounts')
+        return jsonify(account.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error updating account: {str(e)}")
+        return jsonify({'error': 'Failed to update account'}), 500
+
+@bp.route('/api/accounts/<int:account_id>', methods=['DELETE'])
+@query_budget(4)  # owned lookup, version bump, tombstone, DELETE
+@require_auth
+def delete_account(account_id):
+    try:
+        account = get_owned(Account, account_id)
+        if not account:
+            return jsonify({'error': 'Account not found'}), 404
+        
+        profile_id = account.profile_id
+        db.session.delete(account)
+        bump_profile_version(profile_id)
+        db.session.commit()
+        response_cache.invalidate(profile_id, 'accounts')
+        
+        logger.info(f"Account deleted: {account_id}")
+        return jsonify({'message': 'Account deleted successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error deleting account: {str(e)}")
+        return jsonify({'error': 'Failed to delete account'}), 500
@@ -0,0 +1,133 @@
+# Analytics routes, computed over the cached columnar snapshot in analytics.py
+from flask import Blueprint, g, jsonify, request
+from datetime import date, datetime, timedelta
+import logging
+
+from analytics import (
+    TYPES, category_trends, largest_movers, rolling_average, spend_percentiles, year_over_year
+)
+from auth import require_auth
+from extensions import analytics_cache
+from query_budget import query_budget
+from routes.common import conditional_profile_get, owns_profile, parse_date_arg, parse_int_arg
+
+bp = Blueprint('analytics', __name__)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERCENTILES = '50,75,90,95,99'
+MAX_SERIES_DAYS = 3660
+
+
+class InvalidArgument(ValueError):
+    """A query argument a report cannot use; its message is returned with a 400"""
+
+
+def bounded_int(name, default, low, high):
+    try:
+        value = parse_int_arg(request.args.get(name))
+    except ValueError:
+        raise InvalidArgument(f'{name} must be an integer')
+    if value is None:
+        return default
+    if not low <= value <= high:
+        raise InvalidArgument(f'{name} must be between {low} and {high}')
+    return value
+
+
+def date_arg(name, default=None):
+    try:
+        return parse_date_arg(request.args.get(name)) or default
+    except ValueError:
+        raise InvalidArgument('Invalid date format. Use YYYY-MM-DD')
+
+
+def filter_args():
+    """type (expense by default) and account_id, accepted by every report"""
+    tx_type = request.args.get('type', 'expense')
+    if tx_type not in TYPES:
+        raise InvalidArgument('Type must be income or expense')
+    try:
+        account_id = parse_int_arg(request.args.get('account_id'))
+    except ValueError:
+        raise InvalidArgument('account_id must be an integer')
+    return {'tx_type': tx_type, 'account_id': account_id}
+
+
+def rolling_report(snapshot):
+    window = bounded_int('window', 30, 1, 365)
+    date_to = date_arg('to', date.today())
+    date_from = date_arg('from', date_to - timedelta(days=89))
+    if not 0 <= (date_to - date_from).days < MAX_SERIES_DAYS:
+        raise InvalidArgument(f'from must be on or before to, at most {MAX_SERIES_DAYS} days apart')
+    return rolling_average(snapshot, window, date_from, date_to, **filter_args())
+
+
+def trends_report(snapshot):
+    months = bounded_int('months', 12, 1, 120)
+    month = request.args.get('month')
+    try:
+        end_month = datetime.strptime(month, '%Y-%m').date() if month else date.today()
+    except ValueError:
+        raise InvalidArgument('Invalid month format. Use YYYY-MM')
+    return category_trends(snapshot, months, end_month, **filter_args())
+
+
+def year_over_year_report(snapshot):
+    return year_over_year(snapshot, **filter_args())
+
+
+def percentiles_report(snapshot):
+    try:
+        percentiles = [float(value) for value in request.args.get('p', DEFAULT_PERCENTILES).split(',')]
+    except ValueError:
+        raise InvalidArgument('p must be a comma-separated list of numbers')
+    if not 0 < len(percentiles) <= 20 or not all(0 <= value <= 100 for value in percentiles):
+        raise InvalidArgument('p takes up to 20 percentiles between 0 and 100')
+    return spend_percentiles(snapshot, percentiles, date_arg('from'), date_arg('to'), **filter_args())
+
+
+def movers_report(snapshot):
+    days = bounded_int('days', 30, 1, 366)
+    limit = bounded_int('limit', 5, 1, 50)
+    return largest_movers(snapshot, days, date_arg('to', date.today()), limit, **filter_args())
+
+
+REPORTS = {
+    'rolling': rolling_report,
+    'category-trends': trends_report,
+    'year-over-year': year_over_year_report,
+    'percentiles': percentiles_report,
+    'movers': movers_report,
+}
+
+
+def today_scope():
+    # Default ranges end today, so cached responses must not outlive the day
+    return date.today().isoformat()
+
+
+@bp.route('/api/profiles/<int:profile_id>/analytics/<report>', methods=['GET'])
+@query_budget(3)  # data version, then at most the two snapshot patch queries
+@require_auth
+@conditional_profile_get(scope=today_scope)
+def get_analytics(profile_id, report):
+    """
+    One report over the profile's cached snapshot
+    Query: type=expense|income, account_id, plus the report's own arguments
+    """
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found or access denied'}), 404
+
+        build = REPORTS.get(report)
+        if build is None:
+            return jsonify({'error': f"Unknown report. Use one of: {', '.join(REPORTS)}"}), 404
+
+        snapshot = analytics_cache.get(profile_id, g.profile_versions[profile_id])
+        try:
+            return jsonify(build(snapshot)), 200
+        except InvalidArgument as e:
+            return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error computing {report} analytics for profile {profile_id}: {str(e)}")
+        return jsonify({'error': 'Failed to compute analytics'}), 500
@@ -0,0 +1,159 @@
+# Budget routes (monthly limits)
+from flask import Blueprint, jsonify, request
+import logging
+
+from auth import require_auth
+from models import db, Budget, Category, bump_profile_version, current_budget_period, serialize_budgets
+from query_budget import query_budget
+from routes.common import conditional_profile_get, get_owned, owns_profile, parse_amount, parse_int_arg
+
+bp = Blueprint('budgets', __name__)
+logger = logging.getLogger(__name__)
+
+@bp.route('/api/profiles/<int:profile_id>/budgets', methods=['GET'])
+@query_budget(4)  # ownership + data version, budgets, category names, one rollup aggregate
+@require_auth
+@conditional_profile_get(scope=current_budget_period)
+def get_budgets(profile_id):
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        # Get budgets for current month by default
+        from datetime import datetime as dt
+        month = request.args.get('month', dt.now().month, type=int)
+        year = request.args.get('year', dt.now().year, type=int)
+        
+        budgets = Budget.query.filter_by(
+            profile_id=profile_id,
+            month=month,
+            year=year
+        ).all()
+        
+        return jsonify(serialize_budgets(budgets)), 200
+    except Exception as e:
+        logger.error(f"Error fetching budgets: {str(e)}")
+        return jsonify({'error': 'Failed to fetch budgets'}), 500
+
+@bp.route('/api/profiles/<int:profile_id>/budgets', methods=['POST'])
+# ownership, category lookup (category budgets), duplicate check, version bump,
+# INSERT, reload for the response, rollup aggregate
+@query_budget(7)
+@require_auth
+def create_budget(profile_id):
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        data = request.get_json()
+        try:
+            amount = parse_amount(data.get('amount', 0))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid amount format'}), 400
+        
+        if amount <= 0:
+            return jsonify({'error': 'Budget amount must be greater than 0'}), 400
+        
+        from datetime import datetime as dt
+        month = data.get('month', dt.now().month)
+        year = data.get('year', dt.now().year)
+        try:
+            month = int(month) if month else None
+            year = int(year)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid budget period'}), 400
+        if month is not None and not 1 <= month <= 12:
+            return jsonify({'error': 'Month must be between 1 and 12'}), 400
+        
+        try:
+            category_id = parse_int_arg(data.get('category_id'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid category'}), 400
+        # The category must be the profile's own; its name is reused for the spent total
+        category_names = None
+        if category_id is not None:
+            category = Category.query.filter_by(id=category_id, profile_id=profile_id).first()
+            if not category:
+                return jsonify({'error': 'Category not found'}), 404
+            category_names = {category.id: category.name}
+        
+        # Check if budget already exists
+        existing = Budget.query.filter_by(
+            profile_id=profile_id,
+            category_id=category_id,
+            month=month,
+            year=year
+        ).first()
+        
+        if existing:
+            return jsonify({'error': 'Budget already exists for this period'}), 400
+        
+        new_budget = Budget(
+            profile_id=profile_id,
+            category_id=category_id,
+            amount=amount,
+            period=data.get('period', 'monthly'),
+            month=month,
+            year=year,
+            alert_threshold=data.get('alert_threshold', 80)
+        )
+        
+        db.session.add(new_budget)
+        bump_profile_version(profile_id)
+        db.session.commit()
+        
+        logger.info(f"Budget created for profile {profile_id}, amount: {amount}")
+        return jsonify(serialize_budgets([new_budget], category_names)[0]), 201
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating budget: {str(e)}")
+        return jsonify({'error': 'Failed to create budget'}), 500
+
+@bp.route('/api/budgets/<int:budget_id>', methods=['PUT'])
+# owned lookup, version bump, UPDATE, reload for the response, category name
+# (category budgets), rollup aggregate
+@query_budget(6)
+@require_auth
+def update_budget(budget_id):
+    try:
+        budget = get_owned(Budget, budget_id)
+        if not budget:
+            return jsonify({'error': 'Budget not found'}), 404
+        
+        data = request.get_json()
+        
+        if 'amount' in data:
+            try:
+                budget.amount = parse_amount(data['amount'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid amount format'}), 400
+        if 'alert_threshold' in data:
+            budget.alert_threshold = int(data['alert_threshold'])
+        
+        bump_profile_version(budget.profile_id)
+        db.session.commit()
+        return jsonify(serialize_budgets([budget])[0]), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error updating budget: {str(e)}")
+        return jsonify({'error': 'Failed to update budget'}), 500
+
+@bp.route('/api/budgets/<int:budget_id>', methods=['DELETE'])
+@query_budget(4)  # owned lookup, version bump, tombstone, DELETE
+@require_auth
+def delete_budget(budget_id):
+    try:
+        budget = get_owned(Budget, budget_id)
+        if not budget:
+            return jsonify({'error': 'Budget not found'}), 404
+        
+        db.session.delete(budget)
+        bump_profile_version(budget.profile_id)
+        db.session.commit()
+        
+        logger.info(f"Budget deleted: {budget_id}")
+        return jsonify({'message': 'Budget deleted successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error deleting budget: {str(e)}")
+        return jsonify({'error': 'Failed to delete budget'}), 500
@@ -0,0 +1,125 @@
+# Category routes
+from flask import Blueprint, jsonify, request
+import logging
+
+from auth import require_auth, sanitize_input
+from extensions import response_cache
+from fast_json import encode_list
+from models import db, Category, bump_profile_version
+from query_budget import query_budget
+from routes.common import (
+    cached_profile_response, category_serializer, conditional_profile_get, fetch_profile_categories, get_owned,
+    json_response, owns_profile
+)
+
+bp = Blueprint('categories', __name__)
+logger = logging.getLogger(__name__)
+
+@bp.route('/api/profiles/<int:profile_id>/categories', methods=['GET'])
+@query_budget(2)  # ownership + data version, the rows (none on a cache hit)
+@require_auth
+@conditional_profile_get()
+@cached_profile_response('categories')
+def get_categories(profile_id):
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        rows = fetch_profile_categories(profile_id)
+        return json_response(encode_list(category_serializer, rows))
+    except Exception as e:
+        logger.error(f"Error fetching categories: {str(e)}")
+        return jsonify({'error': 'Failed to fetch categories'}), 500
+
+@bp.route('/api/profiles/<int:profile_id>/categories', methods=['POST'])
+@query_budget(5)  # ownership, duplicate check, version bump, INSERT, reload for the response
+@require_auth
+def create_category(profile_id):
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        data = request.get_json()
+        name = sanitize_input(data.get('name', ''))
+        cat_type = data.get('type', 'expense')
+        
+        if not name or len(name) < 2:
+            return jsonify({'error': 'Category name must be at least 2 characters'}), 400
+        
+        if cat_type not in ['income', 'expense']:
+            return jsonify({'error': 'Type must be income or expense'}), 400
+        
+        # Check if category already exists
+        existing = Category.query.filter_by(profile_id=profile_id, name=name, type=cat_type).first()
+        if existing:
+            return jsonify({'error': 'Category already exists'}), 400
+        
+        new_category = Category(
+            profile_id=profile_id,
+            name=name,
+            type=cat_type,
+            icon=data.get('icon', '📁'),
+            color=data.get('color', '#6B7280'),
+            is_default=data.get('is_default', False)
+        )
+        
+        db.session.add(new_category)
+        bump_profile_version(profile_id)
+        db.session.commit()
+        response_cache.invalidate(profile_id, 'categories')
+        
+        logger.info(f"Category created: {name} for profile {profile_id}")
+        return jsonify(new_category.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating category: {str(e)}")
+        return jsonify({'error': 'Failed to create category'}), 500
+
+@bp.route('/api/categories/<int:category_id>', methods=['PUT'])
+@query_budget(4)  # owned lookup, version bump, UPDATE, reload for the response
+@require_auth
+def update_category(category_id):
+    try:
+        category = get_owned(Category, category_id)
+        if not category:
+            return jsonify({'error': 'Category not found'}), 404
+        
+        data = request.get_json()
+        
+        if 'name' in data:
+            category.name = sanitize_input(data['name'])
+        if 'icon' in data:
+            category.icon = data['icon']
+        if 'color' in data:
+            category.color = data['color']
+        
+        bump_profile_version(category.profile_id)
+        db.session.commit()
+        response_cache.invalidate(category.profile_id, 'categories')
+        return jsonify(category.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error updating category: {str(e)}")
+        return jsonify({'error': 'Failed to update category'}), 500
+
+@bp.route('/api/categories/<int:category_id>', methods=['DELETE'])
+@query_budget(4)  # owned lookup, version bump, tombstone, DELETE
+@require_auth
+def delete_category(category_id):
+    try:
+        category = get_owned(Category, category_id)
+        if not category:
+            return jsonify({'error': 'Category not found'}), 404
+        
+        profile_id = category.profile_id
+        db.session.delete(category)
+        bump_profile_version(profile_id)
+        db.session.commit()
+        response_cache.invalidate(profile_id, 'categories')
+        
+        logger.info(f"Category deleted: {category_id}")
+        return jsonify({'message': 'Category deleted successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error deleting category: {str(e)}")
+        return jsonify({'error': 'Failed to delete category'}), 500
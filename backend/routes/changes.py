@@ -0,0 +1,116 @@
+# Incremental sync: rows changed or deleted since a client's sync token
+#
+# The token is the profile data version (ProfileVersion). Every write stamps
+# the rows it touches with the version it bumped the profile to, and deletes
+# leave a tombstone carrying that version, so "what changed since N" is a
+# range scan on the (profile_id, version) indexes and costs O(changes).
+# Versions are taken under the ProfileVersion row lock, so unlike timestamps
+# they follow commit order: a client never misses a row committed late.
+from flask import Blueprint, g, jsonify, request
+import logging
+
+from auth import require_auth
+from fast_json import RowSerializer, encode_list, encode_object, encode_scalar, encode_value
+from models import db, Account, Budget, Category, DeletedRecord, Tag, Transaction
+from query_budget import query_budget
+from routes.common import (
+    ACCOUNT_COLUMNS, CATEGORY_COLUMNS, TAG_COLUMNS, TRANSACTION_COLUMNS, account_serializer, category_serializer,
+    conditional_profile_get, encode_transaction_rows, json_response, owns_profile, select_columns, tag_serializer
+)
+
+bp = Blueprint('changes', __name__)
+logger = logging.getLogger(__name__)
+
+# Budgets as stored; spent and the values derived from it depend on
+# transactions, which the client has in full anyway
+BUDGET_COLUMNS = [
+    ('id', Budget.id, 'number'), ('profile_id', Budget.profile_id, 'number'),
+    ('category_id', Budget.category_id, 'number'), ('amount', Budget.amount, 'number'),
+    ('period', Budget.period, 'str'), ('month', Budget.month, 'number'),
+    ('year', Budget.year, 'number'), ('alert_threshold', Budget.alert_threshold, 'number'),
+    ('created_at', Budget.created_at, 'datetime'),
+]
+budget_serializer = RowSerializer([(key, kind) for key, _, kind in BUDGET_COLUMNS])
+
+# Response key, model, column spec and serializer for each synced entity
+SYNCED_ENTITIES = [
+    ('categories', Category, CATEGORY_COLUMNS, category_serializer),
+    ('tags', Tag, TAG_COLUMNS, tag_serializer),
+    ('accounts', Account, ACCOUNT_COLUMNS, account_serializer),
+    ('budgets', Budget, BUDGET_COLUMNS, budget_serializer),
+]
+
+def parse_since(value):
+    """Parse ?since=; 0 when absent. Raises ValueError for anything but a non-negative integer"""
+    if value is None or value == '':
+        return 0
+    since = int(value)
+    if since < 0:
+        raise ValueError(value)
+    return since
+
+def since_scope():
+    # The body depends on ?since as well as the data version
+    try:
+        return f'since{parse_since(request.args.get("since"))}'
+    except ValueError:
+        return 'since-invalid'
+
+def changed_rows(model, spec, profile_id, since, token):
+    query = select_columns(spec).where(model.profile_id == profile_id, model.version <= token)
+    if since:
+        query = query.where(model.version > since)
+    return db.session.execute(query.order_by(model.version, model.id)).all()
+
+@bp.route('/api/profiles/<int:profile_id>/changes', methods=['GET'])
+# ownership + data version, transactions, their tags (skipped without rows),
+# categories, tags, accounts, budgets, tombstones (skipped on a reset)
+@query_budget(8)
+@require_auth
+@conditional_profile_get(scope=since_scope)
+def get_changes(profile_id):
+    """
+    Rows created, updated or deleted after ?since=<token>, and the next token
+    Without a token (or with one from a reset database) the response is a
+    full snapshot with reset: true. Clients apply deleted before the rows
+    """
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found or access denied'}), 404
+
+        try:
+            since = parse_since(request.args.get('since'))
+        except ValueError:
+            return jsonify({'error': 'Invalid sync token'}), 400
+
+        token = g.profile_versions[profile_id]
+        reset = since == 0 or since > token
+        if reset:
+            since = 0
+
+        members = {
+            'token': encode_scalar(token),
+            'reset': encode_scalar(reset),
+            'transactions': encode_transaction_rows(
+                changed_rows(Transaction, TRANSACTION_COLUMNS, profile_id, since, token)
+            ),
+        }
+        for key, model, spec, serializer in SYNCED_ENTITIES:
+            members[key] = encode_list(serializer, changed_rows(model, spec, profile_id, since, token))
+
+        deleted = {}
+        if not reset:
+            tombstones = db.session.execute(
+                db.select(DeletedRecord.entity, DeletedRecord.entity_id)
+                .where(DeletedRecord.profile_id == profile_id,
+                       DeletedRecord.version > since, DeletedRecord.version <= token)
+                .order_by(DeletedRecord.version, DeletedRecord.id)
+            ).all()
+            for entity, entity_id in tombstones:
+                deleted.setdefault(entity, []).append(entity_id)
+        members['deleted'] = encode_value(deleted)
+
+        return json_response(encode_object(members))
+    except Exception as e:
+        logger.error(f"Error fetching changes for profile {profile_id}: {str(e)}")
+        return jsonify({'error': 'Failed to fetch changes'}), 500
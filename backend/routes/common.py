@@ -0,0 +1,238 @@
+# Helpers shared by the API blueprints: ownership checks, conditional GETs,
+# the response cache decorator and the column-tuple read path
+from flask import current_app, g, jsonify, request
+from datetime import datetime
+from functools import wraps
+import math
+
+from auth import current_user_id
+from extensions import ownership_cache, response_cache
+from fast_json import RowSerializer, encode_list, encode_object, encode_scalar
+from models import (
+    db, Account, Category, Profile, ProfileVersion, Tag, Transaction, bump_profile_version, transaction_tags
+)
+from pagination import encode_cursor
+
+# Authorization helpers
+def owns_profile(profile_id):
+    """
+    True if the current user owns profile_id
+    Answered once per request; with OWNERSHIP_CACHE_TTL set it is usually
+    served from the per-worker cache without a query
+    """
+    checked = g.setdefault('owned_profiles', {})
+    if profile_id in checked:
+        return checked[profile_id]
+
+    user_id = current_user_id()
+    if ownership_cache.enabled:
+        profile_ids = ownership_cache.get(user_id)
+        if profile_ids is None:
+            profile_ids = [row[0] for row in db.session.query(Profile.id).filter(Profile.user_id == user_id)]
+            ownership_cache.set(user_id, profile_ids)
+        owned = profile_id in profile_ids
+    else:
+        owned = db.session.query(Profile.id).filter_by(id=profile_id, user_id=user_id).first() is not None
+
+    checked[profile_id] = owned
+    return owned
+
+def profile_etag(profile_id, version, scope=None):
+    tag = f'p{profile_id}-v{version}'
+    return f'{tag}-{scope}' if scope else tag
+
+def conditional_profile_get(scope=None):
+    """
+    Decorator for profile-scoped GET routes
+    Reads the profile's data version together with the ownership check in one
+    primary-key lookup, answers 304 when If-None-Match already carries that
+    version and otherwise tags the view's 200 response with a weak ETag
+    scope: optional callable adding request-dependent state the data version
+    does not cover (e.g. a default that depends on today's date)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(profile_id, *args, **kwargs):
+            row = db.session.execute(
+                db.select(Profile.id, ProfileVersion.version)
+                .outerjoin(ProfileVersion, ProfileVersion.profile_id == Profile.id)
+                .where(Profile.id == profile_id, Profile.user_id == current_user_id())
+            ).first()
+            g.setdefault('owned_profiles', {})[profile_id] = row is not None
+            if row is None:
+                return jsonify({'error': 'Profile not found or access denied'}), 404
+
+            g.setdefault('profile_versions', {})[profile_id] = row.version or 0
+            etag = profile_etag(profile_id, row.version or 0, scope() if scope else None)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(f(profile_id, *args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            # Let the browser keep the body but revalidate it on every use
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
+
+def get_owned(model, object_id):
+    """
+    Load a profile-scoped object (category, tag, account, budget, transaction)
+    only if it belongs to the current user, in one joined query
+    """
+    return model.query.join(Profile, Profile.id == model.profile_id).filter(
+        model.id == object_id,
+        Profile.user_id == current_user_id()
+    ).first()
+
+def cached_profile_response(endpoint):
+    """
+    Decorator serving a profile-scoped GET from response_cache
+    Must sit below @conditional_profile_get(), which resolves the data
+    version the entries are validated against
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(profile_id, *args, **kwargs):
+            version = g.profile_versions[profile_id]
+            if response_cache.enabled:
+                body = response_cache.get(profile_id, endpoint, request.args, version)
+                if body is not None:
+                    return json_response(body)
+
+            response = current_app.make_response(f(profile_id, *args, **kwargs))
+            if response_cache.enabled and response.status_code == 200:
+                # Stored without jsonify's trailing newline, which json_response adds back
+                response_cache.set(profile_id, endpoint, request.args, version,
+                                   response.get_data(as_text=True)[:-1])
+            return response
+        return decorated_function
+    return decorator
+
+# Column-tuple read path
+# List endpoints select only these columns and encode them with a
+# precompiled serializer, skipping ORM hydration and to_dict(). The output
+# matches jsonify([obj.to_dict() ...]) byte for byte.
+CATEGORY_COLUMNS = [
+    ('id', Category.id, 'number'), ('profile_id', Category.profile_id, 'number'),
+    ('name', Category.name, 'str'), ('type', Category.type, 'str'),
+    ('icon', Category.icon, 'str'), ('color', Category.color, 'str'),
+    ('is_default', Category.is_default, 'bool'), ('created_at', Category.created_at, 'datetime'),
+]
+TAG_COLUMNS = [
+    ('id', Tag.id, 'number'), ('profile_id', Tag.profile_id, 'number'),
+    ('name', Tag.name, 'str'), ('color', Tag.color, 'str'),
+    ('created_at', Tag.created_at, 'datetime'),
+]
+ACCOUNT_COLUMNS = [
+    ('id', Account.id, 'number'), ('profile_id', Account.profile_id, 'number'),
+    ('name', Account.name, 'str'), ('type', Account.type, 'str'),
+    ('balance', Account.balance, 'number'), ('currency', Account.currency, 'str'),
+    ('icon', Account.icon, 'str'), ('color', Account.color, 'str'),
+    ('is_active', Account.is_active, 'bool'), ('created_at', Account.created_at, 'datetime'),
+]
+TRANSACTION_COLUMNS = [
+    ('id', Transaction.id, 'number'), ('profile_id', Transaction.profile_id, 'number'),
+    ('category_id', Transaction.category_id, 'number'), ('account_id', Transaction.account_id, 'number'),
+    ('type', Transaction.type, 'str'), ('amount', Transaction.amount, 'number'),
+    ('category', Transaction.category, 'str'), ('description', Transaction.description, 'str'),
+    ('date', Transaction.date, 'date'), ('created_at', Transaction.created_at, 'datetime'),
+]
+
+category_serializer = RowSerializer([(key, kind) for key, _, kind in CATEGORY_COLUMNS])
+tag_serializer = RowSerializer([(key, kind) for key, _, kind in TAG_COLUMNS])
+account_serializer = RowSerializer([(key, kind) for key, _, kind in ACCOUNT_COLUMNS])
+# Transactions carry their tags as a pre-encoded JSON array in the last slot
+transaction_serializer = RowSerializer(
+    [(key, kind) for key, _, kind in TRANSACTION_COLUMNS] + [('tags', 'raw')]
+)
+
+def select_columns(spec):
+    return db.select(*[column for _, column, _ in spec])
+
+def json_response(body, status=200):
+    """Response for an already-encoded JSON body, formatted like jsonify()"""
+    return current_app.response_class(body + '\n', status=status, mimetype='application/json')
+
+def encode_transaction_rows(rows):
+    """Attach each row's tags (one query per page) and encode the list"""
+    encoded_tags = {}
+    if rows:
+        tag_rows = db.session.execute(
+            select_columns(TAG_COLUMNS).add_columns(transaction_tags.c.transaction_id)
+            .join(transaction_tags, transaction_tags.c.tag_id == Tag.id)
+            .where(transaction_tags.c.transaction_id.in_([row.id for row in rows]))
+            .order_by(transaction_tags.c.transaction_id, Tag.id)
+        ).all()
+        grouped = {}
+        for tag_row in tag_rows:
+            grouped.setdefault(tag_row[-1], []).append(tag_row)
+        encoded_tags = {tx_id: tag_serializer.encode_rows(tags) for tx_id, tags in grouped.items()}
+    return encode_list(transaction_serializer, [tuple(row) + (encoded_tags.get(row.id, '[]'),) for row in rows])
+
+def encode_transaction_page(query, limit):
+    """
+    Run a transaction listing query for one keyset page
+    Returns the encoded {transactions, next_cursor, has_more} object
+    """
+    rows = db.session.execute(query.order_by(
+        Transaction.date.desc(), Transaction.created_at.desc(), Transaction.id.desc()
+    ).limit(limit + 1)).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.date, last.created_at, last.id)
+
+    return encode_object({
+        'transactions': encode_transaction_rows(rows),
+        'next_cursor': encode_scalar(next_cursor),
+        'has_more': encode_scalar(has_more)
+    })
+
+def fetch_profile_categories(profile_id):
+    return db.session.execute(
+        select_columns(CATEGORY_COLUMNS).where(Category.profile_id == profile_id).order_by(Category.name)
+    ).all()
+
+def fetch_profile_tags(profile_id):
+    return db.session.execute(
+        select_columns(TAG_COLUMNS).where(Tag.profile_id == profile_id).order_by(Tag.name)
+    ).all()
+
+def fetch_profile_accounts(profile_id):
+    return db.session.execute(
+        select_columns(ACCOUNT_COLUMNS).where(Account.profile_id == profile_id).order_by(Account.name)
+    ).all()
+
+def adjust_account_balance(profile_id, account_id, delta):
+    """Apply a balance delta with a single UPDATE, scoped to the profile"""
+    db.session.execute(
+        db.update(Account).where(Account.id == account_id, Account.profile_id == profile_id)
+        .values(balance=Account.balance + delta, version=bump_profile_version(profile_id),
+                updated_at=datetime.utcnow())
+    )
+
+# Query string parsing
+def parse_date_arg(value):
+    """Parse an optional YYYY-MM-DD query argument"""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def parse_int_arg(value):
+    """Parse an optional integer query argument"""
+    if value is None or value == '':
+        return None
+    return int(value)
+
+def parse_amount(value):
+    """Parse a money amount; inf and nan raise ValueError, as they are not valid JSON"""
+    amount = float(value)
+    if not math.isfinite(amount):
+        raise ValueError(f'Amount must be finite: {value}')
+    return amount
@@ -0,0 +1,171 @@
+# Profile routes
+from flask import Blueprint, g, jsonify, request
+from datetime import datetime
+import logging
+
+from auth import require_auth, current_user_id, sanitize_input
+from extensions import ownership_cache, response_cache
+from fast_json import encode_list, encode_object, encode_value
+from models import (
+    db, Budget, DeletedRecord, MonthlyRollup, Profile, Transaction, bump_profile_version, current_budget_period,
+    serialize_budgets
+)
+from pagination import parse_page_size
+from query_budget import query_budget
+from routes.common import (
+    TRANSACTION_COLUMNS, account_serializer, category_serializer, conditional_profile_get, encode_transaction_page,
+    fetch_profile_accounts, fetch_profile_categories, fetch_profile_tags, json_response, owns_profile,
+    select_columns, tag_serializer
+)
+from routes.reports import compute_summary
+
+bp = Blueprint('profiles', __name__)
+logger = logging.getLogger(__name__)
+
+@bp.route('/api/profiles', methods=['GET'])
+@query_budget(1)  # the user's profiles
+@require_auth
+def get_profiles():
+    profiles = Profile.query.filter_by(user_id=current_user_id()).order_by(Profile.created_at.desc()).all()
+    return jsonify([profile.to_dict() for profile in profiles]), 200
+
+@bp.route('/api/profiles', methods=['POST'])
+@require_auth
+def create_profile():
+    user_id = current_user_id()
+    
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        name = sanitize_input(data.get('name', ''))
+
+        if not name or len(name.strip()) == 0:
+            return jsonify({'error': 'Profile name is required'}), 400
+        
+        if len(name) > 100:
+            return jsonify({'error': 'Profile name is too long (max 100 characters)'}), 400
+
+        new_profile = Profile(name=name, user_id=user_id)
+        db.session.add(new_profile)
+        db.session.commit()
+        ownership_cache.invalidate(user_id)
+
+        logger.info(f"Profile created: {name} for user {user_id}")
+        return jsonify(new_profile.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating profile: {str(e)}")
+        return jsonify({'error': 'Failed to create profile'}), 500
+
+@bp.route('/api/profiles/<int:profile_id>', methods=['DELETE'])
+# owned lookup, DELETE rollups and tombstones, version bump; the transaction
+# cascade loads them and their tags, then DELETEs links, transactions and the
+# profile (each skipped when there is nothing to delete)
+@query_budget(9)
+@require_auth
+def delete_profile(profile_id):
+    user_id = current_user_id()
+    
+    try:
+        # Optimized query with ownership check
+        profile = Profile.query.filter_by(id=profile_id, user_id=user_id).first()
+        
+        if not profile:
+            return jsonify({'error': 'Profile not found or access denied'}), 404
+
+        MonthlyRollup.query.filter_by(profile_id=profile_id).delete(synchronize_session=False)
+        DeletedRecord.query.filter_by(profile_id=profile_id).delete(synchronize_session=False)
+        db.session.delete(profile)
+        bump_profile_version(profile_id)
+        db.session.commit()
+        response_cache.invalidate(profile_id, 'categories', 'tags', 'accounts')
+        ownership_cache.invalidate(user_id)
+
+        logger.info(f"Profile deleted: {profile_id} by user {user_id}")
+        return jsonify({'message': 'Profile deleted successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error deleting profile: {str(e)}")
+        return jsonify({'error': 'Failed to delete profile'}), 500
+
+# Dashboard bootstrap
+BOOTSTRAP_SECTIONS = ('transactions', 'summary', 'categories', 'tags', 'accounts', 'budgets')
+# Statements each section issues at most
+BOOTSTRAP_SECTION_STATEMENTS = {
+    'transactions': 2,  # first page, its tags
+    'summary': 2,       # rollup totals, monthly series
+    'categories': 1,
+    'tags': 1,
+    'accounts': 1,
+    'budgets': 3,       # budgets, category names, rollup aggregate
+}
+
+def parse_bootstrap_sections(value):
+    """
+    Parse ?include=a,b; all sections when absent
+    Returns (sections, error_message)
+    """
+    if not value:
+        return BOOTSTRAP_SECTIONS, None
+    sections = [section.strip() for section in value.split(',') if section.strip()]
+    unknown = [section for section in sections if section not in BOOTSTRAP_SECTIONS]
+    if unknown or not sections:
+        return None, f"include must be a comma-separated subset of: {', '.join(BOOTSTRAP_SECTIONS)}"
+    return sections, None
+
+def bootstrap_query_budget():
+    """The ownership/version lookup plus each included section; budgets reuse loaded category names"""
+    sections = g.get('bootstrap_sections', ())
+    statements = 1 + sum(BOOTSTRAP_SECTION_STATEMENTS[section] for section in sections)
+    if 'budgets' in sections and 'categories' in sections:
+        statements -= 1
+    return statements
+
+@bp.route('/api/profiles/<int:profile_id>/bootstrap', methods=['GET'])
+@query_budget(bootstrap_query_budget)
+@require_auth
+@conditional_profile_get(scope=current_budget_period)
+def get_profile_bootstrap(profile_id):
+    """
+    Everything a profile's dashboard needs for first paint, in one response
+    Each section is what its own endpoint returns by default (transactions:
+    the first page, ?limit sized; budgets: the current month), behind a
+    single ownership check
+    """
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found or access denied'}), 404
+
+        sections, error = parse_bootstrap_sections(request.args.get('include'))
+        if error:
+            return jsonify({'error': error}), 400
+        g.bootstrap_sections = sections
+
+        members = {}
+        category_rows = None
+        if 'transactions' in sections:
+            members['transactions'] = encode_transaction_page(
+                select_columns(TRANSACTION_COLUMNS).where(Transaction.profile_id == profile_id),
+                parse_page_size(request.args.get('limit'))
+            )
+        if 'summary' in sections:
+            members['summary'] = encode_value(compute_summary(profile_id))
+        if 'categories' in sections:
+            category_rows = fetch_profile_categories(profile_id)
+            members['categories'] = encode_list(category_serializer, category_rows)
+        if 'tags' in sections:
+            members['tags'] = encode_list(tag_serializer, fetch_profile_tags(profile_id))
+        if 'accounts' in sections:
+            members['accounts'] = encode_list(account_serializer, fetch_profile_accounts(profile_id))
+        if 'budgets' in sections:
+            now = datetime.now()
+            budgets = Budget.query.filter_by(profile_id=profile_id, month=now.month, year=now.year).all()
+            category_names = {row.id: row.name for row in category_rows} if category_rows is not None else None
+            members['budgets'] = encode_value(serialize_budgets(budgets, category_names))
+
+        return json_response(encode_object(members))
+    except Exception as e:
+        logger.error(f"Error building bootstrap for profile {profile_id}: {str(e)}")
+        return jsonify({'error': 'Failed to load profile data'}), 500
@@ -0,0 +1,218 @@
+# Summary and export routes
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from datetime import timedelta
+import logging
+
+from auth import require_auth, current_user_id
+from models import db, MonthlyRollup, Tag, Transaction, transaction_tags
+from query_budget import query_budget
+from rate_limit import rate_limit
+from routes.common import conditional_profile_get, owns_profile, parse_date_arg
+from streaming import EXPORT_FORMATS, encode_stream
+
+bp = Blueprint('reports', __name__)
+logger = logging.getLogger(__name__)
+
+# Summary Routes
+SUMMARY_BUCKETS = ['day', 'week', 'month']
+
+def summary_bucket_expression(bucket):
+    """
+    SQL expression truncating Transaction.date to the start of its bucket
+    Weeks start on Monday on both backends
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return db.cast(db.func.date_trunc(bucket, Transaction.date), db.Date)
+    if bucket == 'day':
+        return db.func.date(Transaction.date)
+    if bucket == 'week':
+        return db.func.date(Transaction.date, 'weekday 0', '-6 days')
+    return db.func.strftime('%Y-%m-01', Transaction.date)
+
+def is_month_aligned(date_from, date_to):
+    """True when a range can be answered from monthly_rollups alone"""
+    if date_from and date_from.day != 1:
+        return False
+    if date_to and (date_to + timedelta(days=1)).day != 1:
+        return False
+    return True
+
+def rollup_range_filters(profile_id, date_from, date_to):
+    filters = [MonthlyRollup.profile_id == profile_id]
+    period = MonthlyRollup.year * 100 + MonthlyRollup.month
+    if date_from:
+        filters.append(period >= date_from.year * 100 + date_from.month)
+    if date_to:
+        filters.append(period <= date_to.year * 100 + date_to.month)
+    return filters
+
+def compute_summary(profile_id, date_from=None, date_to=None, bucket='month'):
+    """
+    Totals, per-category breakdown and a bucketed income/expense series
+    Month-aligned ranges are served from monthly_rollups; anything else falls
+    back to GROUP BY over the transactions date index
+    """
+    use_rollups = is_month_aligned(date_from, date_to)
+
+    if use_rollups:
+        grouped = db.session.query(
+            MonthlyRollup.category, MonthlyRollup.type,
+            db.func.sum(MonthlyRollup.tx_count), db.func.sum(MonthlyRollup.total)
+        ).filter(*rollup_range_filters(profile_id, date_from, date_to)).group_by(
+            MonthlyRollup.category, MonthlyRollup.type
+        ).all()
+    else:
+        filters = [Transaction.profile_id == profile_id]
+        if date_from:
+            filters.append(Transaction.date >= date_from)
+        if date_to:
+            filters.append(Transaction.date <= date_to)
+        grouped = db.session.query(
+            Transaction.category, Transaction.type,
+            db.func.count(Transaction.id), db.func.sum(Transaction.amount)
+        ).filter(*filters).group_by(Transaction.category, Transaction.type).all()
+
+    totals = {'income': 0, 'expense': 0, 'count': 0}
+    categories = {}
+    for category, tx_type, count, amount in grouped:
+        if not count:
+            continue
+        amount = amount or 0
+        totals[tx_type] += amount
+        totals['count'] += count
+        entry = categories.setdefault(category, {'category': category, 'income': 0, 'expense': 0})
+        entry[tx_type] += amount
+    totals['balance'] = totals['income'] - totals['expense']
+
+    if use_rollups and bucket == 'month':
+        period = db.session.query(
+            MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.type, db.func.sum(MonthlyRollup.total)
+        ).filter(*rollup_range_filters(profile_id, date_from, date_to)).group_by(
+            MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.type
+        ).all()
+        rows = [(f"{year:04d}-{month:02d}-01", tx_type, amount) for year, month, tx_type, amount in period]
+    else:
+        bucket_start = summary_bucket_expression(bucket)
+        filters = [Transaction.profile_id == profile_id]
+        if date_from:
+            filters.append(Transaction.date >= date_from)
+        if date_to:
+            filters.append(Transaction.date <= date_to)
+        period = db.session.query(
+            bucket_start, Transaction.type, db.func.sum(Transaction.amount)
+        ).filter(*filters).group_by(bucket_start, Transaction.type).all()
+        rows = [(start if isinstance(start, str) else start.isoformat(), tx_type, amount)
+                for start, tx_type, amount in period]
+
+    series = {}
+    for start, tx_type, amount in rows:
+        entry = series.setdefault(start, {'period': start, 'income': 0, 'expense': 0})
+        entry[tx_type] += amount or 0
+
+    return {
+        'from': date_from.isoformat() if date_from else None,
+        'to': date_to.isoformat() if date_to else None,
+        'bucket': bucket,
+        'totals': totals,
+        'categories': sorted(categories.values(), key=lambda c: c['category']),
+        'series': [series[key] for key in sorted(series)]
+    }
+
+@bp.route('/api/profiles/<int:profile_id>/summary', methods=['GET'])
+@query_budget(3)  # ownership + data version, category totals, the series
+@require_auth
+@conditional_profile_get()
+def get_summary(profile_id):
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found or access denied'}), 404
+
+        try:
+            date_from = parse_date_arg(request.args.get('from'))
+            date_to = parse_date_arg(request.args.get('to'))
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+        bucket = request.args.get('bucket', 'month')
+        if bucket not in SUMMARY_BUCKETS:
+            return jsonify({'error': 'Bucket must be day, week or month'}), 400
+
+        return jsonify(compute_summary(profile_id, date_from, date_to, bucket)), 200
+    except Exception as e:
+        logger.error(f"Error computing summary: {str(e)}")
+        return jsonify({'error': 'Failed to compute summary'}), 500
+
+# Export Routes
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = [
+    'id', 'date', 'type', 'amount', 'category', 'category_id',
+    'account_id', 'description', 'tags', 'created_at'
+]
+
+def iter_transaction_export_batches(profile_id, join_tags):
+    """
+    Yield a profile's transactions as lists of row lists, one batch at a time
+    Rows come from a yield_per cursor and tags are fetched once per batch,
+    so memory is bounded by EXPORT_BATCH_SIZE rather than the profile size
+    """
+    query = db.select(
+        Transaction.id, Transaction.date, Transaction.type, Transaction.amount,
+        Transaction.category, Transaction.category_id, Transaction.account_id,
+        Transaction.description, Transaction.created_at
+    ).where(Transaction.profile_id == profile_id).order_by(Transaction.date, Transaction.id)
+
+    try:
+        result = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            tags = {}
+            tag_rows = db.session.execute(
+                db.select(transaction_tags.c.transaction_id, Tag.name)
+                .join(Tag, Tag.id == transaction_tags.c.tag_id)
+                .where(transaction_tags.c.transaction_id.in_([row.id for row in partition]))
+            )
+            for transaction_id, name in tag_rows:
+                tags.setdefault(transaction_id, []).append(name)
+
+            batch = []
+            for row in partition:
+                row_tags = tags.get(row.id, [])
+                batch.append([
+                    row.id,
+                    row.date.isoformat(),
+                    row.type,
+                    row.amount,
+                    row.category,
+                    row.category_id,
+                    row.account_id,
+                    row.description or '',
+                    ';'.join(row_tags) if join_tags else row_tags,
+                    row.created_at.isoformat() if row.created_at else None
+                ])
+            yield batch
+    except Exception as e:
+        # Headers are already sent at this point; all we can do is log and cut the stream
+        logger.error(f"Error streaming export for profile {profile_id}: {str(e)}")
+        raise
+
+@bp.route('/api/profiles/<int:profile_id>/export', methods=['GET'])
+@query_budget(1)  # ownership; the rows stream after the response starts, outside the budget
+@require_auth
+@rate_limit(30, 3600, key=current_user_id)
+def export_profile(profile_id):
+    if not owns_profile(profile_id):
+        return jsonify({'error': 'Profile not found or access denied'}), 404
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Format must be csv or jsonl'}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    filename = f"profile_{profile_id}_transactions.{extension}" + ('.gz' if compress else '')
+    batches = iter_transaction_export_batches(profile_id, join_tags=export_format == 'csv')
+    body = encode_stream(export_format, EXPORT_COLUMNS, batches, compress=compress)
+
+    logger.info(f"Export started: {export_format} for profile {profile_id}")
+    response = Response(stream_with_context(body), mimetype='application/gzip' if compress else mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,106 @@
+# Root, health, metrics and API docs routes, plus the JSON error handlers
+from flask import Blueprint, Response, current_app, jsonify, request
+from sqlalchemy import text
+import logging
+
+from db_routing import primary_only
+from extensions import analytics_cache, request_metrics, response_cache
+from metrics import render_cache_metrics, render_prometheus
+from models import db
+from query_budget import query_budget
+
+bp = Blueprint('system', __name__)
+logger = logging.getLogger(__name__)
+
+# Root endpoint
+@bp.route('/', methods=['GET'])
+def root():
+    return jsonify({
+        'message': 'Finance Tracker API',
+        'status': 'running',
+        'version': '2.0.0',
+        'endpoints': {
+            'health': '/api/health',
+            'api_base': '/api',
+            'docs': '/api/docs'
+        }
+    }), 200
+
+# Health check endpoint
+@bp.route('/api/health', methods=['GET'])
+@query_budget(1)  # SELECT 1
+@primary_only
+def health():
+    try:
+        # Check database connection
+        db.session.execute(text('SELECT 1'))
+        db_status = 'connected'
+    except Exception as e:
+        logger.error(f"Database health check failed: {str(e)}")
+        db_status = 'disconnected'
+    
+    return jsonify({
+        'status': 'ok' if db_status == 'connected' else 'degraded',
+        'database': db_status,
+        'version': '2.0.0'
+    }), 200
+
+# Metrics endpoint (Prometheus text format, merged across workers)
+@bp.route('/api/metrics', methods=['GET'])
+@query_budget(0)  # in-process counters only
+def get_metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if not token and current_app.config['METRICS_REQUIRE_TOKEN']:
+        return jsonify({'error': 'Metrics are disabled until METRICS_TOKEN is set'}), 403
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Authentication required'}), 401
+    body = render_prometheus(request_metrics.collect())
+    body += render_cache_metrics(response_cache.stats(), analytics_cache.report())
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+# API Documentation endpoint
+@bp.route('/api/docs', methods=['GET'])
+def api_docs():
+    return jsonify({
+        'version': '2.0.0',
+        'endpoints': {
+            'auth': {
+                'POST /api/register': 'Register a new user',
+                'POST /api/login': 'Login user',
+                'POST /api/logout': 'Logout user (requires auth)',
+                'GET /api/check-auth': 'Check authentication status'
+            },
+            'profiles': {
+                'GET /api/profiles': 'Get all profiles for current user (requires auth)',
+                'POST /api/profiles': 'Create new profile (requires auth)',
+                'DELETE /api/profiles/<id>': 'Delete profile (requires auth)'
+            },
+            'transactions': {
+                'GET /api/profiles/<id>/transactions': 'Get a page of transactions for profile (requires auth). Query: cursor, limit, from, to, type, category, category_id, account_id, tag, tag_id, min_amount, max_amount',
+                'POST /api/profiles/<id>/transactions': 'Create new transaction (requires auth)',
+                'POST /api/profiles/<id>/transactions/bulk': 'Import many transactions from a JSON array or CSV upload (requires auth)',
+                'DELETE /api/transactions/<id>': 'Delete transaction (requires auth)',
+                'GET /api/profiles/<id>/summary': 'Totals, category breakdown and time series (requires auth). Query: from, to, bucket=day|week|month',
+                'GET /api/profiles/<id>/export': 'Stream all transactions for profile (requires auth). Query: format=csv|jsonl, gzip'
+            },
+            'analytics': {
+                'GET /api/profiles/<id>/analytics/rolling': 'Daily totals with a trailing average (requires auth). Query: window, from, to',
+                'GET /api/profiles/<id>/analytics/category-trends': 'Monthly totals and trend per category (requires auth). Query: months, month=YYYY-MM',
+                'GET /api/profiles/<id>/analytics/year-over-year': 'Monthly totals per year with the yearly change (requires auth)',
+                'GET /api/profiles/<id>/analytics/percentiles': 'Transaction amount percentiles, overall and per category (requires auth). Query: p, from, to',
+                'GET /api/profiles/<id>/analytics/movers': 'Categories with the largest change between two periods (requires auth). Query: days, to, limit',
+                'Every analytics report': 'Query: type=expense|income (default expense), account_id'
+            }
+        }
+    }), 200
+
+# Error handlers
+@bp.app_errorhandler(404)
+def not_found(error):
+    return jsonify({'error': 'Resource not found'}), 404
+
+@bp.app_errorhandler(500)
+def internal_error(error):
+    db.session.rollback()
+    logger.error(f"Internal server error: {str(error)}")
+    return jsonify({'error': 'Internal server error'}), 500
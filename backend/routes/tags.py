@@ -0,0 +1,93 @@
+# Tag routes
+from flask import Blueprint, jsonify, request
+import logging
+
+from auth import require_auth, sanitize_input
+from extensions import response_cache
+from fast_json import encode_list
+from models import db, Tag, bump_profile_version
+from query_budget import query_budget
+from routes.common import (
+    cached_profile_response, conditional_profile_get, fetch_profile_tags, get_owned, json_response, owns_profile,
+    tag_serializer
+)
+
+bp = Blueprint('tags', __name__)
+logger = logging.getLogger(__name__)
+
+@bp.route('/api/profiles/<int:profile_id>/tags', methods=['GET'])
+@query_budget(2)  # ownership + data version, the rows (none on a cache hit)
+@require_auth
+@conditional_profile_get()
+@cached_profile_response('tags')
+def get_tags(profile_id):
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        rows = fetch_profile_tags(profile_id)
+        return json_response(encode_list(tag_serializer, rows))
+    except Exception as e:
+        logger.error(f"Error fetching tags: {str(e)}")
+        return jsonify({'error': 'Failed to fetch tags'}), 500
+
+@bp.route('/api/profiles/<int:profile_id>/tags', methods=['POST'])
+@query_budget(5)  # ownership, duplicate check, version bump, INSERT, reload for the response
+@require_auth
+def create_tag(profile_id):
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        data = request.get_json()
+        name = sanitize_input(data.get('name', ''))
+        
+        if not name or len(name) < 2:
+            return jsonify({'error': 'Tag name must be at least 2 characters'}), 400
+        
+        # Check if tag already exists
+        existing = Tag.query.filter_by(profile_id=profile_id, name=name).first()
+        if existing:
+            return jsonify({'error': 'Tag already exists'}), 400
+        
+        new_tag = Tag(
+            profile_id=profile_id,
+            name=name,
+            color=data.get('color', '#3B82F6')
+        )
+        
+        db.session.add(new_tag)
+        bump_profile_version(profile_id)
+        db.session.commit()
+        response_cache.invalidate(profile_id, 'tags')
+        
+        logger.info(f"Tag created: {name} for profile {profile_id}")
+        return jsonify(new_tag.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating tag: {str(e)}")
+        return jsonify({'error': 'Failed to create tag'}), 500
+
+@bp.route('/api/tags/<int:tag_id>', methods=['DELETE'])
+# owned lookup, version bump, re-stamp the tagged transactions, load and
+# DELETE their links (both skipped without any), tombstone, DELETE
+@query_budget(7)
+@require_auth
+def delete_tag(tag_id):
+    try:
+        tag = get_owned(Tag, tag_id)
+        if not tag:
+            return jsonify({'error': 'Tag not found'}), 404
+        
+        profile_id = tag.profile_id
+        db.session.delete(tag)
+        bump_profile_version(profile_id)
+        db.session.commit()
+        response_cache.invalidate(profile_id, 'tags')
+        
+        logger.info(f"Tag deleted: {tag_id}")
+        return jsonify({'message': 'Tag deleted successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error deleting tag: {str(e)}")
+        return jsonify({'error': 'Failed to delete tag'}), 500
@@ -0,0 +1,421 @@
+# Transaction routes, including bulk import
+from flask import Blueprint, g, jsonify, request
+from datetime import datetime
+import csv
+import io
+import itertools
+import logging
+
+from auth import require_auth, current_user_id, sanitize_input, validate_transaction_data
+from extensions import response_cache
+from models import (
+    db, Account, Category, Tag, Transaction, transaction_tags,
+    add_rollup_delta, apply_rollup_deltas, bump_profile_version, copy_into, record_transaction_rollup
+)
+from pagination import decode_cursor, parse_page_size, InvalidCursor
+from query_budget import query_budget
+from rate_limit import rate_limit
+from routes.common import (
+    TRANSACTION_COLUMNS, adjust_account_balance, conditional_profile_get, encode_transaction_page,
+    get_owned, json_response, owns_profile, parse_int_arg, parse_date_arg, select_columns
+)
+
+bp = Blueprint('transactions', __name__)
+logger = logging.getLogger(__name__)
+
+def apply_transaction_filters(query, args):
+    """
+    Apply the listing filters from the query string
+    Returns (query, error_message)
+    """
+    try:
+        date_from = parse_date_arg(args.get('from'))
+        date_to = parse_date_arg(args.get('to'))
+    except ValueError:
+        return query, 'Invalid date format. Use YYYY-MM-DD'
+    if date_from:
+        query = query.filter(Transaction.date >= date_from)
+    if date_to:
+        query = query.filter(Transaction.date <= date_to)
+
+    transaction_type = args.get('type')
+    if transaction_type:
+        if transaction_type not in ['income', 'expense']:
+            return query, 'Type must be either "income" or "expense"'
+        query = query.filter(Transaction.type == transaction_type)
+
+    category = args.get('category')
+    if category:
+        query = query.filter(Transaction.category == sanitize_input(category))
+
+    try:
+        category_id = parse_int_arg(args.get('category_id'))
+        account_id = parse_int_arg(args.get('account_id'))
+        tag_id = parse_int_arg(args.get('tag_id'))
+        min_amount = float(args['min_amount']) if args.get('min_amount') else None
+        max_amount = float(args['max_amount']) if args.get('max_amount') else None
+    except ValueError:
+        return query, 'Invalid numeric filter'
+
+    if category_id is not None:
+        query = query.filter(Transaction.category_id == category_id)
+    if account_id is not None:
+        query = query.filter(Transaction.account_id == account_id)
+    if min_amount is not None:
+        query = query.filter(Transaction.amount >= min_amount)
+    if max_amount is not None:
+        query = query.filter(Transaction.amount <= max_amount)
+
+    # Tag filters use EXISTS on transaction_tags rather than a join,
+    # so a transaction never appears twice on a page
+    if tag_id is not None:
+        query = query.filter(Transaction.tags.any(Tag.id == tag_id))
+    tag_name = args.get('tag')
+    if tag_name:
+        query = query.filter(Transaction.tags.any(Tag.name == sanitize_input(tag_name)))
+
+    return query, None
+
+@bp.route('/api/profiles/<int:profile_id>/transactions', methods=['GET'])
+@query_budget(3)  # ownership + data version, the page, its tags (skipped when empty)
+@require_auth
+@conditional_profile_get()
+def get_transactions(profile_id):
+    try:
+        # Verify ownership
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found or access denied'}), 404
+
+        query, error = apply_transaction_filters(
+            select_columns(TRANSACTION_COLUMNS).where(Transaction.profile_id == profile_id), request.args
+        )
+        if error:
+            return jsonify({'error': error}), 400
+
+        # Keyset pagination: seek past the last row of the previous page
+        # instead of OFFSET, so deep pages cost the same as the first one
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                cursor_key = decode_cursor(cursor)
+            except InvalidCursor:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.where(
+                db.tuple_(Transaction.date, Transaction.created_at, Transaction.id) < cursor_key
+            )
+
+        limit = parse_page_size(request.args.get('limit'))
+        return json_response(encode_transaction_page(query, limit))
+    except Exception as e:
+        logger.error(f"Error fetching transactions: {str(e)}")
+        return jsonify({'error': 'Failed to fetch transactions'}), 500
+
+@bp.route('/api/profiles/<int:profile_id>/transactions', methods=['POST'])
+# ownership, tags (with tag_ids), version bump, INSERT, tag links (with tags),
+# rollup upsert, balance (with account_id), reload and its tags for the response
+@query_budget(9)
+@require_auth
+def create_transaction(profile_id):
+    try:
+        # Verify ownership
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found or access denied'}), 404
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        # Validate transaction data
+        validation_errors = validate_transaction_data(data)
+        if validation_errors:
+            return jsonify({'error': validation_errors[0]}), 400
+
+        transaction_type = sanitize_input(data.get('type'))
+        amount = float(data.get('amount'))
+        category = sanitize_input(data.get('category'))
+        description = sanitize_input(data.get('description', ''))
+        date_str = data.get('date')
+
+        try:
+            date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+        new_transaction = Transaction(
+            profile_id=profile_id,
+            type=transaction_type,
+            amount=amount,
+            category=category,
+            description=description,
+            date=date,
+            category_id=data.get('category_id'),
+            account_id=data.get('account_id')
+        )
+        
+        # Handle tags (many-to-many relationship)
+        tag_ids = data.get('tag_ids', [])
+        if tag_ids:
+            tags = Tag.query.filter(Tag.id.in_(tag_ids), Tag.profile_id == profile_id).all()
+            new_transaction.tags = tags
+        
+        db.session.add(new_transaction)
+        record_transaction_rollup(new_transaction)
+        
+        # Update account balance if account is specified
+        if new_transaction.account_id:
+            adjust_account_balance(profile_id, new_transaction.account_id,
+                                   amount if transaction_type == 'income' else -amount)
+        
+        bump_profile_version(profile_id)
+        db.session.commit()
+        if new_transaction.account_id:
+            response_cache.invalidate(profile_id, 'accounts')
+
+        logger.info(f"Transaction created: {transaction_type} ${amount} for profile {profile_id}")
+        return jsonify(new_transaction.to_dict()), 201
+    except ValueError as e:
+        return jsonify({'error': 'Invalid amount format'}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating transaction: {str(e)}")
+        return jsonify({'error': 'Failed to create transaction'}), 500
+
+# Bulk Import
+BULK_IMPORT_MAX_ROWS = 50000
+BULK_COPY_THRESHOLD = 1000
+# Rows per multi-row INSERT on SQLite (stays under its 999 bind variable default)
+BULK_SQLITE_CHUNK = 90
+BULK_COLUMNS = ['profile_id', 'type', 'amount', 'category', 'description', 'date',
+                'category_id', 'account_id', 'created_at', 'updated_at', 'version']
+
+def read_bulk_rows():
+    """
+    Read import rows from a JSON array (or {"transactions": [...]}) or an uploaded CSV
+    CSV headers follow the export format; tags are ';'-separated names
+    Returns (rows, error_message)
+    """
+    upload = request.files.get('file')
+    if upload:
+        try:
+            reader = csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig'))
+            rows = list(itertools.islice(reader, BULK_IMPORT_MAX_ROWS + 1))
+        except (UnicodeDecodeError, csv.Error):
+            return None, 'Could not parse CSV file'
+    else:
+        data = request.get_json(silent=True)
+        rows = data.get('transactions') if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            return None, 'Expected a JSON array of transactions or a CSV file'
+
+    if not rows:
+        return None, 'No transactions provided'
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        return None, f'Too many transactions (max {BULK_IMPORT_MAX_ROWS} per request)'
+    return rows, None
+
+def prepare_bulk_rows(profile_id, raw_rows):
+    """
+    Validate and normalize import rows in a single pass
+    Returns (rows, tag_ids_per_row, errors) where errors is a list of {row, error}
+    """
+    tags_by_id = dict(db.session.query(Tag.id, Tag.name).filter(Tag.profile_id == profile_id).all())
+    tag_ids_by_name = {name: tag_id for tag_id, name in tags_by_id.items()}
+    account_ids = {row[0] for row in db.session.query(Account.id).filter(Account.profile_id == profile_id)}
+    category_ids = {row[0] for row in db.session.query(Category.id).filter(Category.profile_id == profile_id)}
+    created_at = datetime.utcnow()
+
+    rows, row_tag_ids, errors = [], [], []
+    for index, data in enumerate(raw_rows, start=1):
+        try:
+            if not isinstance(data, dict):
+                raise ValueError('Row must be an object')
+            data = {key: (None if value == '' else value) for key, value in data.items()}
+            data.setdefault('description', '')
+            data['description'] = data['description'] or ''
+
+            validation_errors = validate_transaction_data(data)
+            if validation_errors:
+                raise ValueError(validation_errors[0])
+
+            try:
+                tx_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                raise ValueError('Invalid date format. Use YYYY-MM-DD')
+
+            category_id = parse_int_arg(data.get('category_id'))
+            if category_id is not None and category_id not in category_ids:
+                raise ValueError('Category not found')
+            account_id = parse_int_arg(data.get('account_id'))
+            if account_id is not None and account_id not in account_ids:
+                raise ValueError('Account not found')
+
+            tag_ids = data.get('tag_ids') or []
+            # A string would be read character by character, and bool is an int subclass
+            if not isinstance(tag_ids, list) or not all(
+                    isinstance(tag_id, int) and not isinstance(tag_id, bool) for tag_id in tag_ids):
+                raise ValueError('tag_ids must be a list of integers')
+            tag_names = data.get('tags') or []
+            if isinstance(tag_names, str):
+                tag_names = [name.strip() for name in tag_names.split(';') if name.strip()]
+            elif not isinstance(tag_names, list) or not all(isinstance(name, str) for name in tag_names):
+                raise ValueError('tags must be a list of names')
+            tag_ids = {tag_id for tag_id in tag_ids if tag_id in tags_by_id}
+            tag_ids.update(tag_ids_by_name[name] for name in tag_names if name in tag_ids_by_name)
+        except (ValueError, TypeError, AttributeError) as e:
+            errors.append({'row': index, 'error': str(e) or 'Invalid row'})
+            continue
+
+        rows.append({
+            'profile_id': profile_id,
+            'type': sanitize_input(data['type']),
+            'amount': float(data['amount']),
+            'category': sanitize_input(data['category']),
+            'description': sanitize_input(data['description']),
+            'date': tx_date,
+            'category_id': category_id,
+            'account_id': account_id,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'version': 0
+        })
+        row_tag_ids.append(sorted(tag_ids))
+    return rows, row_tag_ids, errors
+
+def insert_transactions_bulk(rows, row_tag_ids):
+    """
+    Insert prepared rows and their tag links, returning the new transaction ids
+    Uses COPY on PostgreSQL for large batches, executemany otherwise
+    """
+    table = Transaction.__table__
+    bind = db.session.get_bind()
+
+    if bind.dialect.name == 'postgresql' and len(rows) >= BULK_COPY_THRESHOLD:
+        # Reserve ids up front so tag links can reference them, then COPY
+        ids = [row[0] for row in db.session.execute(
+            db.text("SELECT nextval(pg_get_serial_sequence('transactions', 'id')) FROM generate_series(1, :n)"),
+            {'n': len(rows)}
+        )]
+        copy_into('transactions', ['id'] + BULK_COLUMNS,
+                  ([tx_id] + [row[column] for column in BULK_COLUMNS] for tx_id, row in zip(ids, rows)),
+                  options=', FORCE_NOT_NULL (description)')
+        links = [(tx_id, tag_id) for tx_id, tag_ids in zip(ids, row_tag_ids) for tag_id in tag_ids]
+        if links:
+            copy_into('transaction_tags', ['transaction_id', 'tag_id'], links)
+        return ids
+
+    if bind.dialect.name == 'sqlite' and bind.dialect.insert_returning:
+        # SQLAlchemy falls back to one INSERT per row to keep RETURNING in
+        # parameter order here. Within one statement SQLite assigns rowids in
+        # VALUES order, so a multi-row INSERT per chunk with its ids sorted
+        # lines up with the chunk's rows
+        ids = []
+        for start in range(0, len(rows), BULK_SQLITE_CHUNK):
+            result = db.session.execute(
+                db.insert(table).values(rows[start:start + BULK_SQLITE_CHUNK]).returning(table.c.id)
+            )
+            ids.extend(sorted(row[0] for row in result))
+    elif bind.dialect.insert_executemany_returning:
+        result = db.session.execute(
+            db.insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+        )
+        ids = [row[0] for row in result]
+    else:
+        ids = [db.session.execute(db.insert(table), row).inserted_primary_key[0] for row in rows]
+
+    links = [{'transaction_id': tx_id, 'tag_id': tag_id}
+             for tx_id, tag_ids in zip(ids, row_tag_ids) for tag_id in tag_ids]
+    if links:
+        db.session.execute(db.insert(transaction_tags), links)
+    return ids
+
+def bulk_import_query_budget():
+    """
+    Ownership, the tag, account and category lookups, version bump, tag links,
+    rollup upsert, balances and (PostgreSQL COPY) the id reservation, plus one
+    INSERT per chunk of rows on SQLite
+    """
+    return 9 + -(-g.get('bulk_row_count', 0) // BULK_SQLITE_CHUNK)
+
+@bp.route('/api/profiles/<int:profile_id>/transactions/bulk', methods=['POST'])
+@query_budget(bulk_import_query_budget)
+@require_auth
+@rate_limit(20, 3600, key=current_user_id)
+def bulk_create_transactions(profile_id):
+    try:
+        if not owns_profile(profile_id):
+            return jsonify({'error': 'Profile not found or access denied'}), 404
+
+        raw_rows, error = read_bulk_rows()
+        if error:
+            return jsonify({'error': error}), 400
+
+        rows, row_tag_ids, errors = prepare_bulk_rows(profile_id, raw_rows)
+        if not rows:
+            return jsonify({'error': 'No valid transactions to import', 'imported': 0, 'errors': errors}), 400
+
+        g.bulk_row_count = len(rows)
+        # Core inserts skip stamp_synced_rows, so stamp the batch here
+        version = bump_profile_version(profile_id)
+        for row in rows:
+            row['version'] = version
+        insert_transactions_bulk(rows, row_tag_ids)
+
+        # One rollup upsert and one balance update per account for the whole batch
+        deltas, balance_deltas = {}, {}
+        for row in rows:
+            add_rollup_delta(deltas, profile_id, row['date'], row['category'], row['type'], row['amount'])
+            if row['account_id']:
+                signed = row['amount'] if row['type'] == 'income' else -row['amount']
+                balance_deltas[row['account_id']] = balance_deltas.get(row['account_id'], 0) + signed
+        apply_rollup_deltas(deltas)
+        if balance_deltas:
+            accounts = Account.__table__
+            db.session.execute(
+                db.update(accounts).where(accounts.c.id == db.bindparam('account_id'))
+                .values(balance=accounts.c.balance + db.bindparam('delta'),
+                        version=version, updated_at=datetime.utcnow()),
+                [{'account_id': account_id, 'delta': delta} for account_id, delta in balance_deltas.items()]
+            )
+
+        db.session.commit()
+        if balance_deltas:
+            response_cache.invalidate(profile_id, 'accounts')
+
+        logger.info(f"Bulk import: {len(rows)} transactions for profile {profile_id} ({len(errors)} rejected)")
+        return jsonify({'imported': len(rows), 'failed': len(errors), 'errors': errors}), 201
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error importing transactions: {str(e)}")
+        return jsonify({'error': 'Failed to import transactions'}), 500
+
+@bp.route('/api/transactions/<int:transaction_id>', methods=['DELETE'])
+# owned lookup, its tags, version bump, balance (with an account), rollup upsert,
+# DELETE links (with tags), tombstone, DELETE
+@query_budget(8)
+@require_auth
+def delete_transaction(transaction_id):
+    try:
+        transaction = get_owned(Transaction, transaction_id)
+        
+        if not transaction:
+            return jsonify({'error': 'Transaction not found or access denied'}), 404
+
+        # Reverse the transaction on its account, if any
+        if transaction.account_id:
+            adjust_account_balance(transaction.profile_id, transaction.account_id,
+                                   -transaction.amount if transaction.type == 'income' else transaction.amount)
+
+        profile_id, account_id = transaction.profile_id, transaction.account_id
+        record_transaction_rollup(transaction, sign=-1)
+        db.session.delete(transaction)
+        bump_profile_version(profile_id)
+        db.session.commit()
+        if account_id:
+            response_cache.invalidate(profile_id, 'accounts')
+
+        logger.info(f"Transaction deleted: {transaction_id} by user {current_user_id()}")
+        return jsonify({'message': 'Transaction deleted successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error deleting transaction: {str(e)}")
+        return jsonify({'error': 'Failed to delete transaction'}), 500
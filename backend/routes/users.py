@@ -0,0 +1,179 @@
+# Authentication routes
+from flask import Blueprint, jsonify, request, session
+from datetime import datetime
+import logging
+
+from auth import (
+    require_auth,
+    get_current_user,
+    validate_email,
+    validate_username,
+    validate_password,
+    check_rate_limit,
+    sanitize_input,
+    create_session
+)
+from extensions import password_hasher
+from models import db, User
+from password_hashing import HashingBusy
+from query_budget import query_budget
+from session_store import check_session_activity
+
+bp = Blueprint('users', __name__)
+logger = logging.getLogger(__name__)
+
+def server_busy_response():
+    """503 returned when the password hashing pool is saturated"""
+    response = jsonify({'error': 'Server is busy. Please try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@bp.route('/api/register', methods=['POST'])
+def register():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        username = sanitize_input(data.get('username', ''))
+        email = sanitize_input(data.get('email', ''))
+        password = data.get('password', '')
+
+        # Validate username
+        is_valid, error_msg = validate_username(username)
+        if not is_valid:
+            return jsonify({'error': error_msg}), 400
+
+        # Validate email
+        if not validate_email(email):
+            return jsonify({'error': 'Invalid email format'}), 400
+
+        # Validate password strength
+        is_valid, error_msg = validate_password(password)
+        if not is_valid:
+            return jsonify({'error': error_msg}), 400
+
+        # Check rate limiting (by IP)
+        client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
+        allowed, retry_after = check_rate_limit(f"register:{client_ip}", max_attempts=10, window=3600)
+        if not allowed:
+            return jsonify({
+                'error': f'Too many registration attempts. Please try again in {retry_after} seconds'
+            }), 429
+
+        # Check if user already exists
+        if User.query.filter_by(username=username).first():
+            logger.warning(f"Registration attempt with existing username: {username}")
+            return jsonify({'error': 'Username already exists'}), 400
+        
+        if User.query.filter_by(email=email).first():
+            logger.warning(f"Registration attempt with existing email: {email}")
+            return jsonify({'error': 'Email already exists'}), 400
+
+        # Create new user (the KDF runs in the bounded hashing pool)
+        password_hash = password_hasher.hash(password)
+        new_user = User(
+            username=username,
+            email=email,
+            password_hash=password_hash,
+            last_login=datetime.utcnow()
+        )
+        db.session.add(new_user)
+        db.session.commit()
+
+        # Create session
+        create_session(new_user.id)
+        
+        logger.info(f"New user registered: {username} (ID: {new_user.id})")
+
+        return jsonify({
+            'message': 'User created successfully',
+            'user': new_user.to_dict()
+        }), 201
+    except HashingBusy:
+        db.session.rollback()
+        return server_busy_response()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Registration error: {str(e)}")
+        return jsonify({'error': 'Registration failed. Please try again'}), 500
+
+@bp.route('/api/login', methods=['POST'])
+def login():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        username = sanitize_input(data.get('username', ''))
+        password = data.get('password', '')
+
+        if not username or not password:
+            return jsonify({'error': 'Username and password are required'}), 400
+
+        # Rate limiting by IP and username
+        client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
+        allowed, retry_after = check_rate_limit(f"login:{client_ip}:{username}")
+        if not allowed:
+            logger.warning(f"Rate limit exceeded for login attempt: {username} from {client_ip}")
+            return jsonify({
+                'error': f'Too many login attempts. Please try again in {retry_after} seconds'
+            }), 429
+
+        user = User.query.filter_by(username=username).first()
+
+        if not user or not password_hasher.verify(user.password_hash, password):
+            logger.warning(f"Failed login attempt for username: {username}")
+            # Generic error message to prevent username enumeration
+            return jsonify({'error': 'Invalid credentials'}), 401
+
+        # Transparently upgrade hashes made with an outdated method or work factor
+        if password_hasher.needs_rehash(user.password_hash):
+            try:
+                user.password_hash = password_hasher.hash(password)
+                logger.info(f"Password hash upgraded for user {user.id}")
+            except HashingBusy:
+                pass  # Try again on a later login rather than failing this one
+
+        # Update last login
+        user.last_login = datetime.utcnow()
+        db.session.commit()
+
+        # Create session
+        create_session(user.id)
+        
+        logger.info(f"User logged in: {username} (ID: {user.id})")
+
+        return jsonify({
+            'message': 'Login successful',
+            'user': user.to_dict()
+        }), 200
+    except HashingBusy:
+        return server_busy_response()
+    except Exception as e:
+        logger.error(f"Login error: {str(e)}")
+        return jsonify({'error': 'Login failed. Please try again'}), 500
+
+@bp.route('/api/logout', methods=['POST'])
+@require_auth
+def logout():
+    user_id = session.get('user_id')
+    session.clear()
+    logger.info(f"User logged out (ID: {user_id})")
+    return jsonify({'message': 'Logout successful'}), 200
+
+@bp.route('/api/check-auth', methods=['GET'])
+@query_budget(1)  # the current user
+def check_auth():
+    user = get_current_user(User)
+    if user:
+        # Check session timeout
+        if not check_session_activity():
+            return jsonify({'authenticated': False}), 200
+        
+        return jsonify({
+            'authenticated': True,
+            'user': user.to_dict()
+        }), 200
+    else:
+        return jsonify({'authenticated': False}), 200
@@ -0,0 +1,213 @@
+# Session activity tracking and the optional server-side session store
+#
+# The idle timeout is checked against an integer epoch in
+# session['last_activity'] that is only rewritten once it is older than
+# SESSION_REFRESH_SECONDS. With SESSION_REFRESH_EACH_REQUEST off, Flask only
+# re-signs and sends the session cookie when the session changed, so most
+# API responses carry no Set-Cookie at all.
+#
+# SESSION_STORE=database keeps the session data in the user_sessions table
+# instead of the cookie. The cookie then holds only a random id, is sent
+# once at login, and the row's expiry slides with the (throttled) activity
+# timestamp. Expired rows are purged after requests at most once per
+# SESSION_PURGE_INTERVAL per process (like the WAL checkpointer, so nothing
+# runs in a thread across gunicorn's fork), or with `flask purge-sessions`.
+import hashlib
+import logging
+import os
+import secrets
+import threading
+import time
+
+from flask import current_app, session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+from models import db, UserSession
+
+logger = logging.getLogger(__name__)
+
+LAST_ACTIVITY_KEY = 'last_activity'
+STORES = ('cookie', 'database')
+
+
+def check_session_activity():
+    """
+    Enforce the idle timeout on the current session and record the activity
+    Returns False (after clearing the session) once it has been idle longer
+    than SESSION_IDLE_TIMEOUT. Because the timestamp is refreshed at most
+    every SESSION_REFRESH_SECONDS, a session expires up to that much early
+    """
+    config = current_app.config
+    now = int(time.time())
+    last_activity = session.get(LAST_ACTIVITY_KEY)
+    if not isinstance(last_activity, int):
+        # Sessions issued before the epoch format (ISO strings) start over now
+        last_activity = None
+    elif now - last_activity > config['SESSION_IDLE_TIMEOUT']:
+        session.clear()
+        return False
+    if last_activity is None or now - last_activity >= config['SESSION_REFRESH_SECONDS']:
+        session[LAST_ACTIVITY_KEY] = now
+    return True
+
+
+def regenerate_session_id():
+    """Issue a new session id at login so a pre-login id cannot be fixed on a user"""
+    regenerate = getattr(session, 'regenerate', None)
+    if regenerate is not None:
+        regenerate()
+
+
+def hash_session_id(sid):
+    return hashlib.sha256(sid.encode()).hexdigest()
+
+
+class StoredSession(SecureCookieSession):
+    """Session whose data lives in user_sessions; sid is the cookie's token"""
+
+    def __init__(self, initial=None, sid=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.previous_sid = None
+
+    def regenerate(self):
+        if self.sid is not None:
+            self.previous_sid = self.sid
+        self.sid = None
+        self.modified = True
+
+
+class DatabaseSessionInterface(SessionInterface):
+    """
+    Flask session interface backed by the user_sessions table
+    Statements run on the primary engine (a replica could miss a fresh login)
+    and are counted in X-Query-Count but left out of route query budgets,
+    since every request pays for them regardless of the route
+    """
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, idle_timeout, purge_interval=300):
+        self.idle_timeout = idle_timeout
+        self.purge_interval = purge_interval
+        self._last_purge = time.monotonic()
+        self._purge_lock = threading.Lock()
+
+    def _connection(self):
+        return db.engine.connect().execution_options(query_budget_exempt=True)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return StoredSession()
+        table = UserSession.__table__
+        with self._connection() as conn:
+            data = conn.execute(
+                db.select(table.c.data).where(table.c.id == hash_session_id(sid),
+                                              table.c.expires_at > int(time.time()))
+            ).scalar()
+        if data is None:
+            return StoredSession()
+        try:
+            return StoredSession(self.serializer.loads(data), sid)
+        except ValueError:
+            logger.warning('Discarding unreadable session data')
+            return StoredSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if session.previous_sid is not None:
+            self.delete(session.previous_sid)
+        if not session:
+            if session.modified:
+                if session.sid is not None:
+                    self.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+                response.vary.add('Cookie')
+            return
+        if not session.modified:
+            return
+
+        new_sid = session.sid is None
+        if new_sid:
+            session.sid = secrets.token_urlsafe(32)
+        self.store(session)
+        self.maybe_purge()
+        # The id never changes for the life of the session, so the cookie is
+        # only sent when one is issued
+        if new_sid:
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                                httponly=httponly, domain=domain, path=path, secure=secure, samesite=samesite)
+            response.vary.add('Cookie')
+
+    def release_request_transaction(self):
+        """
+        End the request's ORM transaction before writing on another connection
+        The route has committed by now and teardown would roll back the rest
+        anyway, but on SQLite a write request's open transaction holds the
+        database lock this write needs (BEGIN IMMEDIATE, see sqlite_tuning.py)
+        """
+        db.session.rollback()
+
+    def store(self, session):
+        self.release_request_transaction()
+        table = UserSession.__table__
+        key = hash_session_id(session.sid)
+        values = {
+            'user_id': session.get('user_id'),
+            'data': self.serializer.dumps(dict(session)),
+            'expires_at': int(time.time()) + self.idle_timeout,
+        }
+        with self._connection() as conn:
+            if not conn.execute(db.update(table).where(table.c.id == key).values(**values)).rowcount:
+                conn.execute(db.insert(table).values(id=key, **values))
+            conn.commit()
+
+    def delete(self, sid):
+        self.release_request_transaction()
+        table = UserSession.__table__
+        with self._connection() as conn:
+            conn.execute(db.delete(table).where(table.c.id == hash_session_id(sid)))
+            conn.commit()
+
+    def maybe_purge(self):
+        if time.monotonic() - self._last_purge < self.purge_interval or not self._purge_lock.acquire(blocking=False):
+            return None
+        try:
+            self._last_purge = time.monotonic()
+            return self.purge()
+        finally:
+            self._purge_lock.release()
+
+    def purge(self):
+        """Delete expired sessions; returns how many were removed"""
+        table = UserSession.__table__
+        with self._connection() as conn:
+            removed = conn.execute(db.delete(table).where(table.c.expires_at <= int(time.time()))).rowcount
+            conn.commit()
+        return removed
+
+
+def session_store():
+    store = os.environ.get('SESSION_STORE', 'cookie').lower()
+    if store not in STORES:
+        raise ValueError(f'Unknown SESSION_STORE: {store}')
+    return store
+
+
+def create_session_interface(config):
+    """None for signed-cookie sessions (Flask's default), else the database interface"""
+    if config['SESSION_STORE'] != 'database':
+        return None
+    return DatabaseSessionInterface(config['SESSION_IDLE_TIMEOUT'],
+                                    float(os.environ.get('SESSION_PURGE_INTERVAL', '300')))
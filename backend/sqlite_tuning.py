@@ -0,0 +1,123 @@
+# SQLite production profile
+#
+# With several gunicorn workers on one SQLite file, the defaults (rollback
+# journal, deferred transactions) make readers wait on writers and let two
+# writers deadlock on the lock upgrade, which SQLite reports at once as
+# "database is locked" without consulting the busy timeout. This profile:
+#   - sets WAL, synchronous=NORMAL, mmap_size, cache_size and busy_timeout
+#     on every new connection, so readers never block behind a writer
+#   - starts transactions of write requests with BEGIN IMMEDIATE, so the
+#     write lock is taken up front and contention waits out busy_timeout
+#   - opens GET requests on a separate pool of query_only connections
+#     (the 'read' bind, see db_routing.py)
+#   - checkpoints the WAL periodically so it cannot grow without bound
+#     while readers keep the automatic checkpoint from completing
+import os
+import threading
+import time
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from db_routing import READ_METHODS
+
+# Applied in order; busy_timeout first so switching to WAL waits for other connections
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,      # milliseconds
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative: KiB, so 64 MiB per connection
+}
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+def is_file_database(url):
+    return url.startswith('sqlite') and ':memory:' not in url and url not in ('sqlite://', 'sqlite:///')
+
+
+def sqlite_tuning_enabled():
+    return os.environ.get('SQLITE_TUNING', 'true').lower() == 'true'
+
+
+def sqlite_pragmas():
+    """DEFAULT_PRAGMAS overridden by SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, ... from the environment"""
+    return {name: os.environ.get(f'SQLITE_{name.upper()}', default) for name, default in DEFAULT_PRAGMAS.items()}
+
+
+def write_transaction():
+    """Whether a transaction begun now belongs to a write request"""
+    return has_request_context() and request.method not in READ_METHODS
+
+
+def configure_sqlite_engine(engine, pragmas, read_only=False):
+    """
+    Apply the profile to an engine's connections
+    The driver's own transaction handling is switched off so the begin
+    listener decides how each transaction starts (the recipe from the
+    SQLAlchemy pysqlite docs). Both run on the raw connection, outside the
+    statement events, so request statement counts are unaffected.
+    """
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+            if read_only:
+                cursor.execute('PRAGMA query_only = ON')
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def begin(conn):
+        immediate = not read_only and write_transaction()
+        conn.connection.driver_connection.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+
+
+class WalCheckpointer:
+    """
+    Runs PRAGMA wal_checkpoint at most once per interval per process
+    Called after write requests rather than from a thread, so it is safe
+    under gunicorn's fork and costs nothing while the app is idle
+    """
+
+    def __init__(self, engine, interval, mode='PASSIVE'):
+        if mode not in CHECKPOINT_MODES:
+            raise ValueError(f'Unknown SQLITE_CHECKPOINT_MODE: {mode}')
+        self.engine = engine
+        self.interval = interval
+        self.mode = mode
+        self.last_result = None
+        self._last_run = time.monotonic()
+        self._lock = threading.Lock()
+
+    def maybe_checkpoint(self):
+        if time.monotonic() - self._last_run < self.interval or not self._lock.acquire(blocking=False):
+            return None
+        try:
+            self._last_run = time.monotonic()
+            return self.checkpoint()
+        finally:
+            self._lock.release()
+
+    def checkpoint(self):
+        """Returns (busy, wal_pages, checkpointed_pages)"""
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f'PRAGMA wal_checkpoint({self.mode})')
+            self.last_result = tuple(cursor.fetchone())
+            cursor.close()
+        finally:
+            connection.close()
+        return self.last_result
+
+
+def create_wal_checkpointer(engine):
+    """SQLITE_CHECKPOINT_INTERVAL seconds (0 disables), SQLITE_CHECKPOINT_MODE"""
+    interval = float(os.environ.get('SQLITE_CHECKPOINT_INTERVAL', '60'))
+    if interval <= 0:
+        return None
+    return WalCheckpointer(engine, interval, os.environ.get('SQLITE_CHECKPOINT_MODE', 'PASSIVE').upper())
@@ -0,0 +1,53 @@
+# Helpers for streaming export responses
+import csv
+import io
+import json
+import zlib
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+
+def encode_csv(header, batches):
+    """
+    Yield CSV text one chunk per batch of rows
+    header: list of column names; batches: iterable of lists of row lists
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+
+def encode_jsonl(header, batches):
+    """Yield JSON Lines text, one object per row, one chunk per batch"""
+    for batch in batches:
+        yield ''.join(
+            json.dumps(dict(zip(header, row)), separators=(',', ':')) + '\n' for row in batch
+        )
+
+
+def gzip_chunks(chunks):
+    """Gzip-compress a stream of text chunks without buffering the whole body"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encode_stream(export_format, header, batches, compress=False):
+    """Encode batches as csv or jsonl bytes, optionally gzip-compressed"""
+    encoder = encode_csv if export_format == 'csv' else encode_jsonl
+    chunks = encoder(header, batches)
+    if compress:
+        return gzip_chunks(chunks)
+    return (chunk.encode('utf-8') for chunk in chunks)
@@ -0,0 +1,100 @@
+"""
+Shared fixtures: one app on a throwaway SQLite database, a logged-in client
+and a seeded profile. QUERY_BUDGET_MODE is raise, so a route over its
+@query_budget fails the test even without an explicit assertion.
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TMP_DIR, 'tests.db')}"
+os.environ['QUERY_BUDGET_MODE'] = 'raise'
+os.environ['EXPOSE_QUERY_COUNT'] = 'true'
+os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+
+from app import create_app, init_db  # noqa: E402
+from query_budget import assert_max_queries  # noqa: E402
+
+PASSWORD = 'TestsPassw0rd'
+SEED_TRANSACTIONS = 200
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        init_db()
+    yield app
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+def login(client, username):
+    client.post('/api/register', json={'username': username, 'email': f'{username}@example.com',
+                                       'password': PASSWORD})
+    client.post('/api/login', json={'username': username, 'password': PASSWORD})
+
+
+@pytest.fixture(scope='session')
+def client(app):
+    client = app.test_client()
+    login(client, 'tester')
+    return client
+
+
+@pytest.fixture(scope='session')
+def seeded(app, client):
+    """
+    One profile with categories, tags, accounts, budgets (one of them on a
+    deleted category) and SEED_TRANSACTIONS transactions, built through the API
+    Returns the ids the tests need
+    """
+    app.config['QUERY_BUDGET_MODE'] = 'off'
+    profile_id = client.post('/api/profiles', json={'name': 'Seeded'}).get_json()['id']
+    base = f'/api/profiles/{profile_id}'
+    categories = [client.post(f'{base}/categories', json={'name': name, 'type': 'expense'}).get_json()['id']
+                  for name in ('Food', 'Rent', 'Travel')]
+    tags = [client.post(f'{base}/tags', json={'name': name}).get_json()['id'] for name in ('work', 'home', 'trip')]
+    accounts = [client.post(f'{base}/accounts', json={'name': name, 'type': 'bank'}).get_json()['id']
+                for name in ('Checking', 'Savings')]
+    budgets = [client.post(f'{base}/budgets', json={'category_id': category_id, 'amount': 500}).get_json()['id']
+               for category_id in categories]
+    budgets.append(client.post(f'{base}/budgets', json={'amount': 2000}).get_json()['id'])
+    orphan = client.post(f'{base}/categories', json={'name': 'Orphan', 'type': 'expense'}).get_json()['id']
+    client.post(f'{base}/budgets', json={'category_id': orphan, 'amount': 20})
+    client.delete(f'/api/categories/{orphan}')
+    client.post(f'{base}/transactions/bulk', json=[{
+        'type': 'expense' if i % 4 else 'income',
+        'amount': 10 + i,
+        'category': ('Food', 'Rent', 'Travel')[i % 3],
+        'category_id': categories[i % 3],
+        'account_id': accounts[i % 2],
+        'tag_ids': tags[:i % 4],
+        'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+        'description': f'Seeded {i}',
+    } for i in range(SEED_TRANSACTIONS)])
+    app.config['QUERY_BUDGET_MODE'] = 'raise'
+    return {'profile': profile_id, 'categories': categories, 'tags': tags, 'accounts': accounts,
+            'budgets': budgets}
+
+
+@pytest.fixture
+def call_within(client):
+    """
+    Make one request and assert it issued at most limit SQL statements and
+    did not fail; over-budget writes are rolled back and answered with a 500
+    Usage: call_within(3, 'GET', f'/api/profiles/{profile_id}/transactions')
+    """
+    def call(limit, method, url, payload=None):
+        with assert_max_queries(limit, f'{method} {url}'):
+            response = client.open(url, method=method, json=payload)
+            # Drain streamed bodies here, or their statements land in the next count
+            response.get_data()
+            response.close()
+        assert response.status_code < 500, response.get_data(as_text=True)
+        return response
+    return call
@@ -0,0 +1,62 @@
+"""Merging per-worker metrics files, who may read /api/metrics, and what stays out of /api/health"""
+
+import json
+import os
+import subprocess
+import sys
+
+from metrics import RETIRED_FILE, Snapshot, WorkerMetrics
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def write_worker_file(directory, name, pid, slow_queries):
+    snapshot = Snapshot()
+    snapshot.slow_queries = slow_queries
+    snapshot.in_flight = 3
+    with open(os.path.join(directory, name), 'w') as f:
+        json.dump(dict(snapshot.to_dict(), pid=pid), f)
+
+
+def test_exited_workers_are_folded_into_the_retired_snapshot(tmp_path):
+    write_worker_file(tmp_path, 'metrics-1-1.json', exited_pid(), 2)
+    write_worker_file(tmp_path, 'metrics-2-2.json', exited_pid(), 5)
+    metrics = WorkerMetrics(str(tmp_path))
+
+    first = metrics.collect()
+    assert first.slow_queries == 7
+    # Gauges of exited workers never count; only this worker is live
+    assert first.in_flight == 0
+    assert first.workers == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([RETIRED_FILE, '.metrics.lock', os.path.basename(metrics._path)])
+
+    write_worker_file(tmp_path, 'metrics-3-3.json', exited_pid(), 1)
+    second = metrics.collect()
+    assert second.slow_queries == 8
+    assert second.workers == 1
+    assert 'metrics-3-3.json' not in os.listdir(tmp_path)
+
+
+def test_metrics_need_a_token_in_production(app, client):
+    config = app.config
+    saved = config['METRICS_TOKEN'], config['METRICS_REQUIRE_TOKEN']
+    try:
+        config['METRICS_TOKEN'], config['METRICS_REQUIRE_TOKEN'] = None, True
+        assert client.get('/api/metrics').status_code == 403
+        config['METRICS_TOKEN'] = 'scrape-me'
+        assert client.get('/api/metrics').status_code == 401
+        response = client.get('/api/metrics', headers={'Authorization': 'Bearer scrape-me'})
+        assert response.status_code == 200
+    finally:
+        config['METRICS_TOKEN'], config['METRICS_REQUIRE_TOKEN'] = saved
+
+
+def test_health_reports_status_only_and_metrics_report_the_caches(client):
+    assert set(client.get('/api/health').get_json()) == {'status', 'database', 'version'}
+    body = client.get('/api/metrics').get_data(as_text=True)
+    assert 'response_cache_events_total{' in body
+    assert 'analytics_cache_profiles{' in body
@@ -0,0 +1,32 @@
+"""Infinity and NaN are not valid JSON, so amounts must be finite going in and null coming out"""
+
+import pytest
+
+from fast_json import RowSerializer, encode_scalar, encode_value
+
+NON_FINITE = ['Infinity', '-inf', 'NaN']
+
+
+@pytest.mark.parametrize('amount', NON_FINITE)
+def test_budget_amount_must_be_finite(client, seeded, amount):
+    response = client.post(f"/api/profiles/{seeded['profile']}/budgets", json={'amount': amount})
+    assert response.status_code == 400
+    response = client.put(f"/api/budgets/{seeded['budgets'][0]}", json={'amount': amount})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('balance', NON_FINITE)
+def test_account_balance_must_be_finite(client, seeded, balance):
+    response = client.post(f"/api/profiles/{seeded['profile']}/accounts",
+                           json={'name': 'Broken', 'type': 'cash', 'balance': balance})
+    assert response.status_code == 400
+    response = client.put(f"/api/accounts/{seeded['accounts'][0]}", json={'balance': balance})
+    assert response.status_code == 400
+
+
+def test_encoder_writes_non_finite_floats_as_null():
+    serializer = RowSerializer([('amount', 'number')])
+    assert serializer.encode_rows([(float('inf'),), (2.5,)]) == '[{"amount":null},{"amount":2.5}]'
+    assert encode_scalar(float('nan')) == 'null'
+    assert encode_value({'spent': float('-inf'), 'amounts': [1.0, float('nan')]}) == \
+        '{"amounts":[1.0,null],"spent":null}'
@@ -0,0 +1,208 @@
+"""
+SQL statement counts for every endpoint against the seeded database
+Each case is (limit, method, url, payload, status). URLs and payloads name ids as
+{placeholders}: seeded rows, or new_* rows created just before the request
+(outside the count) for routes that delete or need a fresh row. Limits match
+the route's @query_budget; the variants cover its data-dependent branches.
+The expected status keeps a route that fails early, and so issues fewer
+statements, from passing as within budget.
+"""
+
+import pytest
+
+from conftest import PASSWORD
+from query_budget import assert_max_queries
+
+BASE = '/api/profiles/{profile}'
+TRANSACTION = {'type': 'expense', 'amount': 12.5, 'category': 'Food', 'date': '2024-03-01'}
+
+
+def resolve(value, ids):
+    if isinstance(value, list):
+        return [resolve(item, ids) for item in value]
+    return ids[value] if isinstance(value, str) and value in ids.names else value
+
+
+def with_ids(**fields):
+    """A payload whose values may name ids, e.g. with_ids(account_id='account')"""
+    return lambda ids: {key: resolve(value, ids) for key, value in fields.items()}
+
+
+def transaction(**fields):
+    return lambda ids: dict(TRANSACTION, **with_ids(**fields)(ids))
+
+
+CASES = [
+    (1, 'GET', '/api/check-auth', None, 200),
+    (10, 'POST', '/api/login', {'username': 'tester', 'password': PASSWORD}, 200),
+    (10, 'GET', '/api/docs', None, 200),
+    (1, 'GET', '/api/health', None, 200),
+    (0, 'GET', '/api/metrics', None, 200),
+    (1, 'GET', '/api/profiles', None, 200),
+    (10, 'POST', '/api/profiles', {'name': 'Another'}, 201),
+    (9, 'DELETE', '/api/profiles/{new_profile}', None, 200),
+    (9, 'DELETE', '/api/profiles/{new_empty_profile}', None, 200),
+    # Transactions
+    (3, 'GET', f'{BASE}/transactions', None, 200),
+    (3, 'GET', f'{BASE}/transactions?tag_id={{tag}}&limit=20', None, 200),
+    (3, 'GET', f'{BASE}/transactions?type=income&category=Rent&from=2030-01-01', None, 200),
+    (9, 'POST', f'{BASE}/transactions', transaction(account_id='account', tag_ids=['tag', 'second_tag']), 201),
+    (9, 'POST', f'{BASE}/transactions', transaction(), 201),
+    (9, 'POST', f'{BASE}/transactions', transaction(account_id=999999, tag_ids=[999999]), 201),
+    (9 + 1, 'POST', f'{BASE}/transactions/bulk', lambda ids: [transaction(account_id='account')(ids)] * 20, 201),
+    (9 + 6, 'POST', f'{BASE}/transactions/bulk', lambda ids: [transaction()(ids)] * 500, 201),
+    (8, 'DELETE', '/api/transactions/{new_transaction}', None, 200),
+    (8, 'DELETE', '/api/transactions/{new_plain_transaction}', None, 200),
+    # Reports and reads
+    (3, 'GET', f'{BASE}/summary', None, 200),
+    (3, 'GET', f'{BASE}/summary?from=2024-01-10&to=2024-06-20&bucket=week', None, 200),
+    # The route's budget is 1; the streamed body adds one batch of rows and its tags
+    (3, 'GET', f'{BASE}/export?format=csv', None, 200),
+    (3, 'GET', f'{BASE}/export?format=jsonl&gzip=1', None, 200),
+    (10, 'GET', f'{BASE}/bootstrap', None, 200),
+    (4, 'GET', f'{BASE}/bootstrap?include=budgets&limit=20', None, 200),
+    (8, 'GET', f'{BASE}/changes', None, 200),
+    (8, 'GET', f'{BASE}/changes?since=1', None, 200),
+    (8, 'GET', f'{BASE}/changes?since=999999', None, 200),
+    (3, 'GET', f'{BASE}/analytics/rolling', None, 200),
+    (3, 'GET', f'{BASE}/analytics/category-trends?months=24', None, 200),
+    (3, 'GET', f'{BASE}/analytics/year-over-year', None, 200),
+    (3, 'GET', f'{BASE}/analytics/percentiles?p=50,90', None, 200),
+    (3, 'GET', f'{BASE}/analytics/movers', None, 200),
+    # Categories, tags and accounts
+    (2, 'GET', f'{BASE}/categories', None, 200),
+    (5, 'POST', f'{BASE}/categories', {'name': 'Created', 'type': 'income'}, 201),
+    (4, 'PUT', '/api/categories/{category}', {'name': 'Groceries'}, 200),
+    (4, 'DELETE', '/api/categories/{new_category}', None, 200),
+    (2, 'GET', f'{BASE}/tags', None, 200),
+    (5, 'POST', f'{BASE}/tags', {'name': 'created'}, 201),
+    (7, 'DELETE', '/api/tags/{new_used_tag}', None, 200),
+    (7, 'DELETE', '/api/tags/{new_tag}', None, 200),
+    (2, 'GET', f'{BASE}/accounts', None, 200),
+    (4, 'POST', f'{BASE}/accounts', {'name': 'Created', 'type': 'cash'}, 201),
+    (4, 'PUT', '/api/accounts/{account}', {'name': 'Main'}, 200),
+    (4, 'DELETE', '/api/accounts/{new_account}', None, 200),
+    # Budgets, including one whose category was deleted
+    (4, 'GET', f'{BASE}/budgets', None, 200),
+    (4, 'GET', f'{BASE}/budgets?month=1&year=2000', None, 200),
+    (7, 'POST', f'{BASE}/budgets', with_ids(category_id='category', amount=100, month=1, year=2020), 201),
+    (7, 'POST', f'{BASE}/budgets', {'amount': 100, 'month': 2, 'year': 2020}, 201),
+    (7, 'POST', f'{BASE}/budgets', {'category_id': 999999, 'amount': 100}, 404),
+    (6, 'PUT', '/api/budgets/{budget}', {'amount': 600}, 200),
+    (6, 'PUT', '/api/budgets/{total_budget}', {'amount': 2500}, 200),
+    (4, 'DELETE', '/api/budgets/{new_budget}', None, 200),
+]
+
+
+class Ids(dict):
+    """Seeded ids by name; new_* names create their row on first use"""
+
+    def __init__(self, client, seeded):
+        super().__init__(
+            profile=seeded['profile'], category=seeded['categories'][0], tag=seeded['tags'][0],
+            second_tag=seeded['tags'][1], account=seeded['accounts'][0], budget=seeded['budgets'][0],
+            total_budget=seeded['budgets'][-1],
+        )
+        self.client = client
+        self.names = set(self) | set(CREATORS)
+
+    def __missing__(self, name):
+        self[name] = CREATORS[name](self.client, self)
+        return self[name]
+
+
+def created(response):
+    return response.get_json()['id']
+
+
+CREATORS = {
+    'new_profile': lambda client, ids: seed_profile(client),
+    'new_empty_profile': lambda client, ids: created(client.post('/api/profiles', json={'name': 'Empty'})),
+    'new_transaction': lambda client, ids: created(client.post(
+        f'/api/profiles/{ids["profile"]}/transactions',
+        json=dict(TRANSACTION, account_id=ids['account'], tag_ids=[ids['tag']]))),
+    'new_plain_transaction': lambda client, ids: created(client.post(
+        f'/api/profiles/{ids["profile"]}/transactions', json=TRANSACTION)),
+    'new_category': lambda client, ids: created(client.post(
+        f'/api/profiles/{ids["profile"]}/categories', json={'name': 'Temporary', 'type': 'expense'})),
+    'new_tag': lambda client, ids: created(client.post(
+        f'/api/profiles/{ids["profile"]}/tags', json={'name': 'unused'})),
+    'new_used_tag': lambda client, ids: tag_some_transactions(client, ids['profile']),
+    'new_account': lambda client, ids: created(client.post(
+        f'/api/profiles/{ids["profile"]}/accounts', json={'name': 'Temporary', 'type': 'cash'})),
+    'new_budget': lambda client, ids: created(client.post(
+        f'/api/profiles/{ids["profile"]}/budgets', json={'amount': 10, 'month': 3, 'year': 2020})),
+}
+
+
+def seed_profile(client):
+    profile_id = created(client.post('/api/profiles', json={'name': 'Doomed'}))
+    base = f'/api/profiles/{profile_id}'
+    tag_id = created(client.post(f'{base}/tags', json={'name': 'doomed'}))
+    client.post(f'{base}/transactions/bulk', json=[dict(TRANSACTION, tag_ids=[tag_id])] * 30)
+    return profile_id
+
+
+def tag_some_transactions(client, profile_id):
+    base = f'/api/profiles/{profile_id}'
+    tag_id = created(client.post(f'{base}/tags', json={'name': 'short-lived'}))
+    client.post(f'{base}/transactions/bulk', json=[dict(TRANSACTION, tag_ids=[tag_id])] * 5)
+    return tag_id
+
+
+def case_id(case):
+    limit, method, url, _, _ = case
+    return f'{method} {url}'
+
+
+@pytest.mark.parametrize('limit,method,url,payload,status', CASES, ids=[case_id(case) for case in CASES])
+def test_endpoint_within_budget(client, seeded, call_within, limit, method, url, payload, status):
+    ids = Ids(client, seeded)
+    url = url.format_map(ids)
+    if callable(payload):
+        payload = payload(ids)
+    response = call_within(limit, method, url, payload)
+    assert response.status_code == status, response.get_data()[:500]
+    if response.is_json and status < 400:
+        assert 'error' not in (response.get_json() or {})
+
+
+def test_register_and_logout_within_budget(app):
+    # Both switch the session, so they run on their own client
+    client = app.test_client()
+    with assert_max_queries(10, 'POST /api/register'):
+        response = client.post('/api/register', json={'username': 'newcomer', 'email': 'newcomer@example.com',
+                                                      'password': PASSWORD})
+    assert response.status_code == 201
+    with assert_max_queries(10, 'POST /api/logout'):
+        response = client.post('/api/logout')
+    assert response.status_code == 200
+
+
+def test_over_budget_write_answers_with_its_statements(app, client, seeded, monkeypatch):
+    # Raised before commit inside the route's own try/except, yet the response names the statements
+    monkeypatch.setattr(app.view_functions['tags.create_tag'], 'query_budget', 1)
+    response = client.post(f"/api/profiles/{seeded['profile']}/tags", json={'name': 'over-budget'})
+    assert response.status_code == 500
+    body = response.get_json()
+    assert body['budget'] == 1
+    assert len(body['statements']) > 1
+    assert 'over-budget' not in {tag['name'] for tag in client.get(f"/api/profiles/{seeded['profile']}/tags").get_json()}
+
+
+def test_every_endpoint_is_covered(app):
+    """Adding a route without a case here fails, so no endpoint goes unchecked"""
+    adapter = app.url_map.bind('localhost')
+    covered = {adapter.match(url.split('?')[0].format_map(PLACEHOLDER_IDS), method)[0]
+               for _, method, url, _, _ in CASES}
+    covered.update({'users.register', 'users.logout'})
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.rule.startswith('/api/')}
+    assert endpoints - covered == set()
+
+
+class _AnyId(dict):
+    def __missing__(self, name):
+        return 1
+
+
+PLACEHOLDER_IDS = _AnyId()
@@ -0,0 +1,143 @@
+"""
+Read-replica routing with two SQLite files standing in for primary and replica
+The replica is a copy of the primary taken after setup and never updated, so
+it behaves like a replica that has fallen behind: a read that reaches it does
+not see later writes. Statements are attributed to an engine with cursor events.
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+from sqlalchemy import event
+
+from conftest import PASSWORD, login
+from db_routing import PRIMARY_UNTIL_KEY, READ_BIND, prefer_replica
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Recorder:
+    """Engine names ('primary'/'replica') and verbs of the statements run"""
+
+    def __init__(self):
+        self.statements = []
+        self.replica_writes = []
+
+    def listener(self, engine_name):
+        def record(conn, cursor, statement, parameters, context, executemany):
+            verb = statement.split()[0].upper()
+            self.statements.append(engine_name)
+            if engine_name == 'replica' and verb in WRITES:
+                self.replica_writes.append(statement)
+        return record
+
+    def engines_used(self, action):
+        self.statements.clear()
+        result = action()
+        return set(self.statements), result
+
+
+@pytest.fixture(scope='module')
+def replica():
+    tmp_dir = tempfile.mkdtemp()
+    primary_path = os.path.join(tmp_dir, 'primary.db')
+    replica_path = os.path.join(tmp_dir, 'replica.db')
+    with pytest.MonkeyPatch.context() as env:
+        env.setenv('DATABASE_URL', f'sqlite:///{primary_path}')
+        env.setenv('DATABASE_READ_URL', f'sqlite:///{replica_path}')
+        env.setenv('READ_AFTER_WRITE_SECONDS', '60')
+        env.setenv('RESPONSE_CACHE_MAX_ENTRIES', '0')
+        env.setenv('QUERY_BUDGET_MODE', 'off')
+        from app import create_app, init_db
+        from models import db
+        app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        init_db()
+    client = app.test_client()
+    login(client, 'primary')
+    profile_id = client.post('/api/profiles', json={'name': 'Replica check'}).get_json()['id']
+
+    # Snapshot the primary as the replica; it receives no further writes
+    with app.app_context():
+        db.engine.dispose()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(primary_path + suffix):
+            shutil.copy(primary_path + suffix, replica_path + suffix)
+    recorder = Recorder()
+    with app.app_context():
+        event.listen(db.engines[None], 'before_cursor_execute', recorder.listener('primary'))
+        event.listen(db.engines[READ_BIND], 'before_cursor_execute', recorder.listener('replica'))
+    yield app, client, f'/api/profiles/{profile_id}', recorder
+    assert recorder.replica_writes == []
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def names(response):
+    return {row['name'] for row in response.get_json()}
+
+
+def end_read_after_write_window(client):
+    with client.session_transaction() as session:
+        session.pop(PRIMARY_UNTIL_KEY, None)
+
+
+def test_write_runs_on_the_primary_and_pins_reads(replica):
+    _, client, base, recorder = replica
+    used, response = recorder.engines_used(
+        lambda: client.post(f'{base}/categories', json={'name': 'Fresh', 'type': 'expense'}))
+    assert response.status_code == 201
+    assert used == {'primary'}
+
+    used, response = recorder.engines_used(lambda: client.get(f'{base}/categories'))
+    assert used == {'primary'}
+    assert 'Fresh' in names(response)
+
+
+def test_read_after_the_window_uses_the_replica(replica):
+    _, client, base, recorder = replica
+    client.post(f'{base}/categories', json={'name': 'Unreplicated', 'type': 'expense'})
+    end_read_after_write_window(client)
+    used, response = recorder.engines_used(lambda: client.get(f'{base}/categories'))
+    assert used == {'replica'}
+    # The replica stopped at the snapshot, so the new category is not there yet
+    assert 'Unreplicated' not in names(response)
+
+
+def test_primary_only_route_reads_the_primary(replica):
+    _, client, _, recorder = replica
+    end_read_after_write_window(client)
+    used, response = recorder.engines_used(lambda: client.get('/api/health'))
+    assert response.status_code == 200
+    assert used == {'primary'}
+
+
+def test_another_users_write_does_not_pin_this_user(replica):
+    app, client, base, recorder = replica
+    end_read_after_write_window(client)
+    other = app.test_client()
+    login(other, 'other')
+    other.post('/api/profiles', json={'name': 'Other'})
+    used, _ = recorder.engines_used(lambda: client.get(f'{base}/categories'))
+    assert used == {'replica'}
+
+
+def test_scripts_read_the_primary_unless_they_prefer_the_replica(replica):
+    app, _, _, recorder = replica
+    from models import db, User
+    app.test_client().post('/api/register', json={'username': 'latecomer', 'email': 'latecomer@example.com',
+                                                  'password': PASSWORD})
+    with app.app_context():
+        used, on_primary = recorder.engines_used(lambda: db.session.query(User).count())
+    assert used == {'primary'}
+    with app.app_context():
+        prefer_replica()
+        used, on_replica = recorder.engines_used(lambda: db.session.query(User).count())
+    assert used == {'replica'}
+    # Users registered after the snapshot exist only on the primary
+    assert on_replica < on_primary
@@ -0,0 +1,28 @@
+"""Keyset pagination over rows whose created_at was stamped by the database, not by Python"""
+
+from sqlalchemy import text
+
+from models import db
+
+
+def test_server_stamped_rows_page_without_repeats(app, client):
+    profile_id = client.post('/api/profiles', json={'name': 'Raw inserts'}).get_json()['id']
+    client.post(f'/api/profiles/{profile_id}/transactions',
+                json={'type': 'expense', 'amount': 1, 'category': 'Food', 'date': '2024-05-01'})
+    with app.app_context():
+        for _ in range(4):
+            db.session.execute(text(
+                "INSERT INTO transactions (profile_id, type, amount, category, date) "
+                "VALUES (:profile_id, 'expense', 2, 'Food', '2024-05-01')"), {'profile_id': profile_id})
+        db.session.commit()
+
+    seen, cursor = [], None
+    for _ in range(10):
+        query = f'?limit=1&cursor={cursor}' if cursor else '?limit=1'
+        page = client.get(f'/api/profiles/{profile_id}/transactions{query}').get_json()
+        seen.extend(row['id'] for row in page['transactions'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
@@ -1,104 +1,225 @@
 #!/usr/bin/env python3
 """
 Simple script to view database contents
-Usage: python view_database.py
+Usage: python view_database.py [--limit 50] [--offset 0] [--user ID|USERNAME]
+                               [--profile ID] [--since YYYY-MM-DD] [--summary-only] [--exact]
+                               [--primary]
+
+Counts and income/expense totals are computed with GROUP BY in the database
+(from the monthly rollups unless --since falls mid-month or --exact is
+given), and listed rows are printed as they stream from a batched cursor.
+Queries run on a read replica when DATABASE_READ_URL(S) is set, unless
+--primary is given.
 """
 
-from app import app, db
-from app import User, Profile, Transaction
+import argparse
+from app import create_app
+from models import db, User, Profile, Transaction, MonthlyRollup
+from db_routing import prefer_replica
 from datetime import datetime
 
-def format_date(date_str):
-    """Format date string for display"""
-    if isinstance(date_str, str):
-        try:
-            return datetime.fromisoformat(date_str.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
-        except:
-            return date_str
-    return date_str
-
-def view_database():
-    with app.app_context():
+VIEW_BATCH_SIZE = 500
+DEFAULT_LIMIT = 50
+
+
+def format_date(value):
+    """Format a date or datetime for display"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value.isoformat() if value else 'Unknown'
+
+
+def user_condition(user):
+    """Match a --user value by id when numeric, otherwise by username"""
+    return User.id == int(user) if user.isdigit() else User.username == user
+
+
+def scoped(query, args):
+    """Apply --user/--profile to a query that already joins Profile and User"""
+    if args.user:
+        query = query.where(user_condition(args.user))
+    if args.profile:
+        query = query.where(Profile.id == args.profile)
+    return query
+
+
+def type_totals(args):
+    """
+    Subquery of (profile_id, tx_count, income, expenses)
+    The rollups already hold per-month counts and sums, so they answer
+    whole-month ranges without touching the transactions table
+    """
+    exact = args.exact or (args.since and args.since.day != 1)
+    if exact:
+        profile_id, tx_type = Transaction.profile_id, Transaction.type
+        tx_count, total = db.literal(1), Transaction.amount
+        query = db.select(profile_id).select_from(Transaction)
+        if args.since:
+            query = query.where(Transaction.date >= args.since.date())
+    else:
+        profile_id, tx_type = MonthlyRollup.profile_id, MonthlyRollup.type
+        tx_count, total = MonthlyRollup.tx_count, MonthlyRollup.total
+        query = db.select(profile_id).select_from(MonthlyRollup)
+        if args.since:
+            query = query.where(db.or_(
+                MonthlyRollup.year > args.since.year,
+                db.and_(MonthlyRollup.year == args.since.year, MonthlyRollup.month >= args.since.month)
+            ))
+    return query.add_columns(
+        db.func.sum(tx_count).label('tx_count'),
+        db.func.sum(db.case((tx_type == 'income', total), else_=0)).label('income'),
+        db.func.sum(db.case((tx_type == 'expense', total), else_=0)).label('expenses'),
+    ).group_by(profile_id).subquery()
+
+
+def stream(query, args):
+    """Yield rows of a paged query, fetched VIEW_BATCH_SIZE at a time"""
+    if args.limit:
+        query = query.limit(args.limit)
+    if args.offset:
+        query = query.offset(args.offset)
+    result = db.session.execute(query.execution_options(yield_per=VIEW_BATCH_SIZE))
+    for partition in result.partitions():
+        yield from partition
+
+
+def section(title, total, args):
+    shown = ''
+    if args.limit and total:
+        end = min(total, args.offset + args.limit)
+        shown = f", showing {args.offset + 1}-{end}" if args.offset < total else ', none at this offset'
+    print(f"📊 {title} ({total}{shown})")
+    print("-" * 80)
+    if not total:
+        print(f"  No {title.lower()} found")
+
+
+def show_users(args, user_count):
+    section('USERS', user_count, args)
+    query = db.select(User.id, User.username, User.email, User.created_at).order_by(User.id)
+    if args.user:
+        query = query.where(user_condition(args.user))
+    if args.profile:
+        query = query.where(User.id == db.select(Profile.user_id).where(Profile.id == args.profile).scalar_subquery())
+    for user in stream(query, args):
+        print(f"ID: {user.id}")
+        print(f"  Username: {user.username}")
+        print(f"  Email: {user.email}")
+        print(f"  Created: {format_date(user.created_at)}")
+        print()
+    print()
+
+
+def show_profiles(args, profile_count, totals):
+    section('PROFILES', profile_count, args)
+    query = scoped(db.select(
+        Profile.id, Profile.name, Profile.user_id, Profile.created_at, User.username,
+        db.func.coalesce(totals.c.tx_count, 0).label('tx_count')
+    ).outerjoin(User, User.id == Profile.user_id).outerjoin(
+        totals, totals.c.profile_id == Profile.id
+    ).order_by(Profile.id), args)
+    for profile in stream(query, args):
+        print(f"ID: {profile.id}")
+        print(f"  Name: {profile.name}")
+        print(f"  User: {profile.username or 'Unknown'} (ID: {profile.user_id})")
+        print(f"  Created: {format_date(profile.created_at)}")
+        print(f"  Transactions: {profile.tx_count}")
+        print()
+    print()
+
+
+def show_transactions(args, transaction_count):
+    section('TRANSACTIONS', transaction_count, args)
+    # Owner and profile come from the same query instead of a lookup per row
+    query = scoped(db.select(
+        Transaction.id, Transaction.type, Transaction.amount, Transaction.category,
+        Transaction.description, Transaction.date, Transaction.created_at,
+        Profile.name.label('profile_name'), User.username
+    ).outerjoin(Profile, Profile.id == Transaction.profile_id).outerjoin(
+        User, User.id == Profile.user_id
+    ).order_by(Transaction.date.desc(), Transaction.id.desc()), args)
+    if args.since:
+        query = query.where(Transaction.date >= args.since.date())
+    for tx in stream(query, args):
+        print(f"ID: {tx.id}")
+        print(f"  Type: {tx.type.upper()}")
+        print(f"  Amount: ${tx.amount:.2f}")
+        print(f"  Category: {tx.category}")
+        if tx.description:
+            print(f"  Description: {tx.description}")
+        print(f"  Date: {tx.date}")
+        print(f"  Profile: {tx.profile_name or 'Unknown'} (User: {tx.username or 'Unknown'})")
+        print(f"  Created: {format_date(tx.created_at)}")
+        print()
+    print()
+
+
+def view_database(args):
+    with create_app().app_context():
+        if not args.primary:
+            prefer_replica()
         print("=" * 80)
         print("FINANCE TRACKER DATABASE VIEWER")
         print("=" * 80)
         print()
-        
-        # Users
-        users = User.query.all()
-        print(f"📊 USERS ({len(users)})")
-        print("-" * 80)
-        if users:
-            for user in users:
-                print(f"ID: {user.id}")
-                print(f"  Username: {user.username}")
-                print(f"  Email: {user.email}")
-                print(f"  Created: {format_date(user.created_at.isoformat())}")
-                print()
-        else:
-            print("  No users found")
-        print()
-        
-        # Profiles
-        profiles = Profile.query.all()
-        print(f"📊 PROFILES ({len(profiles)})")
-        print("-" * 80)
-        if profiles:
-            for profile in profiles:
-                user = User.query.get(profile.user_id)
-                print(f"ID: {profile.id}")
-                print(f"  Name: {profile.name}")
-                print(f"  User: {user.username if user else 'Unknown'} (ID: {profile.user_id})")
-                print(f"  Created: {format_date(profile.created_at.isoformat())}")
-                
-                # Count transactions
-                tx_count = Transaction.query.filter_by(profile_id=profile.id).count()
-                print(f"  Transactions: {tx_count}")
-                print()
-        else:
-            print("  No profiles found")
-        print()
-        
-        # Transactions
-        transactions = Transaction.query.order_by(Transaction.date.desc()).all()
-        print(f"📊 TRANSACTIONS ({len(transactions)})")
-        print("-" * 80)
-        if transactions:
-            for tx in transactions:
-                profile = Profile.query.get(tx.profile_id)
-                user = User.query.get(profile.user_id) if profile else None
-                print(f"ID: {tx.id}")
-                print(f"  Type: {tx.type.upper()}")
-                print(f"  Amount: ${tx.amount:.2f}")
-                print(f"  Category: {tx.category}")
-                if tx.description:
-                    print(f"  Description: {tx.description}")
-                print(f"  Date: {tx.date}")
-                print(f"  Profile: {profile.name if profile else 'Unknown'} (User: {user.username if user else 'Unknown'})")
-                print(f"  Created: {format_date(tx.created_at.isoformat())}")
-                print()
+
+        totals = type_totals(args)
+        # Profile count and transaction totals in one aggregate over the scoped profiles
+        overall = db.session.execute(scoped(db.select(
+            db.func.count(Profile.id).label('profiles'),
+            db.func.count(db.distinct(Profile.user_id)).label('owners'),
+            db.func.coalesce(db.func.sum(totals.c.tx_count), 0).label('transactions'),
+            db.func.coalesce(db.func.sum(totals.c.income), 0).label('income'),
+            db.func.coalesce(db.func.sum(totals.c.expenses), 0).label('expenses'),
+        ).select_from(Profile).outerjoin(User, User.id == Profile.user_id).outerjoin(
+            totals, totals.c.profile_id == Profile.id
+        ), args)).one()
+        if args.profile:
+            user_count = overall.owners
         else:
-            print("  No transactions found")
-        print()
-        
+            users = db.select(db.func.count()).select_from(User)
+            if args.user:
+                users = users.where(user_condition(args.user))
+            user_count = db.session.execute(users).scalar()
+
+        if not args.summary_only:
+            show_users(args, user_count)
+            show_profiles(args, overall.profiles, totals)
+            show_transactions(args, overall.transactions)
+
         # Summary Statistics
         print("=" * 80)
         print("SUMMARY STATISTICS")
         print("=" * 80)
-        print(f"Total Users: {len(users)}")
-        print(f"Total Profiles: {len(profiles)}")
-        print(f"Total Transactions: {len(transactions)}")
-        
-        if transactions:
-            total_income = sum(tx.amount for tx in transactions if tx.type == 'income')
-            total_expenses = sum(tx.amount for tx in transactions if tx.type == 'expense')
-            balance = total_income - total_expenses
-            
-            print(f"Total Income: ${total_income:.2f}")
-            print(f"Total Expenses: ${total_expenses:.2f}")
-            print(f"Net Balance: ${balance:.2f}")
+        print(f"Total Users: {user_count}")
+        print(f"Total Profiles: {overall.profiles}")
+        print(f"Total Transactions: {overall.transactions}")
+
+        if overall.transactions:
+            print(f"Total Income: ${overall.income:.2f}")
+            print(f"Total Expenses: ${overall.expenses:.2f}")
+            print(f"Net Balance: ${overall.income - overall.expenses:.2f}")
         print()
 
-if __name__ == '__main__':
-    view_database()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='View database contents')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help=f'Rows to list per section (default: {DEFAULT_LIMIT}, 0 for all)')
+    parser.add_argument('--offset', type=int, default=0, help='Rows to skip per section')
+    parser.add_argument('--user', help='Only this user (id or username)')
+    parser.add_argument('--profile', type=int, help='Only this profile id')
+    parser.add_argument('--since', type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+                        help='Only transactions dated on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--summary-only', action='store_true', help='Print only the summary statistics')
+    parser.add_argument('--exact', action='store_true',
+                        help='Total from the transactions table instead of the monthly rollups')
+    parser.add_argument('--primary', action='store_true', help='Read from the primary even if replicas are configured')
+    args = parser.parse_args(argv)
+    if args.limit < 0 or args.offset < 0:
+        parser.error('--limit and --offset must not be negative')
+    return args
+
+
+if __name__ == '__main__':
+    view_database(parse_args())
@@ -0,0 +1,7 @@
+# WSGI entry point for gunicorn: gunicorn --preload wsgi:app
+# With --preload the app is built and warmed once in the master and shared
+# copy-on-write with the forked workers; run `flask --app app init-db` first
+from app import create_app, warm_up
+
+app = create_app()
+warm_up(app)
@@ -1,6 +1,6 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useLocation, useNavigate } from 'react-router-dom';
-import { User, LogOut, PlusCircle, Settings as SettingsIcon } from 'lucide-react';
+import { User, LogOut, PlusCircle, Upload, Settings as SettingsIcon } from 'lucide-react';
 import { api, APIError } from '../../utils/api';
 import { useAuth } from '../../context/AuthContext';
 import StatsCards from './StatsCards';
@@ -8,6 +8,10 @@ import TransactionForm from './TransactionForm';
 import TransactionList from './TransactionList';
 import CategoryBreakdown from './CategoryBreakdown';
 
+const PAGE_SIZE = 50;
+// Per-row errors listed in the import summary; the rest are only counted
+const IMPORT_ERRORS_SHOWN = 5;
+
 const Dashboard = () => {
   const { profileId } = useParams();
   const location = useLocation();
@@ -16,11 +20,19 @@ const Dashboard = () => {
 
   const [currentProfile, setCurrentProfile] = useState(location.state?.profile || null);
   const [transactions, setTransactions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [summary, setSummary] = useState(null);
   const [showAddTransaction, setShowAddTransaction] = useState(false);
+  const [formData, setFormData] = useState(null);
+  // True until the form has been opened once on the lists loaded with the dashboard
+  const formDataFresh = useRef(false);
+  const importInput = useRef(null);
+  const [importing, setImporting] = useState(false);
 
   useEffect(() => {
     if (profileId) {
-      loadTransactions(profileId);
+      loadDashboard(profileId);
       
       // If profile not in state, fetch it
       if (!currentProfile) {
@@ -44,20 +56,105 @@ const Dashboard = () => {
     }
   };
 
-  const loadTransactions = async (id) => {
+  // First paint: transactions, summary and the transaction form's lists in one request
+  const loadDashboard = async (id) => {
+    try {
+      const data = await api.getProfileBootstrap(
+        id, ['transactions', 'summary', 'categories', 'tags', 'accounts'], { limit: PAGE_SIZE }
+      );
+      setTransactions(data.transactions.transactions);
+      setNextCursor(data.transactions.next_cursor);
+      setSummary(data.summary);
+      setFormData({ categories: data.categories, tags: data.tags, accounts: data.accounts });
+      formDataFresh.current = true;
+    } catch (error) {
+      if (error instanceof APIError && error.status !== 401) {
+        console.error('Failed to load dashboard:', error.message);
+      }
+    }
+  };
+
+  // Categories, tags and accounts can change in Settings or another tab after first paint
+  const loadFormData = async (id) => {
+    try {
+      const data = await api.getProfileBootstrap(id, ['categories', 'tags', 'accounts']);
+      setFormData({ categories: data.categories, tags: data.tags, accounts: data.accounts });
+    } catch (error) {
+      if (error instanceof APIError && error.status !== 401) {
+        console.error('Failed to load form data:', error.message);
+      }
+    }
+  };
+
+  const toggleAddTransaction = () => {
+    if (!showAddTransaction) {
+      // The first opening uses the bootstrap lists; later ones refetch them
+      if (!formDataFresh.current) {
+        loadFormData(profileId);
+      }
+      formDataFresh.current = false;
+    }
+    setShowAddTransaction(!showAddTransaction);
+  };
+
+  const loadSummary = async (id) => {
     try {
-      const data = await api.getTransactions(id);
-      setTransactions(data);
+      const data = await api.getSummary(id);
+      setSummary(data);
     } catch (error) {
       if (error instanceof APIError && error.status !== 401) {
-        console.error('Failed to load transactions:', error.message);
+        console.error('Failed to load summary:', error.message);
       }
     }
   };
 
+  const loadMoreTransactions = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const data = await api.getTransactions(profileId, { limit: PAGE_SIZE, cursor: nextCursor });
+      setTransactions(prev => [...prev, ...data.transactions]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      if (error instanceof APIError && error.status !== 401) {
+        console.error('Failed to load more transactions:', error.message);
+      }
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleTransactionAdded = (transaction) => {
     setTransactions([transaction, ...transactions]);
     setShowAddTransaction(false);
+    loadSummary(profileId);
+    loadFormData(profileId);
+    formDataFresh.current = true;
+  };
+
+  // CSV with the export's columns (type, amount, category, date, ...); tags are ';'-separated names
+  const importTransactions = async (event) => {
+    const file = event.target.files[0];
+    event.target.value = '';
+    if (!file) return;
+
+    setImporting(true);
+    try {
+      const result = await api.importTransactions(profileId, file);
+      const lines = [`Imported ${result.imported} transactions.`];
+      if (result.failed) {
+        lines.push(`${result.failed} rows were skipped:`);
+        result.errors.slice(0, IMPORT_ERRORS_SHOWN).forEach(({ row, error }) => lines.push(`Row ${row}: ${error}`));
+      }
+      alert(lines.join('\n'));
+      loadDashboard(profileId);
+    } catch (error) {
+      const rowError = error instanceof APIError && error.data?.errors?.[0];
+      const message = error instanceof APIError ? error.message : 'Failed to import transactions';
+      alert(rowError ? `${message}\nRow ${rowError.row}: ${rowError.error}` : message);
+    } finally {
+      setImporting(false);
+    }
   };
 
   const deleteTransaction = async (transactionId) => {
@@ -68,6 +165,7 @@ const Dashboard = () => {
     try {
       await api.deleteTransaction(transactionId);
       setTransactions(transactions.filter(t => t.id !== transactionId));
+      loadSummary(profileId);
     } catch (error) {
       const message = error instanceof APIError ? error.message : 'Failed to delete transaction';
       alert(message);
@@ -75,22 +173,17 @@ const Dashboard = () => {
   };
 
   const calculateStats = () => {
-    const income = transactions
-      .filter(t => t.type === 'income')
-      .reduce((sum, t) => sum + parseFloat(t.amount), 0);
-    const expenses = transactions
-      .filter(t => t.type === 'expense')
-      .reduce((sum, t) => sum + parseFloat(t.amount), 0);
-    return { income, expenses, balance: income - expenses };
+    if (!summary) {
+      return { income: 0, expenses: 0, balance: 0 };
+    }
+    const { income, expense, balance } = summary.totals;
+    return { income, expenses: expense, balance };
   };
 
   const getCategoryBreakdown = () => {
     const breakdown = {};
-    transactions.forEach(t => {
-      if (!breakdown[t.category]) {
-        breakdown[t.category] = { income: 0, expense: 0 };
-      }
-      breakdown[t.category][t.type] += parseFloat(t.amount);
+    (summary?.categories || []).forEach(({ category, income, expense }) => {
+      breakdown[category] = { income, expense };
     });
     return breakdown;
   };
@@ -146,21 +239,37 @@ const Dashboard = () => {
         {/* Stats Cards */}
         <StatsCards stats={stats} />
 
-        {/* Add Transaction Button */}
-        <div className="mb-3 sm:mb-6">
+        {/* Add / Import Transaction Buttons */}
+        <div className="mb-3 sm:mb-6 flex flex-col md:flex-row gap-2 sm:gap-3 md:gap-4">
           <button
-            onClick={() => setShowAddTransaction(!showAddTransaction)}
+            onClick={toggleAddTransaction}
             className="w-full md:w-auto px-4 sm:px-8 md:px-10 py-2.5 sm:py-4 md:py-5 bg-gray-900 text-white rounded-lg sm:rounded-2xl font-semibold hover:bg-gray-800 transition-all duration-300 shadow-lg hover:shadow-2xl flex items-center justify-center gap-2 sm:gap-3 text-sm sm:text-lg"
           >
             <PlusCircle className="w-4 h-4 sm:w-6 sm:h-6 md:w-7 md:h-7" />
             Add Transaction
           </button>
+          <button
+            onClick={() => importInput.current?.click()}
+            disabled={importing}
+            className="w-full md:w-auto px-4 sm:px-8 md:px-10 py-2.5 sm:py-4 md:py-5 bg-white text-gray-900 rounded-lg sm:rounded-2xl font-semibold hover:bg-gray-50 transition-all duration-300 border-2 border-gray-300 disabled:opacity-50 flex items-center justify-center gap-2 sm:gap-3 text-sm sm:text-lg"
+          >
+            <Upload className="w-4 h-4 sm:w-6 sm:h-6 md:w-7 md:h-7" />
+            {importing ? 'Importing...' : 'Import CSV'}
+          </button>
+          <input
+            ref={importInput}
+            type="file"
+            accept=".csv,text/csv"
+            onChange={importTransactions}
+            className="hidden"
+          />
         </div>
 
         {/* Add Transaction Form */}
         {showAddTransaction && (
           <TransactionForm
             profileId={profileId}
+            initialData={formData}
             onTransactionAdded={handleTransactionAdded}
             onCancel={() => setShowAddTransaction(false)}
           />
@@ -173,6 +282,9 @@ const Dashboard = () => {
         <TransactionList
           transactions={transactions}
           onDelete={deleteTransaction}
+          hasMore={Boolean(nextCursor)}
+          loadingMore={loadingMore}
+          onLoadMore={loadMoreTransactions}
         />
       </div>
     </div>
@@ -3,7 +3,7 @@ import { api, APIError } from '../../utils/api';
 import { validateTransaction } from '../../utils/validation';
 import { X } from 'lucide-react';
 
-const TransactionForm = ({ profileId, onTransactionAdded, onCancel }) => {
+const TransactionForm = ({ profileId, initialData, onTransactionAdded, onCancel }) => {
   const [newTransaction, setNewTransaction] = useState({
     type: 'expense',
     amount: '',
@@ -15,12 +15,22 @@ const TransactionForm = ({ profileId, onTransactionAdded, onCancel }) => {
     date: new Date().toISOString().split('T')[0]
   });
   
-  const [categories, setCategories] = useState([]);
-  const [tags, setTags] = useState([]);
-  const [accounts, setAccounts] = useState([]);
+  const [categories, setCategories] = useState(initialData?.categories || []);
+  const [tags, setTags] = useState(initialData?.tags || []);
+  const [accounts, setAccounts] = useState(initialData?.accounts || []);
   const [selectedTags, setSelectedTags] = useState([]);
   
+  // Follow the dashboard's lists when it refreshes them while the form is open
+  useEffect(() => {
+    if (!initialData) return;
+    setCategories(initialData.categories);
+    setTags(initialData.tags);
+    setAccounts(initialData.accounts);
+  }, [initialData]);
+
   const loadData = useCallback(async () => {
+    // The dashboard loads these (bootstrap first, then on reopen and after writes)
+    if (initialData) return;
     try {
       const [categoriesData, tagsData, accountsData] = await Promise.all([
         api.getCategories(profileId),
@@ -33,7 +43,7 @@ const TransactionForm = ({ profileId, onTransactionAdded, onCancel }) => {
     } catch (error) {
       console.error('Failed to load form data:', error);
     }
-  }, [profileId]);
+  }, [profileId, initialData]);
   
   useEffect(() => {
     loadData();
@@ -1,7 +1,7 @@
 import React from 'react';
 import { TrendingUp, TrendingDown, Trash2, DollarSign, Calendar } from 'lucide-react';
 
-const TransactionList = ({ transactions, onDelete }) => {
+const TransactionList = ({ transactions, onDelete, hasMore = false, loadingMore = false, onLoadMore }) => {
   return (
     <div className="bg-gradient-to-br from-gray-50 to-gray-100 rounded-2xl sm:rounded-3xl p-5 sm:p-6 md:p-8 shadow-2xl border-2 border-gray-200">
       <h2 className="text-xl sm:text-2xl md:text-3xl font-semibold text-gray-900 mb-4 sm:mb-6 flex items-center gap-2 sm:gap-3">
@@ -51,6 +51,15 @@ const TransactionList = ({ transactions, onDelete }) => {
                 </div>
               </div>
             ))}
+          {hasMore && (
+            <button
+              onClick={onLoadMore}
+              disabled={loadingMore}
+              className="w-full py-3 sm:py-4 bg-white text-gray-900 rounded-xl sm:rounded-2xl font-semibold hover:bg-gray-50 transition-all duration-300 border-2 border-gray-300 disabled:opacity-50 text-sm sm:text-base"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
         </div>
       ) : (
         <div className="text-center py-12 sm:py-16">
@@ -96,9 +96,28 @@ export const api = {
     return handleResponse(response);
   },
 
+  // Everything a profile's dashboard needs for first paint, in one request
+  getProfileBootstrap: async (profileId, include = [], { limit } = {}) => {
+    const params = new URLSearchParams();
+    if (include.length) params.append('include', include.join(','));
+    if (limit) params.append('limit', limit);
+    const queryString = params.toString() ? `?${params.toString()}` : '';
+
+    const response = await fetch(`${API_URL}/profiles/${profileId}/bootstrap${queryString}`, {
+      credentials: 'include'
+    });
+    return handleResponse(response);
+  },
+
   // Transactions
-  getTransactions: async (profileId) => {
-    const response = await fetch(`${API_URL}/profiles/${profileId}/transactions`, {
+  getTransactions: async (profileId, filters = {}) => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') params.append(key, value);
+    });
+    const queryString = params.toString() ? `?${params.toString()}` : '';
+
+    const response = await fetch(`${API_URL}/profiles/${profileId}/transactions${queryString}`, {
       credentials: 'include'
     });
     return handleResponse(response);
@@ -114,6 +133,40 @@ export const api = {
     return handleResponse(response);
   },
 
+  // Accepts an array of transactions or a CSV File
+  importTransactions: async (profileId, payload) => {
+    let options;
+    if (payload instanceof File) {
+      const formData = new FormData();
+      formData.append('file', payload);
+      options = { body: formData };
+    } else {
+      options = {
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(payload)
+      };
+    }
+    const response = await fetch(`${API_URL}/profiles/${profileId}/transactions/bulk`, {
+      method: 'POST',
+      credentials: 'include',
+      ...options
+    });
+    return handleResponse(response);
+  },
+
+  getSummary: async (profileId, { from, to, bucket } = {}) => {
+    const params = new URLSearchParams();
+    if (from) params.append('from', from);
+    if (to) params.append('to', to);
+    if (bucket) params.append('bucket', bucket);
+    const queryString = params.toString() ? `?${params.toString()}` : '';
+
+    const response = await fetch(`${API_URL}/profiles/${profileId}/summary${queryString}`, {
+      credentials: 'include'
+    });
+    return handleResponse(response);
+  },
+
   deleteTransaction: async (transactionId) => {
     const response = await fetch(`${API_URL}/transactions/${transactionId}`, {
       method: 'DELETE',